@@ -0,0 +1,100 @@
+"""Baseline: schema as created by Base.metadata.create_all before migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+Existing databases created by create_all should be stamped rather than upgraded:
+
+    alembic stamp 0001
+    alembic upgrade head
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+split_type = sa.Enum("EQUAL", "PERCENTAGE", "EXACT", name="splittype")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    
+    op.create_table(
+        "groups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_groups_id", "groups", ["id"])
+    
+    op.create_table(
+        "group_members",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("joined_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_group_members_id", "group_members", ["id"])
+    
+    op.create_table(
+        "expenses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("paid_by_user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("split_type", split_type, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_expenses_id", "expenses", ["id"])
+    
+    op.create_table(
+        "expense_splits",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("expense_id", sa.Integer(), sa.ForeignKey("expenses.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("percentage", sa.Float()),
+    )
+    op.create_index("ix_expense_splits_id", "expense_splits", ["id"])
+    
+    op.create_table(
+        "balances",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("owes_user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("owed_to_user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_balances_id", "balances", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("balances")
+    op.drop_table("expense_splits")
+    op.drop_table("expenses")
+    op.drop_table("group_members")
+    op.drop_table("groups")
+    op.drop_table("users")
+    split_type.drop(op.get_bind(), checkfirst=True)
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""Indexes and unique constraints for the hot query paths
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:05:00
+
+On PostgreSQL every index is built CONCURRENTLY (outside a transaction) so
+writes keep flowing during the migration; unique constraints are attached to
+the concurrently built unique indexes. Duplicate rows that would violate the
+new constraints are merged first.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    # get_group_expenses: WHERE group_id = ? ORDER BY created_at DESC
+    ("ix_expenses_group_id_created_at", "expenses", ["group_id", "created_at"]),
+    ("ix_expenses_paid_by_user_id", "expenses", ["paid_by_user_id"]),
+    ("ix_expense_splits_user_id", "expense_splits", ["user_id"]),
+    # get_user_balance_summary
+    ("ix_balances_owes_user_id", "balances", ["owes_user_id"]),
+    ("ix_balances_owed_to_user_id", "balances", ["owed_to_user_id"]),
+    # get_user_groups
+    ("ix_group_members_user_id", "group_members", ["user_id"]),
+]
+
+# Leading columns double as the expense_id / group_id lookup indexes
+UNIQUE_CONSTRAINTS = [
+    ("uq_expense_splits_expense_id_user_id", "expense_splits", ["expense_id", "user_id"], "amount"),
+    ("uq_balances_group_id_pair", "balances", ["group_id", "owes_user_id", "owed_to_user_id"], "amount"),
+    ("uq_group_members_group_id_user_id", "group_members", ["group_id", "user_id"], None),
+]
+
+
+def _merge_duplicates(table: str, columns: list, sum_column: Union[str, None]) -> None:
+    """Keep the lowest id per key, folding any summed column of the duplicates into it."""
+    key = ", ".join(columns)
+    match = " AND ".join(f"d.{column} = {table}.{column}" for column in columns)
+    survivors = f"SELECT MIN(id) FROM {table} GROUP BY {key} HAVING COUNT(*) > 1"
+    
+    if sum_column:
+        op.execute(
+            f"UPDATE {table} SET {sum_column} = "
+            f"(SELECT SUM(d.{sum_column}) FROM {table} d WHERE {match}) "
+            f"WHERE id IN ({survivors})"
+        )
+    op.execute(
+        f"DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY {key})"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for _, table, columns, sum_column in UNIQUE_CONSTRAINTS:
+        _merge_duplicates(table, columns, sum_column)
+    
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+            for name, table, columns, _ in UNIQUE_CONSTRAINTS:
+                op.create_index(name, table, columns, unique=True, postgresql_concurrently=True)
+                op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+        return
+    
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+    for name, table, columns, _ in UNIQUE_CONSTRAINTS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_unique_constraint(name, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in UNIQUE_CONSTRAINTS:
+                op.drop_constraint(name, table, type_="unique")
+            for name, table, _ in INDEXES:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        return
+    
+    for name, table, _, _ in UNIQUE_CONSTRAINTS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(name, type_="unique")
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""Persisted group insights and precompute run checkpoints
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:30:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "group_insights",
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("model", sa.String(), primary_key=True),
+        sa.Column("data_version", sa.String(32), nullable=False),
+        sa.Column("group_name", sa.String(), nullable=False),
+        sa.Column("insights", sa.Text(), nullable=False),
+        sa.Column("total_expenses", sa.Integer(), nullable=False),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("generation_ms", sa.Float()),
+        sa.Column("generated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    
+    op.create_table(
+        "insights_precompute_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("model", sa.String(), nullable=False),
+        sa.Column("active_since", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("cursor_last_expense_at", sa.DateTime(timezone=True)),
+        sa.Column("cursor_group_id", sa.Integer()),
+        sa.Column("total_groups", sa.Integer(), nullable=False),
+        sa.Column("processed", sa.Integer(), nullable=False),
+        sa.Column("generated", sa.Integer(), nullable=False),
+        sa.Column("skipped", sa.Integer(), nullable=False),
+        sa.Column("failed", sa.Integer(), nullable=False),
+        sa.Column("active_seconds", sa.Float(), nullable=False),
+        sa.Column("last_error", sa.String()),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_insights_precompute_runs_id", "insights_precompute_runs", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("insights_precompute_runs")
+    op.drop_table("group_insights")
\ No newline at end of file
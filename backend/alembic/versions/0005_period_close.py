@@ -0,0 +1,82 @@
+"""Balance checkpoints and archive tables for closed periods
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The type already exists from the baseline's expenses table
+split_type = sa.Enum("EQUAL", "PERCENTAGE", "EXACT", name="splittype").with_variant(
+    postgresql.ENUM("EQUAL", "PERCENTAGE", "EXACT", name="splittype", create_type=False), "postgresql"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "balance_checkpoints",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("closed_before", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expense_count", sa.Integer(), nullable=False),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_balance_checkpoints_id", "balance_checkpoints", ["id"])
+    op.create_index("ix_balance_checkpoints_group_id_closed_before", "balance_checkpoints", ["group_id", "closed_before"])
+    
+    op.create_table(
+        "balance_checkpoint_entries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("checkpoint_id", sa.Integer(), sa.ForeignKey("balance_checkpoints.id"), nullable=False),
+        sa.Column("owes_user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("owed_to_user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_balance_checkpoint_entries_id", "balance_checkpoint_entries", ["id"])
+    op.create_index("ix_balance_checkpoint_entries_checkpoint_id", "balance_checkpoint_entries", ["checkpoint_id"])
+    
+    op.create_table(
+        "archived_expenses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("checkpoint_id", sa.Integer(), sa.ForeignKey("balance_checkpoints.id"), nullable=False),
+        sa.Column("expense_id", sa.Integer(), nullable=False),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("paid_by_user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("split_type", split_type, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_archived_expenses_group_id_created_at", "archived_expenses", ["group_id", "created_at"])
+    op.create_index("ix_archived_expenses_checkpoint_id_expense_id", "archived_expenses", ["checkpoint_id", "expense_id"])
+    
+    op.create_table(
+        "archived_expense_splits",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("checkpoint_id", sa.Integer(), sa.ForeignKey("balance_checkpoints.id"), nullable=False),
+        sa.Column("expense_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("percentage", sa.Float()),
+    )
+    op.create_index("ix_archived_expense_splits_checkpoint_id_expense_id", "archived_expense_splits", ["checkpoint_id", "expense_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("archived_expense_splits")
+    op.drop_table("archived_expenses")
+    op.drop_table("balance_checkpoint_entries")
+    op.drop_table("balance_checkpoints")
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""Daily spend rollups per group and per member
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 18:00:00
+
+Backfill existing history afterwards with python -m app.jobs.rebuild_spend_rollups.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "group_daily_spend",
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("expense_count", sa.Integer(), nullable=False),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+    )
+    
+    op.create_table(
+        "user_daily_spend",
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("paid_count", sa.Integer(), nullable=False),
+        sa.Column("paid_amount", sa.Float(), nullable=False),
+        sa.Column("share_count", sa.Integer(), nullable=False),
+        sa.Column("share_amount", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_user_daily_spend_user_id_day", "user_daily_spend", ["user_id", "day"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_daily_spend")
+    op.drop_table("group_daily_spend")
\ No newline at end of file
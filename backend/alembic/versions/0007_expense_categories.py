@@ -0,0 +1,34 @@
+"""Expense categories
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 20:00:00
+
+Existing rows stay NULL until python -m app.jobs.categorise_expenses fills them in.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("expenses", sa.Column("category", sa.String(32)))
+    op.add_column("archived_expenses", sa.Column("category", sa.String(32)))
+    op.create_index("ix_expenses_group_id_category_amount", "expenses", ["group_id", "category", "amount"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_expenses_group_id_category_amount", table_name="expenses")
+    # Batch mode so SQLite, which can't always drop columns in place, rebuilds the tables
+    for table in ("archived_expenses", "expenses"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("category")
\ No newline at end of file
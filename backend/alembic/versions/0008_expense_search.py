@@ -0,0 +1,66 @@
+"""Expense search indexes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 22:00:00
+
+SQLite gets the expenses_fts FTS5 table and its triggers, filled from the
+existing rows with FTS5's 'rebuild' command. PostgreSQL gets a GIN index on
+to_tsvector('simple', description), built CONCURRENTLY as in 0002.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS = ("expenses_fts_insert", "expenses_fts_delete", "expenses_fts_update")
+
+# As in app/models/expense.py at this revision
+FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+        description, group_id, content='expenses', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts(rowid, description, group_id) VALUES (new.id, new.description, new.group_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description, group_id) VALUES ('delete', old.id, old.description, old.group_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF description, group_id ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description, group_id) VALUES ('delete', old.id, old.description, old.group_id);
+        INSERT INTO expenses_fts(rowid, description, group_id) VALUES (new.id, new.description, new.group_id);
+    END""",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_expenses_description_tsv", "expenses", [sa.text("to_tsvector('simple', description)")],
+                postgresql_using="gin", postgresql_concurrently=True
+            )
+    elif dialect == "sqlite":
+        for statement in FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index("ix_expenses_description_tsv", table_name="expenses", postgresql_concurrently=True)
+    elif dialect == "sqlite":
+        for trigger in TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS expenses_fts")
\ No newline at end of file
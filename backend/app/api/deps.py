@@ -1,4 +1,6 @@
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
@@ -21,6 +23,18 @@ def verify_group_member(group_id: int, user_id: int, db: Session = Depends(get_d
         .filter(GroupMember.group_id == group_id, GroupMember.user_id == user_id)
         .first()
     )
+    if not member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User is not a member of this group"
+        )
+    return True
+
+async def verify_group_member_async(group_id: int, user_id: int, db: AsyncSession) -> bool:
+    """Verify user is a member of the group (AsyncSession variant)"""
+    member = (await db.execute(
+        select(GroupMember.id).where(GroupMember.group_id == group_id, GroupMember.user_id == user_id)
+    )).first()
     if not member:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
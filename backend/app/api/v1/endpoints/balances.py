@@ -1,39 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_read_db, get_db, get_read_db
 from app.schemas.balance import (
     BalanceDetail, 
     UserBalanceSummary, 
     SettlementSuggestion,
     GroupBalance
 )
-from app.services.balance_service import BalanceService
+from app.services.balance_service import AsyncBalanceService, BalanceService
 from app.services.group_service import GroupService
-from app.api.deps import get_current_user, verify_group_member
+from app.api.deps import get_current_user, verify_group_member, verify_group_member_async
 from app.models.user import User
+from app.utils.normalized import NormalizedUsers
+from app.utils.sparse_fields import SparseFields
 
 router = APIRouter()
 
 @router.get("/groups/{group_id}/balances", response_model=List[BalanceDetail])
-def get_group_balances(
+async def get_group_balances(
     group_id: int, 
     user_id: int = Query(..., description="User ID for authorization"),
-    db: Session = Depends(get_db)
+    compact: bool = Query(False, description="Return compact rows with id/name user references"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (implies compact)"),
+    normalized: bool = Query(False, description="Send each user once in a `users` side table, referenced by id from the rows (implies compact)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get all balances for a specific group"""
     # Verify user is member of the group
-    verify_group_member(group_id, user_id, db)
+    await verify_group_member_async(group_id, user_id, db)
     
-    balance_service = BalanceService(db)
-    return balance_service.get_group_balances(group_id)
+    balance_service = AsyncBalanceService(db)
+    selected = SparseFields.parse(fields, BalanceDetail.model_fields)
+    if compact or normalized or selected is not None:
+        # Fast path: rows come straight from SQL tuples and skip response_model validation
+        rows = SparseFields.select(await balance_service.get_group_balance_rows(group_id), selected)
+        if normalized:
+            return ORJSONResponse(await NormalizedUsers.build(db, "balances", rows))
+        return ORJSONResponse(rows)
+    return await balance_service.get_group_balances(group_id)
 
 @router.get("/users/{user_id}/balances", response_model=UserBalanceSummary)
-def get_user_balance_summary(
+async def get_user_balance_summary(
     user_id: int,
     requesting_user_id: int = Query(..., description="Requesting user ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get balance summary for a user across all groups"""
     # For demo purposes, allow users to view their own balances
@@ -42,28 +56,28 @@ def get_user_balance_summary(
         # Could add friend/group member check here
         pass
     
-    balance_service = BalanceService(db)
-    return balance_service.get_user_balance_summary(user_id)
+    balance_service = AsyncBalanceService(db)
+    return await balance_service.get_user_balance_summary(user_id)
 
 @router.get("/groups/{group_id}/settlements", response_model=List[SettlementSuggestion])
-def get_settlement_suggestions(
+async def get_settlement_suggestions(
     group_id: int,
     user_id: int = Query(..., description="User ID for authorization"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get optimized settlement suggestions for a group"""
     # Verify user is member of the group
-    verify_group_member(group_id, user_id, db)
+    await verify_group_member_async(group_id, user_id, db)
     
-    balance_service = BalanceService(db)
-    return balance_service.get_settlement_suggestions(group_id)
+    balance_service = AsyncBalanceService(db)
+    return await balance_service.get_settlement_suggestions(group_id)
 
 @router.get("/users/{user_id}/balances/detailed")
 def get_user_detailed_balances(
     user_id: int,
     requesting_user_id: int = Query(..., description="Requesting user ID"),
     group_id: Optional[int] = Query(None, description="Filter by group ID"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get detailed balance breakdown for a user"""
     # Authorization check
@@ -185,7 +199,7 @@ def get_balance_history(
     group_id: int,
     user_id: int = Query(..., description="User ID for authorization"),
     limit: int = Query(50, description="Number of records to return"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get balance change history for a group (requires balance audit table)"""
     # Verify user is member of the group
@@ -202,7 +216,7 @@ def get_balance_history(
 def get_balance_analytics(
     user_id: int = Query(..., description="User ID for authorization"),
     days: int = Query(30, description="Number of days to analyze"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get balance analytics for user's groups"""
     balance_service = BalanceService(db)
@@ -1,27 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
-from app.database import get_db
-from app.schemas.expense import Expense as ExpenseSchema, ExpenseCreate
-from app.services.expense_service import ExpenseService
+from app.core.config import settings
+from app.database import get_async_db, get_async_read_db
+from app.schemas.expense import CategoryTotal, Expense as ExpenseSchema, ExpenseCreate
+from app.services.expense_service import AsyncExpenseService
+from app.utils.normalized import NormalizedUsers
+from app.utils.sparse_fields import SparseFields
 
 router = APIRouter()
 
+ConsistencyQuery = Query(
+    None,
+    description="sync: balances are updated before the response; eventual: the outbox worker updates them shortly after"
+)
+
 @router.post("/{group_id}/expenses", response_model=ExpenseSchema)
-def create_expense(group_id: int, expense: ExpenseCreate, db: Session = Depends(get_db)):
-    expense_service = ExpenseService(db)
-    return expense_service.create_expense(group_id, expense)
+async def create_expense(
+    group_id: int,
+    expense: ExpenseCreate,
+    consistency: Optional[Literal["sync", "eventual"]] = ConsistencyQuery,
+    db: AsyncSession = Depends(get_async_db)
+):
+    expense_service = AsyncExpenseService(db)
+    return await expense_service.create_expense(group_id, expense, consistency or settings.BALANCE_CONSISTENCY)
 
 @router.get("/{group_id}/expenses", response_model=List[ExpenseSchema])
-def get_group_expenses(group_id: int, db: Session = Depends(get_db)):
-    expense_service = ExpenseService(db)
-    return expense_service.get_group_expenses(group_id)
+async def get_group_expenses(
+    group_id: int,
+    compact: bool = Query(False, description="Return compact rows with id/name user references"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (implies compact)"),
+    normalized: bool = Query(False, description="Send each user once in a `users` side table, referenced by id from the rows (implies compact)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Only the newest `limit` expenses (default all)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    expense_service = AsyncExpenseService(db)
+    selected = SparseFields.parse(fields, ExpenseSchema.model_fields)
+    if compact or normalized or selected is not None:
+        # Fast path: rows come straight from SQL tuples and skip response_model validation
+        rows = await expense_service.get_group_expense_rows(
+            group_id,
+            include_splits=selected is None or "splits" in selected,
+            limit=limit
+        )
+        rows = SparseFields.select(rows, selected)
+        if normalized:
+            return ORJSONResponse(await NormalizedUsers.build(db, "expenses", rows))
+        return ORJSONResponse(rows)
+    return await expense_service.get_group_expenses(group_id, limit)
+
+@router.get("/{group_id}/expense-categories", response_model=List[CategoryTotal])
+async def get_group_expense_categories(group_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Spending per category over the group's live expenses, largest first"""
+    expense_service = AsyncExpenseService(db)
+    return await expense_service.get_group_category_totals(group_id)
+
+@router.get("/{group_id}/expenses/search")
+async def search_group_expenses(
+    group_id: int,
+    q: str = Query(..., min_length=1, max_length=200, description="Words the description must contain; each matches as a prefix"),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Compact expense rows (no splits) matching the query, newest first"""
+    expense_service = AsyncExpenseService(db)
+    return ORJSONResponse(await expense_service.search_group_expense_rows(group_id, q, limit))
 
 @router.delete("/expenses/{expense_id}")
-def delete_expense(expense_id: int, db: Session = Depends(get_db)):
-    expense_service = ExpenseService(db)
-    success = expense_service.delete_expense(expense_id)
+async def delete_expense(
+    expense_id: int,
+    consistency: Optional[Literal["sync", "eventual"]] = ConsistencyQuery,
+    db: AsyncSession = Depends(get_async_db)
+):
+    expense_service = AsyncExpenseService(db)
+    success = await expense_service.delete_expense(expense_id, consistency or settings.BALANCE_CONSISTENCY)
     if not success:
         raise HTTPException(status_code=404, detail="Expense not found")
     return {"success": True}
\ No newline at end of file
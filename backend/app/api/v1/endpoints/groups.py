@@ -1,51 +1,123 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date, datetime
+from typing import List, Literal, Optional
 
-from app.database import get_db
+from app.database import get_async_db, get_async_read_db, get_db, get_read_db
+from app.schemas.balance import BalanceDetail
 from app.schemas.group import Group as GroupSchema, GroupCreate, GroupUpdate
-from app.services.group_service import GroupService
-from app.services.balance_service import BalanceService
+from app.schemas.period import BalanceCheckpoint, BalanceRebuild
+from app.schemas.spending import GroupSpending
+from app.services.group_service import AsyncGroupService
+from app.services.balance_service import AsyncBalanceService
 from app.services.llm_service import LLMService
+from app.services.period_service import PeriodService
+from app.services.spend_rollup_service import SpendRollupService
+from app.utils.normalized import NormalizedUsers
+from app.utils.sparse_fields import SparseFields
 
 router = APIRouter()
 
 @router.post("/", response_model=GroupSchema)
-def create_group(group: GroupCreate, db: Session = Depends(get_db)):
-    group_service = GroupService(db)
-    return group_service.create_group(group)
+async def create_group(group: GroupCreate, db: AsyncSession = Depends(get_async_db)):
+    group_service = AsyncGroupService(db)
+    return await group_service.create_group(group)
 
 @router.get("/{group_id}", response_model=GroupSchema)
-def get_group(group_id: int, db: Session = Depends(get_db)):
-    group_service = GroupService(db)
-    return group_service.get_group(group_id)
+async def get_group(group_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    group_service = AsyncGroupService(db)
+    return await group_service.get_group(group_id)
 
 @router.put("/{group_id}", response_model=GroupSchema)
-def update_group(group_id: int, group_update: GroupUpdate, db: Session = Depends(get_db)):
-    group_service = GroupService(db)
-    return group_service.update_group(group_id, group_update)
+async def update_group(group_id: int, group_update: GroupUpdate, db: AsyncSession = Depends(get_async_db)):
+    group_service = AsyncGroupService(db)
+    return await group_service.update_group(group_id, group_update)
 
 @router.delete("/{group_id}")
-def delete_group(group_id: int, db: Session = Depends(get_db)):
-    group_service = GroupService(db)
-    return {"success": group_service.delete_group(group_id)}
+async def delete_group(group_id: int, db: AsyncSession = Depends(get_async_db)):
+    group_service = AsyncGroupService(db)
+    return {"success": await group_service.delete_group(group_id)}
 
 @router.post("/{group_id}/members/{user_id}")
-def add_member(group_id: int, user_id: int, db: Session = Depends(get_db)):
-    group_service = GroupService(db)
-    return group_service.add_member(group_id, user_id)
+async def add_member(group_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    group_service = AsyncGroupService(db)
+    return await group_service.add_member(group_id, user_id)
 
 @router.get("/{group_id}/balances")
-def get_group_balances(group_id: int, db: Session = Depends(get_db)):
-    balance_service = BalanceService(db)
-    return balance_service.get_group_balances(group_id)
+async def get_group_balances(
+    group_id: int,
+    compact: bool = Query(False, description="Return compact rows with id/name user references"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (implies compact)"),
+    normalized: bool = Query(False, description="Send each user once in a `users` side table, referenced by id from the rows (implies compact)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    balance_service = AsyncBalanceService(db)
+    selected = SparseFields.parse(fields, BalanceDetail.model_fields)
+    if compact or normalized or selected is not None:
+        rows = SparseFields.select(await balance_service.get_group_balance_rows(group_id), selected)
+        if normalized:
+            return ORJSONResponse(await NormalizedUsers.build(db, "balances", rows))
+        return ORJSONResponse(rows)
+    return await balance_service.get_group_balances(group_id)
 
 @router.get("/{group_id}/settlement-suggestions")
-def get_settlement_suggestions(group_id: int, db: Session = Depends(get_db)):
-    balance_service = BalanceService(db)
-    return balance_service.get_settlement_suggestions(group_id)
+async def get_settlement_suggestions(group_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    balance_service = AsyncBalanceService(db)
+    return await balance_service.get_settlement_suggestions(group_id)
 
 @router.get("/{group_id}/insights")
-def get_group_insights(group_id: int, db: Session = Depends(get_db)):
+async def get_group_insights(
+    group_id: int,
+    allow_stale: Optional[bool] = Query(None, description="Serve the previous insights while regenerating"),
+    db: Session = Depends(get_read_db)
+):
     llm_service = LLMService(db)
-    return llm_service.get_expense_insights(group_id)
\ No newline at end of file
+    return await llm_service.get_expense_insights(group_id, allow_stale)
+
+@router.post("/{group_id}/close-period", response_model=BalanceCheckpoint)
+def close_period(
+    group_id: int,
+    before: Optional[datetime] = Query(None, description="Archive expenses created before this time (default now)"),
+    db: Session = Depends(get_db)
+):
+    period_service = PeriodService(db)
+    return period_service.close_period(group_id, before)
+
+@router.post("/{group_id}/rebuild-balances", response_model=BalanceRebuild)
+def rebuild_balances(group_id: int, db: Session = Depends(get_db)):
+    period_service = PeriodService(db)
+    return {"group_id": group_id, "pairs": period_service.rebuild_balances(group_id)}
+
+@router.get("/{group_id}/checkpoints", response_model=List[BalanceCheckpoint])
+def get_checkpoints(group_id: int, db: Session = Depends(get_read_db)):
+    period_service = PeriodService(db)
+    return period_service.get_checkpoints(group_id)
+
+@router.get("/{group_id}/archive/expenses")
+def get_archived_expenses(
+    group_id: int,
+    checkpoint_id: Optional[int] = Query(None, description="Only expenses archived by this checkpoint"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db)
+):
+    period_service = PeriodService(db)
+    return ORJSONResponse(period_service.get_archived_expense_rows(group_id, checkpoint_id, limit, offset))
+
+@router.get("/{group_id}/spending", response_model=GroupSpending)
+def get_group_spending(
+    group_id: int,
+    bucket: Literal["day", "week", "month"] = Query("month", description="Weeks start on Monday; days are UTC"),
+    start: Optional[date] = Query(None, description="First day to include (default the group's first expense)"),
+    end: Optional[date] = Query(None, description="Last day to include (default its latest expense)"),
+    by_member: bool = Query(False, description="Add each member's paid and share totals over the range"),
+    db: Session = Depends(get_read_db)
+):
+    """Spending per bucket from the daily rollups, archived periods included"""
+    rollup_service = SpendRollupService(db)
+    spending = rollup_service.group_series(group_id, bucket, start, end)
+    if by_member:
+        spending["members"] = rollup_service.group_member_totals(group_id, start, end)
+    return ORJSONResponse(spending)
\ No newline at end of file
@@ -1,12 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date
+from typing import Any, AsyncIterator, List, Literal, Optional, Tuple
+import json
 
-from app.database import get_db
+from app.core.config import settings
+from app.core.metrics import push_disconnects
+from app.core.push import close_quietly, push_hub
+from app.database import AsyncSessionLocal, get_async_read_db, get_db, get_read_db
+from app.models.group import GroupMember
 from app.models.user import User
+from app.schemas.dashboard import Dashboard
+from app.schemas.spending import UserSpending
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate, UserBalance
 from app.services.balance_service import BalanceService
+from app.services.dashboard_service import SECTIONS, AsyncDashboardService
 from app.services.llm_service import LLMService
+from app.services.spend_rollup_service import SpendRollupService
+from app.utils.sparse_fields import SparseFields
 
 router = APIRouter()
 
@@ -24,14 +38,14 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 @router.get("/{user_id}", response_model=UserSchema)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, db: Session = Depends(get_read_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 @router.get("/", response_model=List[UserSchema])
-def list_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def list_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     users = db.query(User).offset(skip).limit(limit).all()
     return users
 
@@ -49,12 +63,99 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
     return user
 
 @router.get("/{user_id}/balances")
-def get_user_balances(user_id: int, db: Session = Depends(get_db)):
+def get_user_balances(user_id: int, db: Session = Depends(get_read_db)):
     balance_service = BalanceService(db)
     return balance_service.get_user_balance_summary(user_id)
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+@router.get("/{user_id}/dashboard", response_model=Dashboard)
+async def get_dashboard(
+    user_id: int,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated sections to return: user, summary, groups, recent_expenses"),
+    recent: int = Query(settings.DASHBOARD_RECENT_EXPENSES, ge=0, le=100, description="Most recent expenses across the user's groups"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """The home screen in one call; send the ETag back in If-None-Match to get a 304 when nothing changed"""
+    dashboard_service = AsyncDashboardService(db)
+    selected = SparseFields.parse(fields, SECTIONS)
+    sections = SECTIONS if selected is None else selected
+    etag = await dashboard_service.get_etag(user_id, sections, recent)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(await dashboard_service.get_dashboard(user_id, sections, recent), headers=headers)
+
+@router.get("/{user_id}/spending", response_model=UserSpending)
+def get_user_spending(
+    user_id: int,
+    bucket: Literal["day", "week", "month"] = Query("month", description="Weeks start on Monday; days are UTC"),
+    start: Optional[date] = Query(None, description="First day to include (default the user's first expense)"),
+    end: Optional[date] = Query(None, description="Last day to include (default their latest expense)"),
+    group_id: Optional[int] = Query(None, description="Only this group (default all the user's groups)"),
+    db: Session = Depends(get_read_db)
+):
+    """What the user paid and their share of expenses per bucket, from the daily rollups"""
+    rollup_service = SpendRollupService(db)
+    return ORJSONResponse(rollup_service.user_series(user_id, bucket, start, end, group_id))
+
 @router.post("/{user_id}/chat")
 async def chat_query(user_id: int, query: dict, db: Session = Depends(get_db)):
     llm_service = LLMService(db)
     response = await llm_service.process_query(query.get("message", ""), user_id)
-    return {"response": response}
\ No newline at end of file
+    return {"response": response}
+
+async def _server_sent_events(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    async for kind, payload in events:
+        if kind == "delta":
+            yield f"data: {json.dumps({'delta': payload})}\n\n"
+        else:
+            yield f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
+
+@router.post("/{user_id}/chat/stream")
+async def chat_query_stream(user_id: int, query: dict, db: Session = Depends(get_db)):
+    """Stream the answer over Server-Sent Events as the model generates it"""
+    llm_service = LLMService(db)
+    events = await llm_service.stream_query(query.get("message", ""), user_id)
+    return StreamingResponse(
+        _server_sent_events(events),
+        media_type="text/event-stream",
+        # Stop proxies (e.g. nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{user_id}/ws")
+async def user_events(websocket: WebSocket, user_id: int):
+    """Push changes to every group the user belongs to (see app.core.push for the messages)"""
+    if not settings.PUSH_ENABLED:
+        await websocket.close(code=1008, reason="push disabled")
+        return
+    
+    # A short-lived session: the socket may stay open for hours and mustn't hold a pooled connection
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        group_ids = list((await db.execute(
+            select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        )).scalars())
+    if user is None:
+        await websocket.close(code=1008, reason="user not found")
+        return
+    
+    subscription = push_hub.subscribe(user_id, group_ids)
+    if subscription is None:
+        push_disconnects.inc("capacity")
+        await websocket.close(code=1013, reason="too many connections")
+        return
+    try:
+        await websocket.accept()
+        # Subscribed before this goes out, so a client that fetches state on receiving it misses nothing
+        subscription.offer(json.dumps({"type": "subscribed", "group_ids": group_ids}))
+        await push_hub.serve(websocket, subscription, settings.PUSH_SEND_TIMEOUT_SECONDS)
+    finally:
+        push_hub.unsubscribe(subscription)
+        await close_quietly(websocket, code=1000)
\ No newline at end of file
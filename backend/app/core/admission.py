@@ -0,0 +1,229 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs
+
+import orjson
+from starlette.routing import compile_path
+
+from app.core.metrics import admission_in_flight, admission_queue_wait, admission_queued, admission_requests
+
+HIGH = "high"
+LOW = "low"
+PRIORITIES = (HIGH, LOW)
+
+# Query parameters that name the acting user on routes without {user_id} in the path
+USER_QUERY_PARAMS = ("user_id", "requesting_user_id")
+
+class ConcurrencyLimiter:
+    """Slots for concurrent requests; waiters are admitted high priority first, then FIFO"""
+    
+    def __init__(self, limit: int):
+        self.limit = max(limit, 1)
+        self.active = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {priority: deque() for priority in PRIORITIES}
+        self._service_seconds = 0.0  # moving average, for Retry-After
+    
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+    
+    async def acquire(self, priority: str, timeout: float) -> bool:
+        """Take a slot, waiting at most `timeout` seconds; False if the wait budget ran out"""
+        if self.active < self.limit and not self.queued:
+            self.active += 1
+            return True
+        if timeout <= 0:
+            return False
+        
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = self._waiters[priority]
+        waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the wait ran out; it's ours then
+            return waiter.done() and not waiter.cancelled()
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the client went away
+                self.release()
+            raise
+        finally:
+            if waiter in waiters:
+                waiters.remove(waiter)
+    
+    def release(self, service_seconds: Optional[float] = None):
+        if service_seconds is not None:
+            self._service_seconds += (service_seconds - self._service_seconds) * 0.2
+        # Hand the slot straight to the next waiter so newcomers can't jump the queue
+        for priority in PRIORITIES:
+            waiters = self._waiters[priority]
+            while waiters:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.active -= 1
+    
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained"""
+        rounds = (self.queued + self.active) / self.limit
+        return max(1, math.ceil(self._service_seconds * rounds))
+
+class TokenBuckets:
+    """Per-key token buckets refilling at `rate_per_minute` up to `burst`"""
+    
+    MAX_KEYS = 10_000
+    
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(burst, 1)
+        self._buckets: Dict[str, List[float]] = {}  # key -> [tokens, updated at]
+    
+    def take(self, key: str) -> float:
+        """Spend a token; returns 0 on success, otherwise seconds until one is available"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_KEYS:
+                self._prune(now)
+            bucket = self._buckets[key] = [float(self.burst), now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        return (1.0 - bucket[0]) / self.rate
+    
+    def _prune(self, now: float):
+        # A bucket that has refilled completely is the same as no bucket
+        full_after = self.burst / self.rate
+        for key, (_, updated_at) in list(self._buckets.items()):
+            if now - updated_at >= full_after:
+                del self._buckets[key]
+        if len(self._buckets) >= self.MAX_KEYS:
+            self._buckets.clear()
+
+class AdmissionControlMiddleware:
+    """Per-route concurrency limits and per-user rate limits for expensive routes.
+    
+    `routes` maps "METHOD /route/template" to a priority class, "high" or "low";
+    other routes pass straight through. A request first spends a token from its
+    user's bucket for the class (429 when empty). It then needs one of the route's
+    `concurrency` slots and one of the `max_concurrency` slots shared by all listed
+    routes, where high priority waiters go ahead of low. If it can't get both
+    within the class's queue budget it is shed with a 503. Both carry Retry-After.
+    """
+    
+    def __init__(
+        self,
+        app,
+        routes: Mapping[str, str],
+        concurrency: Mapping[str, int],
+        default_concurrency: int,
+        max_concurrency: int,
+        queue_seconds: Mapping[str, float],
+        rate_per_minute: Mapping[str, float],
+        burst: int
+    ):
+        self.app = app
+        self.routes: Dict[str, List[Tuple[str, object, str, ConcurrencyLimiter]]] = {}
+        for key, priority in routes.items():
+            if priority not in PRIORITIES:
+                raise ValueError(f"unknown priority class {priority!r} for {key}")
+            method, template = key.split(" ", 1)
+            limiter = ConcurrencyLimiter(concurrency.get(key, default_concurrency))
+            self.routes.setdefault(method.upper(), []).append((template, compile_path(template)[0], priority, limiter))
+        self.shared = ConcurrencyLimiter(max_concurrency)
+        self.queue_seconds = queue_seconds
+        self.buckets = {priority: TokenBuckets(rate_per_minute.get(priority, 0.0), burst) for priority in PRIORITIES}
+    
+    def _match(self, scope):
+        for template, pattern, priority, limiter in self.routes.get(scope["method"], ()):
+            match = pattern.match(scope["path"])
+            if match:
+                return template, priority, limiter, match.groupdict()
+        return None
+    
+    @staticmethod
+    def _user_key(scope, path_params: Dict[str, str]) -> str:
+        if "user_id" in path_params:
+            return f"user:{path_params['user_id']}"
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        for name in USER_QUERY_PARAMS:
+            if query.get(name):
+                return f"user:{query[name][0]}"
+        client = scope.get("client")
+        return f"ip:{client[0]}" if client else "anonymous"
+    
+    async def __call__(self, scope, receive, send):
+        matched = self._match(scope) if scope["type"] == "http" else None
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+        
+        template, priority, limiter, path_params = matched
+        wait = self.buckets[priority].take(self._user_key(scope, path_params))
+        if wait:
+            admission_requests.inc(template, priority, "rate_limited")
+            await _reject(send, 429, "Rate limit exceeded for this user", math.ceil(wait))
+            return
+        
+        blocking = await self._acquire(template, priority, limiter)
+        if blocking is not None:
+            admission_requests.inc(template, priority, "shed")
+            await _reject(send, 503, "Server busy, try again later", blocking.retry_after())
+            return
+        
+        admission_requests.inc(template, priority, "admitted")
+        admission_in_flight.inc(template)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_in_flight.dec(template)
+            elapsed = time.perf_counter() - start
+            self.shared.release(elapsed)
+            limiter.release(elapsed)
+    
+    async def _acquire(self, template: str, priority: str, limiter: ConcurrencyLimiter) -> Optional[ConcurrencyLimiter]:
+        """Take a route slot then a shared slot within the queue budget; returns the limiter that ran out"""
+        admission_queued.inc(template)
+        start = time.perf_counter()
+        deadline = start + self.queue_seconds.get(priority, 0.0)
+        holds_route_slot = False
+        try:
+            if not await limiter.acquire(priority, deadline - time.perf_counter()):
+                return limiter
+            holds_route_slot = True
+            if not await self.shared.acquire(priority, deadline - time.perf_counter()):
+                limiter.release()
+                return self.shared
+            return None
+        except asyncio.CancelledError:
+            if holds_route_slot:
+                limiter.release()
+            raise
+        finally:
+            admission_queued.dec(template)
+            admission_queue_wait.observe(priority, value=time.perf_counter() - start)
+
+async def _reject(send, status_code: int, detail: str, retry_after: int):
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
\ No newline at end of file
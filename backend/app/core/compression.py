@@ -0,0 +1,226 @@
+import gzip
+import logging
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import anyio
+
+from app.core.metrics import compression_bytes, compression_responses
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+BROTLI = "br"
+GZIP = "gzip"
+
+# Bodies at least this big are compressed in a worker thread instead of on the event loop
+THREAD_COMPRESSION_BYTES = 512 * 1024
+
+# Streamed bodies of these types are sent as they are: proxies and browsers expect SSE unencoded
+STREAMING_EXCLUDED_TYPES = ("text/event-stream",)
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}, lower-cased; malformed q values count as 1"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                pass
+        accepted[coding] = q
+    return accepted
+
+class _Encoder:
+    """One response's compressor; `compress` for whole bodies, `chunk`/`finish` for streams"""
+    
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._stream = None
+    
+    def compress(self, body: bytes) -> bytes:
+        if self.encoding == BROTLI:
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+    
+    def chunk(self, body: bytes) -> bytes:
+        if self._stream is None:
+            if self.encoding == BROTLI:
+                self._stream = brotli.Compressor(quality=self.brotli_quality)
+            else:
+                self._stream = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        # Flush every chunk so streamed responses still arrive as they are produced
+        if self.encoding == BROTLI:
+            return self._stream.process(body) + self._stream.flush()
+        return self._stream.compress(body) + self._stream.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self) -> bytes:
+        if self._stream is None:
+            return b""
+        return self._stream.finish() if self.encoding == BROTLI else self._stream.flush()
+
+class CompressionMiddleware:
+    """Negotiated br/gzip compression of response bodies.
+    
+    The encoding is the one of `encodings` the client gives the highest q (> 0),
+    preferring earlier ones on ties. Bodies smaller than `minimum_size`, responses
+    that already carry a Content-Encoding, and types outside `content_types` go
+    out unchanged. A streamed body is
+    compressed chunk by chunk; a complete body is compressed in one call, in a
+    worker thread when it is large. Every negotiable response gets
+    Vary: Accept-Encoding so caches keep the variants apart, and its ETag is
+    marked weak whether or not this particular body was encoded.
+    """
+    
+    def __init__(
+        self,
+        app,
+        minimum_size: int,
+        encodings: Sequence[str],
+        content_types: Sequence[str],
+        gzip_level: int,
+        brotli_quality: int
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings: List[str] = []
+        for encoding in encodings:
+            if encoding not in (BROTLI, GZIP):
+                raise ValueError(f"unknown content encoding {encoding!r}")
+            if encoding == BROTLI and brotli is None:
+                logger.warning("brotli is not installed; responses are only gzip-compressed")
+                continue
+            self.encodings.append(encoding)
+        self.content_types = tuple(content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    def _negotiate(self, scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accepted = parse_accept_encoding(value.decode("latin-1"))
+                wildcard = accepted.get("*", 0.0)
+                # The client's highest q wins; ties go to the first of our encodings
+                best, best_q = None, 0.0
+                for encoding in self.encodings:
+                    q = accepted.get(encoding, wildcard)
+                    if q > best_q:
+                        best, best_q = encoding, q
+                return best
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = self._negotiate(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+class _CompressingResponder:
+    """Holds back http.response.start until the first body chunk shows whether to compress"""
+    
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoder = _Encoder(encoding, middleware.gzip_level, middleware.brotli_quality)
+        self._send = send
+        self._start = None
+        self._passthrough = False
+    
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = start.get("headers", [])
+            if not self._compressible(start, headers, body, more_body):
+                self._passthrough = True
+                # A 304 can't tell whether the full response would have been encoded (that depends on its
+                # size), so every response to a client that negotiated an encoding gets the same weak validator
+                await self._send({**start, "headers": self._vary(self._weak_etag(headers), start)})
+                await self._send(message)
+                return
+            if not more_body:
+                compressed = await self._compress(body)
+                compression_responses.inc(self.encoder.encoding)
+                compression_bytes.inc(self.encoder.encoding, "original", amount=len(body))
+                compression_bytes.inc(self.encoder.encoding, "compressed", amount=len(compressed))
+                await self._send({**start, "headers": self._encoded_headers(headers, len(compressed))})
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            compression_responses.inc(self.encoder.encoding)
+            await self._send({**start, "headers": self._encoded_headers(headers, None)})
+        
+        chunk = self.encoder.chunk(body) if body else b""
+        if not more_body:
+            chunk += self.encoder.finish()
+        compression_bytes.inc(self.encoder.encoding, "original", amount=len(body))
+        compression_bytes.inc(self.encoder.encoding, "compressed", amount=len(chunk))
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+    
+    def _compressible(self, start, headers: List[Tuple[bytes, bytes]], body: bytes, more_body: bool) -> bool:
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+        content_type = b""
+        for name, value in headers:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        media_type = content_type.split(b";", 1)[0].strip().decode("latin-1").lower()
+        if not media_type.startswith(self.middleware.content_types):
+            return False
+        if more_body:
+            return not media_type.startswith(STREAMING_EXCLUDED_TYPES)
+        return len(body) >= self.middleware.minimum_size
+    
+    async def _compress(self, body: bytes) -> bytes:
+        if len(body) >= THREAD_COMPRESSION_BYTES:
+            return await anyio.to_thread.run_sync(self.encoder.compress, body)
+        return self.encoder.compress(body)
+    
+    @staticmethod
+    def _vary(headers: List[Tuple[bytes, bytes]], start) -> List[Tuple[bytes, bytes]]:
+        """Add Accept-Encoding to Vary (merging with any existing value), except on bodiless responses"""
+        if start["status"] in (204, 304):
+            return headers
+        kept = [(name, value) for name, value in headers if name != b"vary"]
+        vary = [value for name, value in headers if name == b"vary"]
+        return [*kept, (b"vary", b", ".join([*vary, b"Accept-Encoding"]))]
+    
+    def _encoded_headers(self, headers: List[Tuple[bytes, bytes]], length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        kept = [(name, value) for name, value in self._vary(headers, {"status": 200}) if name != b"content-length"]
+        kept.append((b"content-encoding", self.encoder.encoding.encode()))
+        if length is not None:
+            kept.append((b"content-length", str(length).encode()))
+        return self._weak_etag(kept)
+    
+    @staticmethod
+    def _weak_etag(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+        # A strong validator names the unencoded bytes; mark it weak for the encoded variant
+        return [
+            (name, b"W/" + value if name == b"etag" and not value.startswith(b"W/") else value)
+            for name, value in headers
+        ]
\ No newline at end of file
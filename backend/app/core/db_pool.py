@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Any, Dict, List
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+class PoolMetrics:
+    """Per-process counters for connection checkouts and time spent waiting on the pool"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+    
+    def record_checkout(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_seconds_total / attempts * 1000, 3) if attempts else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3)
+            }
+
+# Keyed by the engine's pool_logging_name, which survives pool.recreate()
+_pool_metrics: Dict[str, PoolMetrics] = {}
+_pool_metrics_lock = threading.Lock()
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    with _pool_metrics_lock:
+        if name not in _pool_metrics:
+            _pool_metrics[name] = PoolMetrics()
+        return _pool_metrics[name]
+
+class _TimedCheckoutMixin:
+    """Times every checkout, including queueing for a free slot, pre-ping and new connects"""
+    
+    def connect(self):
+        metrics = get_pool_metrics(self._orig_logging_name or "default")
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+class InstrumentedNullPool(_TimedCheckoutMixin, NullPool):
+    pass
+
+def pool_status(engine: Engine, mode: str) -> Dict[str, Any]:
+    """Current pool occupancy plus cumulative checkout metrics"""
+    pool = engine.pool
+    status = {"mode": mode, "pool_class": type(pool).__name__}
+    
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow
+        })
+    
+    status.update(get_pool_metrics(pool._orig_logging_name or "default").snapshot())
+    return status
+
+def pool_metric_families(engines: Dict[str, Engine]) -> List[tuple]:
+    """Pool occupancy and checkout totals as (name, type, help, samples) for the metrics registry"""
+    pools = {name: engine.pool for name, engine in engines.items()}
+    occupancy = [
+        ("db_pool_size", "Configured pool size", "size"),
+        ("db_pool_checked_out", "Connections currently checked out", "checkedout"),
+    ]
+    families = [
+        (metric, "gauge", documentation, [
+            ({"pool": name}, getattr(pool, method)()) for name, pool in pools.items() if isinstance(pool, QueuePool)
+        ])
+        for metric, documentation, method in occupancy
+    ]
+    
+    metrics = {name: get_pool_metrics(pool._orig_logging_name or "default") for name, pool in pools.items()}
+    families.extend([
+        ("db_pool_checkouts_total", "counter", "Successful connection checkouts",
+         [({"pool": name}, pool_metrics.checkouts) for name, pool_metrics in metrics.items()]),
+        ("db_pool_timeouts_total", "counter", "Checkouts that gave up waiting for a connection",
+         [({"pool": name}, pool_metrics.timeouts) for name, pool_metrics in metrics.items()]),
+        ("db_pool_wait_seconds_total", "counter", "Time spent waiting for connections",
+         [({"pool": name}, pool_metrics.wait_seconds_total) for name, pool_metrics in metrics.items()]),
+    ])
+    return families
\ No newline at end of file
@@ -0,0 +1,166 @@
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+PIN_COOKIE = "db_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Zero when the replica has replayed everything it received (or isn't a standby),
+# otherwise the age of the last replayed transaction
+POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() IS NULL OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class ReplicaState:
+    def __init__(self, name: str, engine: Engine, async_engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.checked_at = 0.0
+        self.error: Optional[str] = None
+
+class ReadRouter:
+    """Chooses the engine for read-only sessions: a healthy, caught-up replica or the primary"""
+    
+    def __init__(
+        self,
+        primary: Engine,
+        async_primary: AsyncEngine,
+        replicas: List[ReplicaState],
+        max_lag_seconds: float,
+        check_interval: float
+    ):
+        self.primary = primary
+        self.async_primary = async_primary
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._refresh_lock = threading.Lock()
+        self._round_robin = itertools.count()
+        
+        for replica in replicas:
+            self._watch_disconnects(replica)
+    
+    def _watch_disconnects(self, replica: ReplicaState):
+        def on_error(context):
+            if context.is_disconnect:
+                self.mark_down(replica, "disconnected")
+        
+        event.listen(replica.engine, "handle_error", on_error)
+        event.listen(replica.async_engine.sync_engine, "handle_error", on_error)
+    
+    def needs_refresh(self) -> bool:
+        now = time.monotonic()
+        return any(now - replica.checked_at >= self.check_interval for replica in self.replicas)
+    
+    def refresh(self):
+        """Re-probe stale replicas; concurrent callers skip rather than queue behind the probe"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            for replica in self.replicas:
+                if now - replica.checked_at >= self.check_interval:
+                    self._probe(replica)
+        finally:
+            self._refresh_lock.release()
+    
+    def _probe(self, replica: ReplicaState):
+        try:
+            with replica.engine.connect() as connection:
+                if connection.dialect.name == "postgresql":
+                    lag = float(connection.execute(POSTGRES_LAG_QUERY).scalar() or 0)
+                else:
+                    connection.execute(text("SELECT 1"))
+                    lag = 0.0
+            replica.lag_seconds = lag
+            replica.healthy = lag <= self.max_lag_seconds
+            replica.error = None if replica.healthy else "lagging"
+        except SQLAlchemyError as e:
+            replica.healthy = False
+            replica.lag_seconds = None
+            replica.error = e.__class__.__name__
+        replica.checked_at = time.monotonic()
+    
+    def mark_down(self, replica: ReplicaState, reason: str):
+        replica.healthy = False
+        replica.error = reason
+        replica.checked_at = time.monotonic()
+    
+    def choose(self, pinned: bool) -> Optional[ReplicaState]:
+        """Pick a replica round-robin, or None to read from the primary"""
+        if pinned or not self.replicas:
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)]
+    
+    def read_engine(self, pinned: bool) -> Engine:
+        if self.replicas and self.needs_refresh():
+            self.refresh()
+        replica = self.choose(pinned)
+        return replica.engine if replica else self.primary
+    
+    def async_read_engine(self, pinned: bool) -> AsyncEngine:
+        # Callers refresh via the threadpool first; probes use the blocking engines
+        replica = self.choose(pinned)
+        return replica.async_engine if replica else self.async_primary
+    
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "error": replica.error
+            }
+            for replica in self.replicas
+        ]
+
+def is_pinned_to_primary(connection: HTTPConnection) -> bool:
+    """True while the client is inside its read-your-writes window"""
+    try:
+        return float(connection.cookies.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+class ReadYourWritesMiddleware:
+    """Pins a client to the primary for a short window after a successful write.
+    
+    The window travels in a cookie, so it holds across workers and processes.
+    """
+    
+    def __init__(self, app, window_seconds: float):
+        self.app = app
+        self.window_seconds = window_seconds
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or self.window_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                pinned_until = time.time() + self.window_seconds
+                headers.append(
+                    "set-cookie",
+                    f"{PIN_COOKIE}={pinned_until:.3f}; Max-Age={int(self.window_seconds) + 1}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+        
+        await self.app(scope, receive, send_with_pin)
\ No newline at end of file
@@ -22,6 +22,14 @@ class InvalidSplitException(SplitwiseException):
     def __init__(self, message: str):
         super().__init__(f"Invalid split configuration: {message}")
 
+class InvalidPeriodException(SplitwiseException):
+    def __init__(self, message: str):
+        super().__init__(f"Invalid period close: {message}")
+
+class InvalidRangeException(SplitwiseException):
+    def __init__(self, message: str):
+        super().__init__(f"Invalid time range: {message}")
+
 class InsufficientBalanceException(SplitwiseException):
     def __init__(self, user_id: int, required: float, available: float):
         super().__init__(
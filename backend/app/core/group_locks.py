@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# First half of the two-int advisory lock key, so group ids can't collide with other lock users
+BALANCE_LOCK_NAMESPACE = 0x42414C
+
+ADVISORY_XACT_LOCK = text("SELECT pg_advisory_xact_lock(:namespace, :group_id)")
+
+# Fallback for databases without advisory locks; only serialises writers within this process.
+# Weak values: a group's lock lives while some writer holds or waits on it, then drops out,
+# so the table stays as small as the number of groups being written right now.
+_local_locks: "weakref.WeakValueDictionary[int, threading.Lock]" = weakref.WeakValueDictionary()
+_local_locks_guard = threading.Lock()
+
+def _local_lock(group_id: int) -> threading.Lock:
+    with _local_locks_guard:
+        lock = _local_locks.get(group_id)
+        if lock is None:
+            lock = _local_locks[group_id] = threading.Lock()
+        return lock
+
+def _begin_immediate(connection: Connection):
+    # The driver would only BEGIN at the first write, after the block's reads
+    if not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+@contextmanager
+def group_write_lock(db: Session, group_id: int):
+    """Serialise balance writes for one group; commit or roll back before leaving the block.
+    
+    On PostgreSQL this takes a transaction-scoped advisory lock, which the database
+    releases at commit/rollback. Writes to other groups never wait on it.
+    
+    Elsewhere it falls back to an in-process lock, which only serialises writers
+    within one process. On SQLite the block also opens its transaction with
+    BEGIN IMMEDIATE, taking the database write lock before the first read, so
+    writers in other worker processes queue behind it; other databases need a
+    single worker process.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(ADVISORY_XACT_LOCK, {"namespace": BALANCE_LOCK_NAMESPACE, "group_id": group_id})
+        yield
+        return
+    
+    lock = _local_lock(group_id)
+    lock.acquire()
+    try:
+        if db.get_bind().dialect.name == "sqlite":
+            _begin_immediate(db.connection())
+        yield
+    finally:
+        lock.release()
+
+@asynccontextmanager
+async def async_group_write_lock(db: AsyncSession, group_id: int):
+    """Async counterpart of group_write_lock, sharing the same per-group locks"""
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(ADVISORY_XACT_LOCK, {"namespace": BALANCE_LOCK_NAMESPACE, "group_id": group_id})
+        yield
+        return
+    
+    # Poll instead of blocking a worker thread, so a cancelled request can't leak the lock
+    lock = _local_lock(group_id)
+    delay = 0.001
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.02)
+    try:
+        if db.bind.dialect.name == "sqlite":
+            await (await db.connection()).run_sync(_begin_immediate)
+        yield
+    finally:
+        lock.release()
\ No newline at end of file
@@ -0,0 +1,212 @@
+import asyncio
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple
+import anyio
+from app.core.config import settings
+from app.core.metrics import llm_request_duration, llm_tokens
+
+# The openai SDK takes a few hundred milliseconds to import, so it is only loaded
+# once a process actually talks to the model, not by every worker, job and CLI
+# that imports this module
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from openai.types.chat import ChatCompletion
+
+@lru_cache(maxsize=None)
+def _retryable_errors() -> Tuple[type, ...]:
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+    
+    return (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError, asyncio.TimeoutError)
+
+class StreamMetrics:
+    """Per-process time-to-first-token and total latency of streamed completions"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.outcomes = {"completed": 0, "disconnected": 0, "failed": 0}
+            self.first_tokens = 0
+            self.ttft_seconds_total = 0.0
+            self.ttft_seconds_max = 0.0
+            self.total_seconds_total = 0.0
+            self.total_seconds_max = 0.0
+    
+    def record(self, outcome: str, ttft: Optional[float], total: float):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if ttft is not None:
+                self.first_tokens += 1
+                self.ttft_seconds_total += ttft
+                self.ttft_seconds_max = max(self.ttft_seconds_max, ttft)
+            self.total_seconds_total += total
+            self.total_seconds_max = max(self.total_seconds_max, total)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            streams = sum(self.outcomes.values())
+            return {
+                "streams": streams,
+                **self.outcomes,
+                "ttft_ms_avg": round(self.ttft_seconds_total / self.first_tokens * 1000, 3) if self.first_tokens else 0.0,
+                "ttft_ms_max": round(self.ttft_seconds_max * 1000, 3),
+                "total_ms_avg": round(self.total_seconds_total / streams * 1000, 3) if streams else 0.0,
+                "total_ms_max": round(self.total_seconds_max * 1000, 3)
+            }
+
+stream_metrics = StreamMetrics()
+
+_client: Optional["AsyncOpenAI"] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+def llm_configured() -> bool:
+    """Whether an API key is set; unlike get_llm_client, never loads the SDK"""
+    return bool(settings.OPENAI_API_KEY)
+
+def get_llm_client() -> Optional["AsyncOpenAI"]:
+    """Shared async client over one pooled HTTP connection pool, or None when no API key is set.
+    
+    Built on first use and reused by every request in the process until close_llm_client.
+    """
+    global _client
+    if not llm_configured():
+        return None
+    if _client is None:
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            max_retries=0,  # retried below, with jitter and outside the semaphore
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_CONNECTIONS
+                ),
+                timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=5.0)
+            )
+        )
+    return _client
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+async def close_llm_client():
+    """Close pooled connections; the next call builds a fresh client (and semaphore)"""
+    global _client, _semaphore
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _semaphore = None
+
+def _record_usage(operation: str, usage):
+    if usage is not None:
+        llm_tokens.inc(operation, "prompt", amount=usage.prompt_tokens or 0)
+        llm_tokens.inc(operation, "completion", amount=usage.completion_tokens or 0)
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: spreads retries from many callers instead of synchronising them
+    return random.uniform(0, settings.LLM_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+async def create_chat_completion(messages: List[Dict[str, Any]], operation: str = "chat", **kwargs) -> "ChatCompletion":
+    """Run one chat completion under the global concurrency cap, with timeout and retries.
+    
+    Cancelling the awaiting task (e.g. a client disconnect) aborts the HTTP request.
+    Latency and token usage are recorded under `operation`.
+    """
+    client = get_llm_client()
+    if client is None:
+        raise RuntimeError("LLM client is not configured")
+    
+    semaphore = _get_semaphore()
+    started = time.perf_counter()
+    outcome = "failed"
+    try:
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            try:
+                async with semaphore:
+                    response = await asyncio.wait_for(
+                        client.chat.completions.create(
+                            model=settings.OPENAI_MODEL,
+                            messages=messages,
+                            **kwargs
+                        ),
+                        timeout=settings.LLM_TIMEOUT_SECONDS
+                    )
+                outcome = "completed"
+                _record_usage(operation, response.usage)
+                return response
+            except _retryable_errors():
+                if attempt == settings.LLM_MAX_RETRIES:
+                    raise
+            await asyncio.sleep(_backoff(attempt))
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        llm_request_duration.observe(operation, outcome, value=time.perf_counter() - started)
+
+async def stream_chat_completion(messages: List[Dict[str, Any]], operation: str = "chat_stream", **kwargs) -> AsyncIterator[str]:
+    """Yield a chat completion's text deltas as they arrive, under the global concurrency cap.
+    
+    Retries only cover opening the stream. Closing the generator early (e.g. on client
+    disconnect) closes the upstream response so the model stops generating. Latency and
+    token usage (sent in the final chunk) are recorded under `operation`.
+    """
+    client = get_llm_client()
+    if client is None:
+        raise RuntimeError("LLM client is not configured")
+    
+    semaphore = _get_semaphore()
+    started = time.perf_counter()
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        await semaphore.acquire()
+        try:
+            stream = await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=settings.OPENAI_MODEL,
+                    messages=messages,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    **kwargs
+                ),
+                timeout=settings.LLM_TIMEOUT_SECONDS
+            )
+            break
+        except _retryable_errors():
+            semaphore.release()
+            if attempt == settings.LLM_MAX_RETRIES:
+                llm_request_duration.observe(operation, "failed", value=time.perf_counter() - started)
+                raise
+        except BaseException:
+            semaphore.release()
+            llm_request_duration.observe(operation, "failed", value=time.perf_counter() - started)
+            raise
+        await asyncio.sleep(_backoff(attempt))
+    
+    outcome = "failed"
+    try:
+        async for chunk in stream:
+            if chunk.usage is not None:
+                _record_usage(operation, chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        outcome = "completed"
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    finally:
+        # Shielded: the caller's cancel scope would otherwise abort the close itself
+        with anyio.CancelScope(shield=True):
+            await stream.close()
+        semaphore.release()
+        llm_request_duration.observe(operation, outcome, value=time.perf_counter() - started)
\ No newline at end of file
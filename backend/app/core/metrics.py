@@ -0,0 +1,246 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+BACKGROUND_ROUTE = "<background>"
+
+Sample = Tuple[Dict[str, str], float]
+
+class MetricsRegistry:
+    """Per-process metrics with one shard per thread.
+    
+    Writers only touch their own thread's shard, so recording never takes a lock;
+    render() merges the shards when /metrics is scraped. With several worker
+    processes each worker reports its own series.
+    """
+    
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+        self._shards: List[Dict] = []
+        self._shards_lock = threading.Lock()
+        self._local = threading.local()
+    
+    def shard(self) -> Dict:
+        values = getattr(self._local, "values", None)
+        if values is None:
+            values = self._local.values = {}
+            with self._shards_lock:
+                self._shards.append(values)
+        return values
+    
+    def register(self, metric: "_Metric") -> "_Metric":
+        self._metrics.append(metric)
+        return metric
+    
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]):
+        """Add a callback yielding (name, type, help, samples) for values read at scrape time"""
+        self._collectors.append(collector)
+    
+    def _merged(self) -> Dict:
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged: Dict = {}
+        for shard in shards:
+            # Copy first: the owning thread may add keys while we iterate
+            for key, value in list(shard.items()):
+                if isinstance(value, list):
+                    total = merged.setdefault(key, [0.0] * len(value))
+                    for i, part in enumerate(value):
+                        total[i] += part
+                else:
+                    merged[key] = merged.get(key, 0.0) + value
+        return merged
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        merged = self._merged()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            series = sorted((key[1], value) for key, value in merged.items() if key[0] is metric)
+            for labelvalues, value in series:
+                lines.extend(metric.samples(labelvalues, value))
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+    
+    def reset(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    kind = "untyped"
+    
+    def __init__(self, registry: MetricsRegistry, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+    
+    def samples(self, labelvalues: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{_labels(dict(zip(self.labelnames, labelvalues)))} {_number(value)}"]
+
+class Counter(_Metric):
+    kind = "counter"
+    
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        shard = self.registry.shard()
+        key = (self, labelvalues)
+        shard[key] = shard.get(key, 0.0) + amount
+
+class Gauge(Counter):
+    """Up/down value; shards hold deltas, so inc and dec may happen on different threads"""
+    kind = "gauge"
+    
+    def dec(self, *labelvalues: str, amount: float = 1.0):
+        self.inc(*labelvalues, amount=-amount)
+
+class Histogram(_Metric):
+    kind = "histogram"
+    
+    def __init__(self, registry: MetricsRegistry, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, *labelvalues: str, value: float):
+        shard = self.registry.shard()
+        key = (self, labelvalues)
+        # Per-bucket counts (made cumulative at render), then +Inf, sum and count
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = [0.0] * (len(self.buckets) + 3)
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+    
+    def samples(self, labelvalues: Tuple[str, ...], state: List[float]) -> List[str]:
+        labels = dict(zip(self.labelnames, labelvalues))
+        lines = []
+        cumulative = 0.0
+        for bound, count in zip(self.buckets + (float("inf"),), state):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_labels({**labels, 'le': _number(bound)})} {_number(cumulative)}")
+        lines.append(f"{self.name}_sum{_labels(labels)} {_number(state[-2])}")
+        lines.append(f"{self.name}_count{_labels(labels)} {_number(state[-1])}")
+        return lines
+
+registry = MetricsRegistry()
+
+http_requests = Counter(registry, "http_requests_total", "Requests handled, by route template and status code", ("method", "route", "status"))
+http_request_duration = Histogram(registry, "http_request_duration_seconds", "Time until the response body was sent", ("method", "route"))
+http_requests_in_progress = Gauge(registry, "http_requests_in_progress", "Requests currently being handled", ("method",))
+db_queries = Counter(registry, "db_queries_total", "SQL statements executed, by the route that issued them", ("method", "route"))
+db_query_seconds = Counter(registry, "db_query_seconds_total", "Time spent executing SQL statements, by route", ("method", "route"))
+db_query_duration = Histogram(registry, "db_query_duration_seconds", "Execution time of single SQL statements", buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+settlement_solver_duration = Histogram(registry, "settlement_solver_duration_seconds", "BalanceOptimizer.optimize_settlements run time", buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+llm_request_duration = Histogram(registry, "llm_request_duration_seconds", "LLM calls including retries, by operation and outcome", ("operation", "outcome"), buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+llm_tokens = Counter(registry, "llm_tokens_total", "Tokens reported by the LLM API, by operation and kind", ("operation", "kind"))
+outbox_events = Counter(registry, "outbox_events_total", "Outbox events applied, retried or dead-lettered", ("event_type", "outcome"))
+outbox_event_lag = Histogram(registry, "outbox_event_lag_seconds", "Time from a write to its outbox event being applied", buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0))
+push_connections = Gauge(registry, "push_connections", "Open WebSocket push connections")
+push_messages = Counter(registry, "push_messages_total", "Messages published to push subscribers, by type", ("type",))
+push_deliveries = Counter(registry, "push_deliveries_total", "Messages queued for push connections (one per subscriber, resyncs excluded)")
+push_resyncs = Counter(registry, "push_resyncs_total", "Push connections whose queue overflowed and were told to resync")
+push_disconnects = Counter(registry, "push_disconnects_total", "Push connections closed by the server, by reason", ("reason",))
+admission_requests = Counter(registry, "admission_requests_total", "Requests to admission-controlled routes: admitted, rate_limited or shed", ("route", "priority", "outcome"))
+admission_queue_wait = Histogram(registry, "admission_queue_wait_seconds", "Time waiting for a slot on an admission-controlled route", ("priority",), buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+admission_in_flight = Gauge(registry, "admission_in_flight", "Requests holding a slot on an admission-controlled route", ("route",))
+admission_queued = Gauge(registry, "admission_queued", "Requests waiting for a slot on an admission-controlled route", ("route",))
+compression_responses = Counter(registry, "http_compressed_responses_total", "Responses sent with a content encoding, by encoding", ("encoding",))
+compression_bytes = Counter(registry, "http_compression_bytes_total", "Body bytes of compressed responses before and after encoding", ("encoding", "stage"))
+
+class _RequestStats:
+    __slots__ = ("queries", "query_seconds")
+    
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+# Set per request by MetricsMiddleware; the threadpool and async engine's greenlets inherit it
+_request_stats: contextvars.ContextVar[Optional[_RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+def instrument_engine(engine: Engine):
+    """Count and time every statement on a (sync, or async_engine.sync_engine) engine"""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_query_duration.observe(value=elapsed)
+        stats = _request_stats.get()
+        if stats is None:
+            db_queries.inc("", BACKGROUND_ROUTE)
+            db_query_seconds.inc("", BACKGROUND_ROUTE, amount=elapsed)
+        else:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+
+class MetricsMiddleware:
+    """Records request count, latency, in-flight requests and SQL work per route template"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status_code = 500  # unless the app starts a response
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        http_requests_in_progress.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_progress.dec(method)
+            _request_stats.reset(token)
+            # The router stores the matched route on the scope; the template keeps cardinality bounded
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            http_requests.inc(method, route, str(status_code))
+            http_request_duration.observe(method, route, value=elapsed)
+            if stats.queries:
+                db_queries.inc(method, route, amount=stats.queries)
+                db_query_seconds.inc(method, route, amount=stats.query_seconds)
\ No newline at end of file
@@ -0,0 +1,346 @@
+import asyncio
+import contextvars
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as StackCounter
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import compile_path
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = "x-profile-id"
+MAX_STATEMENT_CHARS = 2000
+
+Frame = Tuple[str, str, int]  # (qualified name, file, first line)
+
+class RequestProfile:
+    """Samples and SQL statements collected for one profiled request"""
+    
+    def __init__(self, method: str, path: str, trigger: str):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.stacks: StackCounter = StackCounter()  # stack (root first) -> seconds
+        self.samples = 0
+        self.statements: List[Dict[str, Any]] = []
+        self.status_code: Optional[int] = None
+        self.route: Optional[str] = None
+
+# Set while a profiled request runs; copied into threadpool calls and the async engine's greenlets
+_active_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("active_profile", default=None)
+
+class StackSampler:
+    """Samples the stacks of threads working for profiled requests.
+    
+    Event loop samples count only while the request's own task is running, so
+    concurrent requests don't leak into each other. Threadpool threads are
+    attributed through the context anyio runs the call in. Each sample is
+    weighted by the time since the previous one, because the sampler has to win
+    the GIL before it can look.
+    """
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.worker_run_code = _worker_run_code()
+        self._profiles: List[RequestProfile] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+    
+    def remove(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles.remove(profile)
+    
+    @property
+    def active(self) -> int:
+        return len(self._profiles)
+    
+    def _run(self):
+        last = time.perf_counter()
+        while True:
+            with self._lock:
+                idle = not self._profiles
+                if idle:
+                    self._wakeup.clear()
+            if idle:
+                self._wakeup.wait()
+                last = time.perf_counter()
+                continue
+            
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            # Under the lock, so a profile is never sampled after remove() hands it to the writer
+            with self._lock:
+                self.sample(self._profiles, now - last)
+            last = now
+    
+    def sample(self, profiles: Sequence[RequestProfile], weight: float):
+        own_thread = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            for profile in profiles:
+                stack = self._stack_for(profile, thread_id, frame)
+                if stack:
+                    profile.stacks[stack] += weight
+                    profile.samples += 1
+                    break
+    
+    def _stack_for(self, profile: RequestProfile, thread_id: int, frame: FrameType) -> Optional[Tuple[Frame, ...]]:
+        if thread_id == profile.loop_thread:
+            if profile.task is None or asyncio.current_task(profile.task.get_loop()) is not profile.task:
+                return None
+            return _stack(frame, ProfilingMiddleware.__call__.__code__)
+        
+        if self.worker_run_code is None:
+            return None
+        stack = _stack(frame, self.worker_run_code)
+        if not stack:
+            return None
+        # The anyio worker frame holds the context the call runs in
+        worker_frame = _find_frame(frame, self.worker_run_code)
+        context = worker_frame.f_locals.get("context") if worker_frame is not None else None
+        if not isinstance(context, contextvars.Context) or context.get(_active_profile) is not profile:
+            return None
+        return (("[threadpool]", "", 0),) + stack[1:]
+
+def _worker_run_code() -> Optional[CodeType]:
+    """Entry point of anyio's threadpool workers, or None when this anyio version lacks it.
+    
+    WorkerThread is private to anyio, so it is only looked up once profiling is on;
+    without it the profiler still samples the event loop but not threadpool calls.
+    """
+    try:
+        from anyio._backends._asyncio import WorkerThread
+        return WorkerThread.run.__code__
+    except (ImportError, AttributeError):
+        logger.warning("anyio's WorkerThread not found; threadpool calls will not be sampled")
+        return None
+
+def _find_frame(frame: Optional[FrameType], code: CodeType) -> Optional[FrameType]:
+    while frame is not None:
+        if frame.f_code is code:
+            return frame
+        frame = frame.f_back
+    return None
+
+def _stack(frame: Optional[FrameType], root: CodeType) -> Tuple[Frame, ...]:
+    """Frames from `root` (inclusive) down to the leaf; empty when `root` is not on the stack"""
+    frames: List[Frame] = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        if code is root:
+            frames.reverse()
+            return tuple(frames)
+        frame = frame.f_back
+    return ()
+
+def profile_engine(engine: Engine):
+    """Record the statements profiled requests execute, with their timings"""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _active_profile.get() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = _active_profile.get()
+        if profile is None:
+            return
+        started = conn.info["profile_started"].pop()
+        profile.statements.append({
+            "statement": statement[:MAX_STATEMENT_CHARS],
+            "executemany": executemany,
+            "start_ms": round((started - profile.started) * 1000, 3),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "engine": conn.engine.pool._orig_logging_name or "default"
+        })
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    if not filename:
+        return name
+    return f"{name} ({_short_path(filename)}:{line})"
+
+def _short_path(filename: str) -> str:
+    for marker in ("site-packages" + os.sep, os.sep + "backend" + os.sep):
+        index = filename.rfind(marker)
+        if index >= 0:
+            return filename[index + len(marker):]
+    return filename
+
+def collapsed_stacks(profile: RequestProfile) -> str:
+    """Brendan Gregg's folded format; counts are microseconds"""
+    lines = [
+        f"{';'.join(_frame_label(frame).replace(';', ':') for frame in stack)} {max(int(seconds * 1e6), 1)}"
+        for stack, seconds in profile.stacks.most_common()
+    ]
+    return "\n".join(lines) + "\n"
+
+def speedscope_document(profile: RequestProfile) -> Dict[str, Any]:
+    """A sampled profile in speedscope's file format (https://www.speedscope.app)"""
+    frame_index: Dict[Frame, int] = {}
+    samples, weights = [], []
+    for stack, seconds in profile.stacks.items():
+        samples.append([frame_index.setdefault(frame, len(frame_index)) for frame in stack])
+        weights.append(seconds)
+    
+    name = f"{profile.method} {profile.path}"
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "expense-tracker profiler",
+        "activeProfileIndex": 0,
+        "shared": {
+            "frames": [
+                {"name": frame[0], "file": _short_path(frame[1]), "line": frame[2]} if frame[1] else {"name": frame[0]}
+                for frame in frame_index
+            ]
+        },
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights
+        }]
+    }
+
+class ProfilingMiddleware:
+    """Profiles selected requests and writes a flame graph plus their SQL per request.
+    
+    Only requests carrying the admin token in X-Profile-Token are profiled; without
+    a token configured nothing is. `routes` (templates such as
+    /api/v1/groups/{group_id}/balances) and `sample_rate` narrow that down, e.g. for
+    a load generator sending the token on every request: a token request is then
+    profiled when it matches a route or is picked at `sample_rate`. With neither
+    set, every token request is. Other requests pass straight through.
+    """
+    
+    def __init__(
+        self,
+        app,
+        output_dir: str,
+        admin_token: Optional[str] = None,
+        routes: Sequence[str] = (),
+        sample_rate: float = 0.0,
+        interval: float = 0.001,
+        output_format: str = "speedscope",
+        max_concurrent: int = 2
+    ):
+        if output_format not in ("speedscope", "collapsed"):
+            raise ValueError(f"unknown profile format: {output_format}")
+        self.app = app
+        self.output_dir = output_dir
+        self.admin_token = admin_token
+        self.route_patterns = [(template, compile_path(template)[0]) for template in routes]
+        self.sample_rate = sample_rate
+        self.output_format = output_format
+        self.max_concurrent = max_concurrent
+        self.sampler = StackSampler(interval)
+    
+    def _trigger(self, scope) -> Optional[str]:
+        if not self.admin_token:
+            return None
+        token = Headers(scope=scope).get(PROFILE_TOKEN_HEADER)
+        if not token or not hmac.compare_digest(token.encode(), self.admin_token.encode()):
+            return None
+        if not self.route_patterns and not self.sample_rate:
+            return "header"
+        for template, pattern in self.route_patterns:
+            if pattern.match(scope["path"]):
+                return f"route {template}"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None or self.sampler.active >= self.max_concurrent:
+            await self.app(scope, receive, send)
+            return
+        
+        profile = RequestProfile(scope["method"], scope["path"], trigger)
+        token = _active_profile.set(profile)
+        
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile.id)
+            await send(message)
+        
+        self.sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.finished = time.perf_counter()
+            self.sampler.remove(profile)
+            _active_profile.reset(token)
+            profile.route = getattr(scope.get("route"), "path", None)
+            try:
+                await run_in_threadpool(self._write, profile)
+            except Exception:
+                # The response has been sent; a failed write must not fail the request
+                logger.exception("could not write profile %s", profile.id)
+    
+    def _write(self, profile: RequestProfile):
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", profile.path).strip("_")[:80] or "root"
+        base = os.path.join(self.output_dir, f"{profile.id}-{profile.method}-{slug}")
+        
+        if self.output_format == "speedscope":
+            with open(f"{base}.speedscope.json", "w") as f:
+                json.dump(speedscope_document(profile), f)
+        else:
+            with open(f"{base}.collapsed", "w") as f:
+                f.write(collapsed_stacks(profile))
+        
+        sql_ms = sum(statement["duration_ms"] for statement in profile.statements)
+        with open(f"{base}.json", "w") as f:
+            json.dump({
+                "id": profile.id,
+                "method": profile.method,
+                "path": profile.path,
+                "route": profile.route,
+                "status_code": profile.status_code,
+                "trigger": profile.trigger,
+                "duration_ms": round((profile.finished - profile.started) * 1000, 3),
+                "samples": profile.samples,
+                "sampled_ms": round(sum(profile.stacks.values()) * 1000, 3),
+                "sql_count": len(profile.statements),
+                "sql_ms": round(sql_ms, 3),
+                "statements": profile.statements
+            }, f, indent=2)
+        logger.info("profile %s written to %s (%d samples, %d statements)", profile.id, base, profile.samples, len(profile.statements))
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""Real-time fan-out of write events to WebSocket subscribers.
+
+Writes publish small JSON messages for a group after they commit. Every message is
+encoded once and queued to each subscriber of the group; each connection has its
+own bounded queue drained by its own sender task, so a slow client never holds up
+a write or the other connections. When a queue overflows, its backlog is replaced
+by a single {"type": "resync"}: the client has missed messages and should refetch.
+
+Subscriptions live in the worker process that accepted the socket. With several
+worker processes set PUSH_BACKEND=postgres: messages then go through Postgres
+LISTEN/NOTIFY and every process delivers them to its own connections.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+import orjson
+from sqlalchemy.engine import make_url
+from starlette.websockets import WebSocket, WebSocketState
+
+from app.core.config import settings
+from app.core.metrics import push_connections, push_deliveries, push_disconnects, push_messages, push_resyncs
+
+logger = logging.getLogger(__name__)
+
+EXPENSE_ADDED = "expense.added"
+EXPENSE_DELETED = "expense.deleted"
+BALANCE_CHANGED = "balance.changed"
+MEMBER_JOINED = "member.joined"
+RESYNC = "resync"
+
+RESYNC_MESSAGE = orjson.dumps({"type": RESYNC}).decode()
+
+NOTIFY_CHANNEL = "push_events"
+NOTIFY_MAX_BYTES = 7900  # Postgres rejects NOTIFY payloads of 8000 bytes or more
+
+class Subscription:
+    """One connection's view of the hub: the groups it follows and its outgoing queue"""
+    
+    __slots__ = ("user_id", "group_ids", "queue", "resyncs")
+    
+    def __init__(self, user_id: int, group_ids: Iterable[int], queue_size: int):
+        self.user_id = user_id
+        self.group_ids: Set[int] = set(group_ids)
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(max(queue_size, 1))
+        self.resyncs = 0
+    
+    def offer(self, data: str) -> bool:
+        """Queue an encoded message; on overflow drop the backlog for a resync marker"""
+        try:
+            self.queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_MESSAGE)
+            self.resyncs += 1
+            return False
+
+class PushHub:
+    """Group -> subscriptions index for this process; publish() may be called from any thread"""
+    
+    def __init__(self, queue_size: int, max_connections: int):
+        self.queue_size = queue_size
+        self.max_connections = max_connections
+        self._groups: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._users: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._relay: Optional["PostgresPushRelay"] = None
+        self._connections = 0
+    
+    @property
+    def connections(self) -> int:
+        return self._connections
+    
+    async def start(self, database_url: Optional[str] = None):
+        """Bind to the running loop; with a Postgres URL, relay messages through LISTEN/NOTIFY"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if database_url is not None:
+            self._relay = PostgresPushRelay(database_url, self._on_notify, self._resync_all)
+            await self._relay.start()
+    
+    async def stop(self):
+        if self._relay is not None:
+            await self._relay.close()
+            self._relay = None
+        self._loop = None
+    
+    def subscribe(self, user_id: int, group_ids: Iterable[int]) -> Optional[Subscription]:
+        """Register a connection, or None when this process is at PUSH_MAX_CONNECTIONS"""
+        if self._connections >= self.max_connections:
+            return None
+        subscription = Subscription(user_id, group_ids, self.queue_size)
+        self._users[user_id].add(subscription)
+        for group_id in subscription.group_ids:
+            self._groups[group_id].add(subscription)
+        self._connections += 1
+        push_connections.inc()
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        for group_id in subscription.group_ids:
+            self._discard(self._groups, group_id, subscription)
+        self._discard(self._users, subscription.user_id, subscription)
+        self._connections -= 1
+        push_connections.dec()
+    
+    @staticmethod
+    def _discard(index: Dict[int, Set[Subscription]], key: int, subscription: Subscription):
+        subscriptions = index.get(key)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del index[key]
+    
+    def publish(self, group_id: int, message: Dict[str, Any]):
+        """Send a committed change to the group's subscribers; a no-op until start()"""
+        loop = self._loop
+        if loop is None:
+            return
+        message = {"type": message["type"], "group_id": group_id, **message}
+        data = orjson.dumps(message).decode()
+        if self._relay is not None:
+            if len(data.encode()) > NOTIFY_MAX_BYTES:
+                # Too big for NOTIFY; subscribers refetch the group instead
+                data = orjson.dumps({"type": RESYNC, "group_id": group_id}).decode()
+            self._call_soon(loop, self._relay.send, data)
+        else:
+            self._call_soon(loop, self._dispatch, message, data)
+    
+    def _call_soon(self, loop: asyncio.AbstractEventLoop, callback: Callable, *args):
+        if threading.get_ident() == self._loop_thread:
+            callback(*args)
+            return
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # The loop closed during shutdown; nobody is left to deliver to
+            pass
+    
+    def _on_notify(self, data: str):
+        self._dispatch(orjson.loads(data), data)
+    
+    def _dispatch(self, message: Dict[str, Any], data: str):
+        group_id = message["group_id"]
+        if message["type"] == MEMBER_JOINED:
+            # New members' open connections start following the group
+            for user_id in message["user_ids"]:
+                for subscription in self._users.get(user_id, ()):
+                    subscription.group_ids.add(group_id)
+                    self._groups[group_id].add(subscription)
+        
+        subscriptions = self._groups.get(group_id)
+        push_messages.inc(message["type"])
+        if not subscriptions:
+            return
+        overflowed = 0
+        for subscription in subscriptions:
+            if not subscription.offer(data):
+                overflowed += 1
+        # An overflowed subscription got a resync instead of this message
+        push_deliveries.inc(amount=len(subscriptions) - overflowed)
+        if overflowed:
+            push_resyncs.inc(amount=overflowed)
+    
+    def _resync_all(self):
+        """Messages may have been lost (e.g. the relay reconnected); every client refetches"""
+        for subscriptions in self._users.values():
+            for subscription in subscriptions:
+                subscription.offer(RESYNC_MESSAGE)
+    
+    async def serve(self, websocket: WebSocket, subscription: Subscription, send_timeout: float):
+        """Pump the subscription's queue into an accepted socket until either side goes away"""
+        async def send():
+            while True:
+                data = await subscription.queue.get()
+                await asyncio.wait_for(websocket.send_text(data), send_timeout)
+        
+        async def receive():
+            # Clients don't send anything we act on; this only notices the disconnect
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        
+        sender = asyncio.create_task(send())
+        receiver = asyncio.create_task(receive())
+        try:
+            await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (sender, receiver):
+                task.cancel()
+            await asyncio.gather(sender, receiver, return_exceptions=True)
+        
+        if sender.done() and not sender.cancelled() and isinstance(sender.exception(), asyncio.TimeoutError):
+            push_disconnects.inc("slow")
+            await close_quietly(websocket, code=1013, reason="too slow")
+
+async def close_quietly(websocket: WebSocket, code: int, reason: str = ""):
+    if websocket.application_state == WebSocketState.DISCONNECTED or websocket.client_state == WebSocketState.DISCONNECTED:
+        return
+    try:
+        await websocket.close(code=code, reason=reason)
+    except Exception:
+        pass
+
+class PostgresPushRelay:
+    """Carries published messages between worker processes over one asyncpg connection"""
+    
+    CHECK_INTERVAL_SECONDS = 5.0
+    
+    def __init__(self, database_url: str, on_message: Callable[[str], None], on_reconnect: Callable[[], None]):
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.on_message = on_message
+        self.on_reconnect = on_reconnect
+        self._connection = None
+        self._outgoing: "asyncio.Queue[str]" = asyncio.Queue(10_000)
+        self._sender: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        await self._connect()
+        self._sender = asyncio.create_task(self._send_loop())
+    
+    async def close(self):
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+    
+    async def _connect(self):
+        import asyncpg
+        
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(NOTIFY_CHANNEL, lambda connection, pid, channel, payload: self.on_message(payload))
+    
+    def send(self, data: str):
+        try:
+            self._outgoing.put_nowait(data)
+        except asyncio.QueueFull:
+            logger.warning("push relay backlog full, dropping a message")
+    
+    async def _send_loop(self):
+        while True:
+            try:
+                data = await asyncio.wait_for(self._outgoing.get(), self.CHECK_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                data = None  # idle; still check the listening connection is alive
+            try:
+                if self._connection.is_closed():
+                    await self._connect()
+                    self.on_reconnect()
+                if data is not None:
+                    await self._connection.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, data)
+            except Exception:
+                logger.exception("push relay failed, retrying")
+                await asyncio.sleep(1.0)
+
+push_hub = PushHub(settings.PUSH_QUEUE_SIZE, settings.PUSH_MAX_CONNECTIONS)
+
+def push_database_url() -> Optional[str]:
+    """Where the hub relays messages between processes, or None to deliver in-process"""
+    return settings.DATABASE_URL if settings.PUSH_BACKEND == "postgres" else None
\ No newline at end of file
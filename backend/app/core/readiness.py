@@ -0,0 +1,59 @@
+import time
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+class ReadinessProbe:
+    """Whether this worker should be sent traffic, as opposed to whether it is alive.
+    
+    Liveness (/health) only says the process answers; restarting it won't help
+    with anything else. Readiness (/health/ready) also needs startup to have
+    finished, shutdown not to have begun (so load balancers drain the worker
+    first), the primary to answer and the schema to be in place. Once every
+    table has been seen the schema isn't checked again.
+    """
+    
+    def __init__(self, engine: Engine, metadata: MetaData):
+        self.engine = engine
+        self.metadata = metadata
+        self.started = False
+        self.draining = False
+        self._schema_ready = False
+    
+    def mark_started(self):
+        self.started = True
+        self.draining = False
+    
+    def mark_draining(self):
+        self.draining = True
+    
+    def _missing_tables(self, connection) -> List[str]:
+        if self._schema_ready:
+            return []
+        existing = set(inspect(connection).get_table_names())
+        missing = sorted(table for table in self.metadata.tables if table not in existing)
+        self._schema_ready = not missing
+        return missing
+    
+    def check(self) -> Tuple[bool, Dict[str, Any]]:
+        """(ready, report); blocking, so call it from a worker thread"""
+        report: Dict[str, Any] = {"started": self.started, "draining": self.draining}
+        ready = self.started and not self.draining
+        start = time.perf_counter()
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                report["database"] = "ok"
+                missing = self._missing_tables(connection)
+            if missing:
+                ready = False
+                report["schema"] = {"missing_tables": missing}
+            else:
+                report["schema"] = "ok"
+        except SQLAlchemyError as e:
+            ready = False
+            report["database"] = str(e.__class__.__name__)
+        report["probe_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        report["status"] = "ready" if ready else "not_ready"
+        return ready, report
\ No newline at end of file
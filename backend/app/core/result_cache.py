@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+class CacheEntry:
+    __slots__ = ("version", "value", "sequence", "stored_at")
+    
+    def __init__(self, version: str, value: Any, sequence: int):
+        self.version = version
+        self.value = value
+        self.sequence = sequence
+        self.stored_at = time.monotonic()
+
+class AsyncResultCache:
+    """Versioned TTL/LRU cache for expensive async results.
+    
+    Concurrent misses for the same (key, version) share one computation, and an
+    outdated entry can be served while its replacement is computed in the background.
+    Only used from the event loop, so it needs no locking.
+    """
+    
+    def __init__(self, ttl_seconds: float, max_entries: int, stale_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._in_flight: Dict[Tuple[Hashable, str], asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._sequence = itertools.count()
+        self.counters = {"hit": 0, "stale": 0, "shared": 0, "miss": 0}
+    
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        version: str,
+        compute: Callable[[], Awaitable[Any]],
+        allow_stale: bool = False
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Return (value, cache metadata); status is hit, stale, shared or miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+            if entry.version == version and age < self.ttl_seconds:
+                return self._serve("hit", key, entry)
+            if allow_stale and age < self.ttl_seconds + self.stale_seconds:
+                self._flight(key, version, compute)
+                return self._serve("stale", key, entry)
+        
+        status = "shared" if (key, version) in self._in_flight else "miss"
+        self.counters[status] += 1
+        # Shielded so one cancelled caller doesn't cancel the call the others are waiting on
+        value = await asyncio.shield(self._flight(key, version, compute))
+        return value, self._metadata(status, self._entries.get(key), version)
+    
+    def _serve(self, status: str, key: Hashable, entry: CacheEntry):
+        self.counters[status] += 1
+        self._entries.move_to_end(key)
+        return entry.value, self._metadata(status, entry, entry.version)
+    
+    def _flight(self, key: Hashable, version: str, compute: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        flight_key = (key, version)
+        task = self._in_flight.get(flight_key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key, version, compute, next(self._sequence)))
+            self._in_flight[flight_key] = task
+            self._background.add(task)
+            task.add_done_callback(self._finished)
+        return task
+    
+    async def _compute(self, key: Hashable, version: str, compute: Callable[[], Awaitable[Any]], sequence: int):
+        try:
+            value = await compute()
+        finally:
+            self._in_flight.pop((key, version), None)
+        
+        # A slow computation for an older version must not replace a newer result
+        current = self._entries.get(key)
+        if current is None or current.sequence < sequence:
+            self._entries[key] = CacheEntry(version, value, sequence)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+    
+    def _finished(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled():
+            # Failures reach awaiting callers; background refreshes just retry next time
+            task.exception()
+    
+    def _metadata(self, status: str, entry: Optional[CacheEntry], version: str) -> Dict[str, Any]:
+        return {
+            "status": status,
+            "version": entry.version if entry else version,
+            "age_seconds": round(time.monotonic() - entry.stored_at, 3) if entry else 0.0
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "in_flight": len(self._in_flight), **self.counters}
+    
+    def clear(self):
+        self._entries.clear()
\ No newline at end of file
@@ -0,0 +1,60 @@
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from app.core.config import settings
+
+WRITER = "writer"
+READER = "reader"
+
+def is_sqlite_file(database_url: str) -> bool:
+    """A SQLite database in a file; in-memory databases keep their single-connection pool"""
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+def sqlite_pragmas(role: str) -> Dict[str, Any]:
+    """Per-connection settings for a writer or a reader"""
+    pragmas = {
+        # WAL lets readers keep reading while the writer commits; it persists in the file
+        "journal_mode": "WAL",
+        # NORMAL only syncs at checkpoints under WAL: a power loss can drop the last
+        # commits but never corrupts the database
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,  # negative: KiB rather than pages
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": "MEMORY",
+    }
+    if role == READER:
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+def sqlite_reader_pool_options() -> Dict[str, Any]:
+    """Readers get their own pool; writers keep the primary's (DB_POOL_SIZE), serialised by SQLite's write lock"""
+    return {
+        "pool_size": settings.SQLITE_READER_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT
+    }
+
+def configure_sqlite_engine(engine: Engine, role: str):
+    """Apply the pragmas to every new connection; writers open write transactions with BEGIN IMMEDIATE.
+    
+    The driver only begins a transaction before the first INSERT/UPDATE/DELETE, so
+    sessions that only read hold no lock. Under a plain (deferred) BEGIN, a
+    transaction that reads before it writes can fail outright with SQLITE_BUSY when
+    another connection committed in between, which busy_timeout doesn't retry.
+    Taking the write lock at BEGIN makes writers queue for it instead. Reads before
+    the first write still run outside any transaction, so a block that must read
+    current rows before writing begins it itself, as group_write_lock does.
+    Pass the sync engine of an async engine.
+    """
+    pragmas = sqlite_pragmas(role)
+    
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        if role == WRITER:
+            dbapi_connection.isolation_level = "IMMEDIATE"
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
\ No newline at end of file
@@ -1,16 +1,155 @@
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_pool import InstrumentedAsyncQueuePool, InstrumentedNullPool, InstrumentedQueuePool
+from app.core.db_routing import ReadRouter, ReplicaState, is_pinned_to_primary
+from app.core.metrics import instrument_engine
+from app.core.profiling import profile_engine
+from app.core.sqlite import READER, WRITER, configure_sqlite_engine, is_sqlite_file, sqlite_reader_pool_options
 
-engine = create_engine(settings.DATABASE_URL)
+# Async drivers used when ASYNC_DATABASE_URL isn't set explicitly
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+# A SQLite file in WAL mode gets a pool of query_only readers next to the primary's writers
+SQLITE_TUNED = settings.SQLITE_TUNING and is_sqlite_file(settings.DATABASE_URL)
+
+def _engine_options(database_url: str, name: str, is_async: bool = False, sqlite_role: str = WRITER) -> dict:
+    """Pool configuration for an engine, driven by Settings"""
+    url = make_url(database_url)
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING, "pool_logging_name": name}
+    
+    # In-memory SQLite needs its single-connection pool
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    
+    if SQLITE_TUNED and sqlite_role == READER:
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            **sqlite_reader_pool_options()
+        )
+        return options
+    
+    if settings.DB_POOL_MODE == "transaction":
+        # PgBouncer multiplexes server connections per transaction, so keep
+        # nothing open between requests and let it do the pooling
+        options["poolclass"] = InstrumentedNullPool
+        if is_async and url.get_backend_name() == "postgresql":
+            # asyncpg's prepared statement cache breaks when statements hop server connections
+            options["connect_args"] = {"statement_cache_size": 0}
+    else:
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE
+        )
+    return options
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL, "primary"))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or _async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **_engine_options(ASYNC_DATABASE_URL, "primary-async", is_async=True)
+)
+# Objects stay usable after commit; async sessions can't lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+if SQLITE_TUNED:
+    configure_sqlite_engine(engine, WRITER)
+    configure_sqlite_engine(async_engine.sync_engine, WRITER)
+
+def _replica_state(index: int, database_url: str) -> ReplicaState:
+    async_url = _async_database_url(database_url)
+    return ReplicaState(
+        f"replica-{index}",
+        create_engine(database_url, **_engine_options(database_url, f"replica-{index}")),
+        create_async_engine(async_url, **_engine_options(async_url, f"replica-{index}-async", is_async=True))
+    )
+
+def _sqlite_reader_state() -> ReplicaState:
+    """The readers of a tuned SQLite file, routed to like a replica that never lags (WAL readers see every commit)"""
+    readers = ReplicaState(
+        "sqlite-readers",
+        create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL, "sqlite-readers", sqlite_role=READER)),
+        create_async_engine(
+            ASYNC_DATABASE_URL,
+            **_engine_options(ASYNC_DATABASE_URL, "sqlite-readers-async", is_async=True, sqlite_role=READER)
+        )
+    )
+    configure_sqlite_engine(readers.engine, READER)
+    configure_sqlite_engine(readers.async_engine.sync_engine, READER)
+    return readers
+
+_replicas = [_replica_state(index, url) for index, url in enumerate(settings.DATABASE_REPLICA_URLS)]
+if SQLITE_TUNED and settings.SQLITE_READER_POOL_SIZE > 0:
+    _replicas.append(_sqlite_reader_state())
+
+read_router = ReadRouter(
+    engine,
+    async_engine,
+    _replicas,
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL
+)
+
+# Count and time SQL per route for /metrics
+for _engine in [engine, async_engine.sync_engine] + [
+    replica_engine for replica in read_router.replicas for replica_engine in (replica.engine, replica.async_engine.sync_engine)
+]:
+    instrument_engine(_engine)
+    if settings.PROFILING_ENABLED:
+        profile_engine(_engine)
+
 Base = declarative_base()
 
+def create_tables():
+    """Create whatever tables the imported models define and the database lacks.
+    
+    For throwaway databases (DB_CREATE_TABLES, benchmarks); real deployments run
+    `alembic upgrade head` before starting the app. Connects, so never call it at
+    import time.
+    """
+    Base.metadata.create_all(bind=engine)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db(request: Request):
+    """Session for read-only handlers: a healthy replica, or the primary when pinned or none are usable"""
+    db = SessionLocal(bind=read_router.read_engine(is_pinned_to_primary(request)))
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    """AsyncSession counterpart of get_read_db"""
+    if read_router.replicas and read_router.needs_refresh():
+        # Replica probes use blocking connections
+        await run_in_threadpool(read_router.refresh)
+    async with AsyncSessionLocal(bind=read_router.async_read_engine(is_pinned_to_primary(request))) as db:
+        yield db
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""Fill in expense categories for expenses written before categorisation existed.
+
+Usage (from backend/):
+    python -m app.jobs.categorise_expenses [--workers 0] [--batch 20000] [--all]
+
+New expenses are categorised when they are written. This job walks the live and
+archived expense tables in id order, --batch rows at a time, and categorises
+every row whose category is NULL (every row with --all, e.g. after the rule
+tables change). Each distinct description is classified once per run: the job
+keeps a description -> category map across batches and sends only unseen
+descriptions to a pool of --workers processes (0 classifies in this process).
+The rule tables classify a description in microseconds, so the pool only pays off
+on multi-core hosts when most descriptions are new; the default is in-process.
+Categories are written back with one bulk UPDATE per batch; no group write lock
+is needed since balances don't depend on them.
+"""
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+
+from app.database import SessionLocal
+from app.models.archive import ArchivedExpense
+from app.models.expense import Expense
+from app.utils.expense_categories import categorise, normalise_description
+
+logger = logging.getLogger(__name__)
+
+# Descriptions handed to each worker process at a time; large chunks amortise the pickling
+POOL_CHUNK = 2000
+
+def classify(descriptions: List[str], known: Dict[str, str], pool: Optional[Executor]) -> Dict[str, str]:
+    """Categories for descriptions, classifying only normalised texts not already in `known`"""
+    normalised = {description: normalise_description(description) for description in descriptions}
+    unseen = list({text for text in normalised.values() if text not in known})
+    if pool is not None and len(unseen) > POOL_CHUNK:
+        known.update(zip(unseen, pool.map(categorise, unseen, chunksize=POOL_CHUNK)))
+    else:
+        known.update((text, categorise(text)) for text in unseen)
+    return {description: known[text] for description, text in normalised.items()}
+
+def categorise_table(model, batch: int, reclassify: bool, known: Dict[str, str], pool: Optional[Executor]) -> int:
+    """Categorise one table; returns the number of rows updated"""
+    updated = 0
+    last_id = 0
+    while True:
+        with SessionLocal() as db:
+            query = select(model.id, model.description).where(model.id > last_id).order_by(model.id).limit(batch)
+            if not reclassify:
+                query = query.where(model.category.is_(None))
+            rows = db.execute(query).all()
+            if not rows:
+                return updated
+            
+            categories = classify([description for _, description in rows], known, pool)
+            db.execute(update(model), [{"id": row_id, "category": categories[description]} for row_id, description in rows])
+            db.commit()
+        
+        last_id = rows[-1][0]
+        updated += len(rows)
+        logger.info("%s: %d rows categorised, up to id %d", model.__tablename__, updated, last_id)
+
+def run(workers: int, batch: int, reclassify: bool) -> Dict[str, int]:
+    known: Dict[str, str] = {}
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    try:
+        counts = {}
+        for model in (Expense, ArchivedExpense):
+            counts[model.__tablename__] = categorise_table(model, batch, reclassify, known, pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    counts["distinct_descriptions"] = len(known)
+    return counts
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0, help="classifier processes; 0 classifies in this process")
+    parser.add_argument("--batch", type=int, default=20_000, help="rows read and updated per transaction")
+    parser.add_argument("--all", action="store_true", help="recategorise every expense, not only uncategorised ones")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    start = time.perf_counter()
+    counts = run(args.workers, args.batch, args.all)
+    logger.info(
+        "categorised %d expenses and %d archived expenses (%d distinct descriptions) in %.1fs",
+        counts["expenses"], counts["archived_expenses"], counts["distinct_descriptions"], time.perf_counter() - start
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
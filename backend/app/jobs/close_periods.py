@@ -0,0 +1,72 @@
+"""Close old periods so the live expense tables only hold recent history.
+
+Usage (from backend/):
+    python -m app.jobs.close_periods [--older-than-days 365] [--min-expenses 500] [--group ID] [--rebuild]
+
+For every group with at least --min-expenses expenses created more than
+--older-than-days ago, records a balance checkpoint and moves those expenses and
+their splits into the archive tables (see PeriodService). Each group is closed in
+its own transaction under the group's write lock, so the API keeps serving writes
+while the job runs. --rebuild then recomputes each closed group's stored balances
+from the new checkpoint, which also repairs any drift.
+"""
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.expense import Expense
+from app.services.period_service import PeriodService
+
+logger = logging.getLogger(__name__)
+
+def groups_to_close(before: datetime, min_expenses: int) -> List[int]:
+    with SessionLocal() as db:
+        return db.execute(
+            select(Expense.group_id)
+            .where(Expense.created_at < before)
+            .group_by(Expense.group_id)
+            .having(func.count(Expense.id) >= max(min_expenses, 1))
+            .order_by(Expense.group_id)
+        ).scalars().all()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=float, default=settings.PERIOD_CLOSE_AFTER_DAYS, help="archive expenses older than this")
+    parser.add_argument("--min-expenses", type=int, default=settings.PERIOD_CLOSE_MIN_EXPENSES, help="skip groups with fewer expenses to archive")
+    parser.add_argument("--group", type=int, help="only this group, regardless of --min-expenses")
+    parser.add_argument("--rebuild", action="store_true", help="recompute stored balances of the closed groups")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    before = datetime.now(timezone.utc) - timedelta(days=args.older_than_days)
+    group_ids = [args.group] if args.group is not None else groups_to_close(before, args.min_expenses)
+    logger.info("closing %d groups before %s", len(group_ids), before.isoformat())
+    
+    failed = 0
+    archived = 0
+    start = time.perf_counter()
+    for group_id in group_ids:
+        try:
+            with SessionLocal() as db:
+                service = PeriodService(db)
+                checkpoint = service.close_period(group_id, before)
+                archived += checkpoint.expense_count
+                logger.info("group %s: archived %d expenses, %d balance pairs at the checkpoint", group_id, checkpoint.expense_count, len(checkpoint.entries))
+                if args.rebuild:
+                    service.rebuild_balances(group_id)
+        except Exception as e:
+            failed += 1
+            logger.error("group %s: %s", group_id, getattr(e, "detail", e))
+    
+    logger.info("archived %d expenses from %d groups in %.1fs, %d failed", archived, len(group_ids) - failed, time.perf_counter() - start, failed)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
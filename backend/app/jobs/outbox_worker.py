@@ -0,0 +1,179 @@
+"""Apply outbox events (balance updates and other side effects of expense writes).
+
+Usage (from backend/):
+    python -m app.jobs.outbox_worker [--concurrency 4] [--once] [--requeue-dead [--group ID]]
+
+With OUTBOX_WORKER_ENABLED (the default) every API process runs this worker in
+its event loop. Turn the setting off and run this module to apply events in a
+separate process instead. Several workers can run side by side: each group's
+events are applied in id order under the group's write lock, so a group is only
+ever drained by one of them at a time. Failed events are retried with backoff
+and dead-lettered after OUTBOX_MAX_ATTEMPTS; --requeue-dead retries them.
+With PUSH_BACKEND=postgres a separate worker's balance changes still reach the API
+processes' WebSocket clients.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.push import push_database_url, push_hub
+from app.database import SessionLocal
+from app.services.outbox_service import OutboxService, add_enqueue_listener, remove_enqueue_listener
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL_SECONDS = 300.0
+
+class OutboxWorker:
+    def __init__(
+        self,
+        concurrency: int = settings.OUTBOX_WORKER_CONCURRENCY,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL_SECONDS,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE
+    ):
+        self.concurrency = max(concurrency, 1)
+        self.poll_interval = poll_interval
+        self.batch_size = max(batch_size, 1)
+        self.counters = {"done": 0, "retry": 0, "dead": 0}
+        self._active: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._listener = None
+        self._stopping = False
+        self._last_prune = 0.0
+    
+    def start(self):
+        """Run in the background of the current event loop, waking on every eventual write"""
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._listener = lambda group_id: loop.call_soon_threadsafe(self._wakeup.set)
+        add_enqueue_listener(self._listener)
+        self._runner = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        """Stop polling and wait for the groups being drained"""
+        self._stopping = True
+        remove_enqueue_listener(self._listener)
+        self._wakeup.set()
+        await self._runner
+    
+    async def run(self, once: bool = False):
+        """Poll for groups with due events until stopped; with once, return when nothing is due"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        while not self._stopping:
+            self._wakeup.clear()
+            free = self.concurrency - len(self._active)
+            if free > 0:
+                try:
+                    due = await run_in_threadpool(self._due_groups, free, frozenset(self._active))
+                except Exception:
+                    # e.g. the database is down; try again at the next poll
+                    logger.exception("polling the outbox failed")
+                    due = []
+                for group_id in due:
+                    self._spawn(group_id)
+            
+            if once:
+                if not self._tasks:
+                    break
+                await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            
+            if time.monotonic() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+                self._last_prune = time.monotonic()
+                await run_in_threadpool(self._prune)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+        
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+    
+    def _spawn(self, group_id: int):
+        self._active.add(group_id)
+        task = asyncio.create_task(self._drain(group_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _drain(self, group_id: int):
+        try:
+            outcomes = await run_in_threadpool(self._process_group, group_id)
+            for outcome, count in outcomes.items():
+                self.counters[outcome] += count
+        except Exception:
+            logger.exception("draining outbox events for group %s failed", group_id)
+        finally:
+            self._active.discard(group_id)
+            # The group may have more due events, and a slot is free for another group
+            self._wakeup.set()
+    
+    def _due_groups(self, limit: int, active: Set[int]):
+        with SessionLocal() as db:
+            return OutboxService(db).due_groups(limit, exclude=active)
+    
+    def _process_group(self, group_id: int) -> Dict[str, int]:
+        with SessionLocal() as db:
+            return OutboxService(db).process_group(group_id, self.batch_size)
+    
+    def _prune(self):
+        try:
+            with SessionLocal() as db:
+                pruned = OutboxService(db).prune(timedelta(hours=settings.OUTBOX_RETENTION_HOURS))
+        except Exception:
+            logger.exception("pruning applied outbox events failed")
+            return
+        if pruned:
+            logger.info("pruned %d applied outbox events", pruned)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._runner is not None and not self._runner.done(),
+            "concurrency": self.concurrency,
+            "active_groups": len(self._active),
+            **self.counters
+        }
+
+async def _main(args) -> int:
+    worker = OutboxWorker(concurrency=args.concurrency, batch_size=args.batch_size)
+    database_url = push_database_url()
+    if database_url is not None:
+        # Balance changes reach the API processes' WebSocket clients through Postgres
+        await push_hub.start(database_url)
+    try:
+        await worker.run(once=args.once)
+    finally:
+        await push_hub.stop()
+    logger.info("outbox worker stopped: %s", worker.counters)
+    return 1 if worker.counters["dead"] else 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=settings.OUTBOX_WORKER_CONCURRENCY, help="groups drained in parallel")
+    parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE, help="events per group before moving on")
+    parser.add_argument("--once", action="store_true", help="exit when no events are due")
+    parser.add_argument("--requeue-dead", action="store_true", help="give dead-lettered events new attempts and exit")
+    parser.add_argument("--group", type=int, help="with --requeue-dead, only this group")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.requeue_dead:
+        with SessionLocal() as db:
+            logger.info("requeued %d dead events", OutboxService(db).requeue_dead(args.group))
+        return 0
+    try:
+        return asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        return 130
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,310 @@
+"""Precompute group insights ahead of the first viewer.
+
+Usage (from backend/):
+    python -m app.jobs.precompute_insights [--days 30] [--concurrency 4] [--rate 2] [--restart]
+
+Walks groups whose latest expense falls inside the activity window, most recently
+active first. Each group's data version is compared with the version its stored
+insights were built from, and the LLM is called only for groups that changed. The
+run's cursor and counters are checkpointed after every batch in
+insights_precompute_runs, so a run stopped by Ctrl-C, a deploy or a crash resumes
+from its last checkpoint the next time the job starts. GET /health/insights reports
+the latest run's progress and throughput.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import GroupNotFound
+from app.core.llm_client import close_llm_client, llm_configured
+from app.database import SessionLocal, engine
+from app.models.expense import Expense
+from app.models.insight import InsightsPrecomputeRun
+from app.services.group_insight_service import GroupInsightService
+from app.services.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+RESUMABLE_STATUSES = ("running", "interrupted")
+
+# Session-level advisory lock key (PostgreSQL) so only one precompute run is active at a time
+JOB_LOCK_NAMESPACE = 0x494E53
+JOB_LOCK_ID = 1
+
+class JobAlreadyRunning(RuntimeError):
+    pass
+
+class RateLimiter:
+    """Spaces calls evenly at no more than rate_per_second; a rate of 0 disables the limit"""
+    
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+    
+    async def acquire(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+def _active_groups(db: Session, since: datetime, cursor_at: Optional[datetime], cursor_group_id: Optional[int]) -> List[Tuple[int, datetime]]:
+    """(group_id, last expense time) for groups active since `since`, after the cursor, newest first"""
+    last_expense_at = func.max(Expense.created_at)
+    query = (
+        select(Expense.group_id, last_expense_at)
+        .group_by(Expense.group_id)
+        .having(last_expense_at >= since)
+    )
+    if cursor_at is not None:
+        query = query.having(or_(
+            last_expense_at < cursor_at,
+            and_(last_expense_at == cursor_at, Expense.group_id < cursor_group_id)
+        ))
+    return [tuple(row) for row in db.execute(query.order_by(last_expense_at.desc(), Expense.group_id.desc()))]
+
+def run_snapshot(run: Optional[InsightsPrecomputeRun]) -> Optional[Dict[str, Any]]:
+    """Progress and throughput of a precompute run"""
+    if run is None:
+        return None
+    
+    remaining = max(run.total_groups - run.processed, 0)
+    groups_per_second = run.processed / run.active_seconds if run.active_seconds else None
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "model": run.model,
+        "active_since": run.active_since,
+        "total_groups": run.total_groups,
+        "processed": run.processed,
+        "generated": run.generated,
+        "skipped": run.skipped,
+        "failed": run.failed,
+        "progress": round(run.processed / run.total_groups, 4) if run.total_groups else 1.0,
+        "active_seconds": round(run.active_seconds, 3),
+        "groups_per_second": round(groups_per_second, 3) if groups_per_second else None,
+        "generated_per_second": round(run.generated / run.active_seconds, 3) if run.active_seconds else None,
+        "eta_seconds": round(remaining / groups_per_second, 1) if groups_per_second and run.status == "running" else None,
+        "last_error": run.last_error,
+        "started_at": run.started_at,
+        "updated_at": run.updated_at,
+        "finished_at": run.finished_at
+    }
+
+def latest_run_status(db: Session) -> Optional[Dict[str, Any]]:
+    return run_snapshot(
+        db.query(InsightsPrecomputeRun).order_by(InsightsPrecomputeRun.id.desc()).first()
+    )
+
+class InsightsPrecomputeJob:
+    def __init__(
+        self,
+        days: float = settings.INSIGHTS_PRECOMPUTE_ACTIVITY_DAYS,
+        concurrency: int = settings.INSIGHTS_PRECOMPUTE_CONCURRENCY,
+        rate_per_second: float = settings.INSIGHTS_PRECOMPUTE_RATE_PER_SECOND,
+        batch_size: int = settings.INSIGHTS_PRECOMPUTE_BATCH_SIZE,
+        restart: bool = False
+    ):
+        self.days = days
+        self.batch_size = max(batch_size, 1)
+        self.restart = restart
+        self.model = settings.OPENAI_MODEL
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._limiter = RateLimiter(rate_per_second)
+        self._errors: List[str] = []
+    
+    async def run(self) -> Optional[Dict[str, Any]]:
+        """Run (or resume) a precompute pass and return its final snapshot"""
+        if not llm_configured():
+            raise RuntimeError("LLM service is not configured. Please set OPENAI_API_KEY.")
+        
+        lock_connection = await run_in_threadpool(self._acquire_job_lock)
+        run_id = None
+        try:
+            run_id, candidates = await run_in_threadpool(self._start_run)
+            logger.info("run %s: %d groups to check", run_id, len(candidates))
+            
+            for offset in range(0, len(candidates), self.batch_size):
+                batch = candidates[offset:offset + self.batch_size]
+                started = time.perf_counter()
+                outcomes = await asyncio.gather(*(self._process_group(group_id) for group_id, _ in batch))
+                snapshot = await run_in_threadpool(
+                    self._checkpoint, run_id, batch[-1], outcomes, time.perf_counter() - started
+                )
+                self._report(snapshot)
+            
+            return await run_in_threadpool(self._finish_run, run_id, "completed")
+        except BaseException:
+            # The cursor stays at the last checkpoint; the next run resumes from there
+            if run_id is not None:
+                await run_in_threadpool(self._finish_run, run_id, "interrupted")
+            raise
+        finally:
+            await run_in_threadpool(self._release_job_lock, lock_connection)
+    
+    async def _process_group(self, group_id: int) -> str:
+        async with self._semaphore:
+            try:
+                version, stored_version = await run_in_threadpool(self._versions, group_id)
+                if version == stored_version:
+                    return "skipped"
+                
+                await self._limiter.acquire()
+                await LLMService.generate_and_store_insights(group_id, version)
+                return "generated"
+            except GroupNotFound:
+                return "skipped"  # deleted since the run started
+            except Exception as e:
+                self._errors.append(f"group {group_id}: {e.__class__.__name__}: {e}")
+                return "failed"
+    
+    def _versions(self, group_id: int) -> Tuple[str, Optional[str]]:
+        with SessionLocal() as db:
+            return (
+                LLMService(db).group_data_version(group_id),
+                GroupInsightService(db).get_version(group_id, self.model)
+            )
+    
+    def _acquire_job_lock(self):
+        if engine.dialect.name != "postgresql":
+            return None  # single-node deployments: nothing to coordinate with
+        
+        connection = engine.connect()
+        acquired = connection.execute(
+            text("SELECT pg_try_advisory_lock(:namespace, :id)"),
+            {"namespace": JOB_LOCK_NAMESPACE, "id": JOB_LOCK_ID}
+        ).scalar()
+        connection.commit()
+        if not acquired:
+            connection.close()
+            raise JobAlreadyRunning("another insights precompute run holds the job lock")
+        return connection
+    
+    def _release_job_lock(self, connection):
+        if connection is None:
+            return
+        try:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:namespace, :id)"),
+                {"namespace": JOB_LOCK_NAMESPACE, "id": JOB_LOCK_ID}
+            )
+            connection.commit()
+        finally:
+            connection.close()
+    
+    def _start_run(self) -> Tuple[int, List[Tuple[int, datetime]]]:
+        """Resume the latest unfinished run for this model, or start a new one"""
+        with SessionLocal() as db:
+            unfinished = (
+                db.query(InsightsPrecomputeRun)
+                .filter(
+                    InsightsPrecomputeRun.model == self.model,
+                    InsightsPrecomputeRun.status.in_(RESUMABLE_STATUSES)
+                )
+                .order_by(InsightsPrecomputeRun.id.desc())
+                .all()
+            )
+            run = None
+            for previous in unfinished:
+                if run is None and not self.restart:
+                    run = previous
+                else:
+                    previous.status = "abandoned"
+            
+            if run is not None:
+                run.status = "running"
+                candidates = _active_groups(db, run.active_since, run.cursor_last_expense_at, run.cursor_group_id)
+                logger.info("resuming run %s after %d of %d groups", run.id, run.processed, run.total_groups)
+            else:
+                since = datetime.now(timezone.utc) - timedelta(days=self.days)
+                candidates = _active_groups(db, since, None, None)
+                run = InsightsPrecomputeRun(model=self.model, active_since=since, status="running", total_groups=len(candidates))
+                db.add(run)
+            
+            db.commit()
+            return run.id, candidates
+    
+    def _checkpoint(self, run_id: int, last: Tuple[int, datetime], outcomes: List[str], elapsed: float) -> Dict[str, Any]:
+        with SessionLocal() as db:
+            run = db.get(InsightsPrecomputeRun, run_id)
+            run.cursor_group_id, run.cursor_last_expense_at = last
+            run.processed += len(outcomes)
+            run.generated += outcomes.count("generated")
+            run.skipped += outcomes.count("skipped")
+            run.failed += outcomes.count("failed")
+            run.active_seconds += elapsed
+            if self._errors:
+                run.last_error = self._errors[-1][:500]
+                self._errors.clear()
+            db.commit()
+            db.refresh(run)
+            return run_snapshot(run)
+    
+    def _finish_run(self, run_id: int, status: str) -> Dict[str, Any]:
+        with SessionLocal() as db:
+            run = db.get(InsightsPrecomputeRun, run_id)
+            run.status = status
+            if status == "completed":
+                run.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            db.refresh(run)
+            return run_snapshot(run)
+    
+    @staticmethod
+    def _report(snapshot: Dict[str, Any]):
+        logger.info(
+            "run %s: %d/%d groups (%.0f%%) generated=%d skipped=%d failed=%d | %s groups/s, %s generated/s, eta %ss",
+            snapshot["run_id"], snapshot["processed"], snapshot["total_groups"], snapshot["progress"] * 100,
+            snapshot["generated"], snapshot["skipped"], snapshot["failed"],
+            snapshot["groups_per_second"], snapshot["generated_per_second"], snapshot["eta_seconds"]
+        )
+
+async def _main(args) -> int:
+    job = InsightsPrecomputeJob(
+        days=args.days,
+        concurrency=args.concurrency,
+        rate_per_second=args.rate,
+        batch_size=args.batch_size,
+        restart=args.restart
+    )
+    try:
+        snapshot = await job.run()
+    except RuntimeError as e:
+        # Not configured, or another run holds the job lock
+        logger.error("%s", e)
+        return 2
+    finally:
+        await close_llm_client()
+    
+    logger.info("run %s %s", snapshot["run_id"], snapshot["status"])
+    return 1 if snapshot["failed"] else 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=float, default=settings.INSIGHTS_PRECOMPUTE_ACTIVITY_DAYS, help="activity window")
+    parser.add_argument("--concurrency", type=int, default=settings.INSIGHTS_PRECOMPUTE_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=settings.INSIGHTS_PRECOMPUTE_RATE_PER_SECOND, help="LLM calls per second, 0 for no limit")
+    parser.add_argument("--batch-size", type=int, default=settings.INSIGHTS_PRECOMPUTE_BATCH_SIZE, help="groups per checkpoint")
+    parser.add_argument("--restart", action="store_true", help="abandon an unfinished run instead of resuming it")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        return asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        logger.warning("interrupted; the next run resumes from the last checkpoint")
+        return 130
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
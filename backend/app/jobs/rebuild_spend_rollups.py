@@ -0,0 +1,67 @@
+"""Rebuild the daily spend rollups from the expense and archive tables.
+
+Usage (from backend/):
+    python -m app.jobs.rebuild_spend_rollups [--group ID]
+
+The outbox keeps group_daily_spend and user_daily_spend current as expenses are
+added and deleted; run this once after upgrading to backfill existing history,
+and whenever rollups are suspected to have drifted. Each group is rebuilt in its
+own transaction under the group's write lock, after its pending outbox events
+are applied, so the API keeps serving writes while the job runs.
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import List
+
+from sqlalchemy import select
+
+from app.core.group_locks import group_write_lock
+from app.core.push import push_hub
+from app.database import SessionLocal
+from app.models.group import Group
+from app.services.outbox_service import OutboxService
+from app.services.spend_rollup_service import SpendRollupService
+
+logger = logging.getLogger(__name__)
+
+def all_group_ids() -> List[int]:
+    with SessionLocal() as db:
+        return db.execute(select(Group.id).order_by(Group.id)).scalars().all()
+
+def rebuild_group(group_id: int) -> int:
+    """Rebuild one group's rollups; returns the number of days with spending"""
+    with SessionLocal() as db:
+        with group_write_lock(db, group_id):
+            messages = OutboxService(db).drain_all(group_id)
+            days = SpendRollupService(db).rebuild(group_id)
+            db.commit()
+    for message in messages:
+        push_hub.publish(group_id, message)
+    return days
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--group", type=int, help="only this group")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    group_ids = [args.group] if args.group is not None else all_group_ids()
+    logger.info("rebuilding spend rollups for %d groups", len(group_ids))
+    
+    failed = 0
+    days = 0
+    start = time.perf_counter()
+    for group_id in group_ids:
+        try:
+            days += rebuild_group(group_id)
+        except Exception as e:
+            failed += 1
+            logger.error("group %s: %s", group_id, getattr(e, "detail", e))
+    
+    logger.info("rebuilt %d group days for %d groups in %.1fs, %d failed", days, len(group_ids) - failed, time.perf_counter() - start, failed)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
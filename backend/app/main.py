@@ -1,19 +1,82 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.admission import AdmissionControlMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.db_pool import pool_metric_families, pool_status
+from app.core.db_routing import ReadYourWritesMiddleware
+from app.core.llm_client import close_llm_client, llm_configured, stream_metrics
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.profiling import ProfilingMiddleware
+from app.core.push import push_database_url, push_hub
+from app.core.readiness import ReadinessProbe
 from app.api.v1.api import api_router
-from app.database import engine, Base
-import uvicorn
+from app.jobs.outbox_worker import OutboxWorker
+from app.jobs.precompute_insights import latest_run_status
+from app.services.llm_service import insights_cache
+from app.services.chat_intents import intent_metrics
+from app.services.outbox_service import OutboxService
+from app.database import async_engine, create_tables, engine, get_db, read_router, Base
+import logging
+import time
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+# Importing the app must not touch the database: schema changes are applied with
+# `alembic upgrade head` (or DB_CREATE_TABLES at startup), and /health/ready holds
+# traffic back until the primary answers and the tables exist.
+outbox_worker = OutboxWorker()
+readiness = ReadinessProbe(engine, Base.metadata)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_CREATE_TABLES:
+        try:
+            await run_in_threadpool(create_tables)
+        except SQLAlchemyError:
+            # Stay up and not ready; the readiness probe reports the missing tables
+            logger.exception("creating tables failed")
+    await push_hub.start(push_database_url())
+    if settings.OUTBOX_WORKER_ENABLED:
+        outbox_worker.start()
+    readiness.mark_started()
+    yield
+    readiness.mark_draining()
+    if settings.OUTBOX_WORKER_ENABLED:
+        await outbox_worker.stop()
+    await push_hub.stop()
+    # Close pooled async connections while the event loop is still running
+    await async_engine.dispose()
+    for replica in read_router.replicas:
+        await replica.async_engine.dispose()
+    await close_llm_client()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
+if settings.ADMISSION_ENABLED:
+    # Inside CORS, so browsers can read the 429s and 503s
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        routes=settings.ADMISSION_ROUTES,
+        concurrency=settings.ADMISSION_ROUTE_CONCURRENCY,
+        default_concurrency=settings.ADMISSION_DEFAULT_CONCURRENCY,
+        max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+        queue_seconds={"high": settings.ADMISSION_HIGH_QUEUE_SECONDS, "low": settings.ADMISSION_LOW_QUEUE_SECONDS},
+        rate_per_minute={"high": settings.ADMISSION_HIGH_RATE_PER_MINUTE, "low": settings.ADMISSION_LOW_RATE_PER_MINUTE},
+        burst=settings.ADMISSION_BURST
+    )
+
 # Set up CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +86,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        encodings=settings.COMPRESSION_ENCODINGS,
+        content_types=settings.COMPRESSION_CONTENT_TYPES,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
+    )
+
+if settings.DATABASE_REPLICA_URLS:
+    app.add_middleware(ReadYourWritesMiddleware, window_seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=settings.PROFILING_OUTPUT_DIR,
+        admin_token=settings.PROFILING_ADMIN_TOKEN,
+        routes=settings.PROFILING_ROUTES,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        interval=settings.PROFILING_INTERVAL_SECONDS,
+        output_format=settings.PROFILING_FORMAT,
+        max_concurrent=settings.PROFILING_MAX_CONCURRENT
+    )
+
+if settings.METRICS_ENABLED:
+    # Added last so it wraps everything, including CORS preflights
+    app.add_middleware(MetricsMiddleware)
+    registry.register_collector(lambda: pool_metric_families({
+        "primary": engine,
+        "primary-async": async_engine.sync_engine,
+        **{replica.name: replica.engine for replica in read_router.replicas}
+    }))
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
@@ -35,8 +132,80 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is serving requests; checks no dependencies"""
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+def readiness_check():
+    """Readiness: started, not shutting down, the primary answers and the schema is in place"""
+    ready, report = readiness.check()
+    return JSONResponse(report, status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+@app.get("/health/db")
+def database_health_check():
+    """Probe the database and report pool occupancy and checkout wait times"""
+    start = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        result = {"status": "healthy"}
+        status_code = status.HTTP_200_OK
+    except SQLAlchemyError as e:
+        result = {"status": "unhealthy", "error": str(e.__class__.__name__)}
+        status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    
+    result["probe_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    result["pool"] = pool_status(engine, settings.DB_POOL_MODE)
+    if read_router.replicas:
+        result["replicas"] = read_router.status()
+    return JSONResponse(result, status_code=status_code)
+
+@app.get("/health/llm")
+async def llm_health_check():
+    """Report LLM configuration, streaming latency and how many chat queries were answered locally"""
+    return {
+        "configured": llm_configured(),
+        "model": settings.OPENAI_MODEL,
+        "max_concurrency": settings.LLM_MAX_CONCURRENCY,
+        "streams": stream_metrics.snapshot(),
+        "local_intents": intent_metrics.snapshot()
+    }
+
+@app.get("/health/insights")
+def insights_health_check(db: Session = Depends(get_db)):
+    """Report the insights cache and the progress and throughput of the latest precompute run"""
+    return {
+        "cache": insights_cache.stats(),
+        "precompute": latest_run_status(db)
+    }
+
+@app.get("/health/outbox")
+def outbox_health_check(db: Session = Depends(get_db)):
+    """Report outbox backlog, dead-lettered events and this process's worker.
+    
+    Dead-lettered events mean some groups' balances are missing their deltas,
+    so the check fails until they are requeued.
+    """
+    events = OutboxService(db).status()
+    failing = events["dead"] > 0
+    return JSONResponse(
+        {
+            "status": "failing" if failing else "healthy",
+            "events": events,
+            "worker": outbox_worker.snapshot() if settings.OUTBOX_WORKER_ENABLED else None
+        },
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE if failing else status.HTTP_200_OK
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of this worker process's metrics"""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled\n", status_code=status.HTTP_404_NOT_FOUND)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Optional main() for direct run
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    import uvicorn
+    
+    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
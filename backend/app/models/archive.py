@@ -0,0 +1,78 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Enum, ForeignKey, Index, and_, func
+from sqlalchemy.orm import foreign, relationship
+from app.database import Base
+from app.models.expense import SplitType
+
+class BalanceCheckpoint(Base):
+    """A closed period: the group's balances from every expense created before closed_before"""
+    __tablename__ = "balance_checkpoints"
+    __table_args__ = (
+        Index("ix_balance_checkpoints_group_id_closed_before", "group_id", "closed_before"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    closed_before = Column(DateTime(timezone=True), nullable=False)
+    expense_count = Column(Integer, nullable=False, default=0)  # expenses archived by this close
+    total_amount = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    entries = relationship("BalanceCheckpointEntry", back_populates="checkpoint", cascade="all, delete-orphan")
+
+class BalanceCheckpointEntry(Base):
+    """One pair's net balance at a checkpoint, stored like a Balance row"""
+    __tablename__ = "balance_checkpoint_entries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    checkpoint_id = Column(Integer, ForeignKey("balance_checkpoints.id"), nullable=False, index=True)
+    owes_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owed_to_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    amount = Column(Float, nullable=False)
+    
+    # Relationships
+    checkpoint = relationship("BalanceCheckpoint", back_populates="entries")
+
+class ArchivedExpense(Base):
+    """An expense moved out of `expenses` when its period was closed; expense_id is its original id"""
+    __tablename__ = "archived_expenses"
+    __table_args__ = (
+        Index("ix_archived_expenses_group_id_created_at", "group_id", "created_at"),
+        Index("ix_archived_expenses_checkpoint_id_expense_id", "checkpoint_id", "expense_id"),
+    )
+    
+    # Own key: SQLite may hand a deleted expense's id to a new expense
+    id = Column(Integer, primary_key=True)
+    checkpoint_id = Column(Integer, ForeignKey("balance_checkpoints.id"), nullable=False)
+    expense_id = Column(Integer, nullable=False)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    paid_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    description = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+    split_type = Column(Enum(SplitType), nullable=False)
+    category = Column(String(32))
+    created_at = Column(DateTime(timezone=True))
+    
+    # Relationships
+    splits = relationship(
+        "ArchivedExpenseSplit",
+        primaryjoin=lambda: and_(
+            ArchivedExpense.checkpoint_id == foreign(ArchivedExpenseSplit.checkpoint_id),
+            ArchivedExpense.expense_id == foreign(ArchivedExpenseSplit.expense_id)
+        ),
+        viewonly=True
+    )
+
+class ArchivedExpenseSplit(Base):
+    """A split of an archived expense, keyed to it by (checkpoint_id, expense_id)"""
+    __tablename__ = "archived_expense_splits"
+    __table_args__ = (
+        Index("ix_archived_expense_splits_checkpoint_id_expense_id", "checkpoint_id", "expense_id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    checkpoint_id = Column(Integer, ForeignKey("balance_checkpoints.id"), nullable=False)
+    expense_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    amount = Column(Float, nullable=False)
+    percentage = Column(Float)
\ No newline at end of file
@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Balance(Base):
     __tablename__ = "balances"
+    __table_args__ = (
+        # One row per directed pair; also serves lookups by group_id
+        UniqueConstraint("group_id", "owes_user_id", "owed_to_user_id", name="uq_balances_group_id_pair"),
+        Index("ix_balances_owes_user_id", "owes_user_id"),
+        Index("ix_balances_owed_to_user_id", "owed_to_user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
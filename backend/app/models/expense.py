@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Enum, ForeignKey, func
+from sqlalchemy import DDL, Column, Integer, String, DateTime, Float, Enum, ForeignKey, Index, UniqueConstraint, event, func, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -10,6 +10,16 @@ class SplitType(str, enum.Enum):
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index("ix_expenses_group_id_created_at", "group_id", "created_at"),
+        Index("ix_expenses_paid_by_user_id", "paid_by_user_id"),
+        # Covers the per-category totals without touching the table
+        Index("ix_expenses_group_id_category_amount", "group_id", "category", "amount"),
+        # Expense search on PostgreSQL; SQLite searches the expenses_fts table below
+        Index(
+            "ix_expenses_description_tsv", text("to_tsvector('simple', description)"), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
@@ -17,6 +27,7 @@ class Expense(Base):
     description = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     split_type = Column(Enum(SplitType), nullable=False)
+    category = Column(String(32))  # from app.utils.expense_categories; NULL until categorised
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -24,8 +35,37 @@ class Expense(Base):
     paid_by_user = relationship("User", back_populates="expenses_paid")
     splits = relationship("ExpenseSplit", back_populates="expense", cascade="all, delete-orphan")
 
+# Expense search on SQLite: an FTS5 index over descriptions that stores no text of its
+# own (content='expenses'), kept in step with the table by triggers. group_id is indexed
+# too so a search only ever collects the group's own matches.
+EXPENSES_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+        description, group_id, content='expenses', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts(rowid, description, group_id) VALUES (new.id, new.description, new.group_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description, group_id) VALUES ('delete', old.id, old.description, old.group_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF description, group_id ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description, group_id) VALUES ('delete', old.id, old.description, old.group_id);
+        INSERT INTO expenses_fts(rowid, description, group_id) VALUES (new.id, new.description, new.group_id);
+    END""",
+)
+
+for statement in EXPENSES_FTS_DDL:
+    event.listen(Expense.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+# Dropping expenses drops its triggers with it
+event.listen(Expense.__table__, "before_drop", DDL("DROP TABLE IF EXISTS expenses_fts").execute_if(dialect="sqlite"))
+
 class ExpenseSplit(Base):
     __tablename__ = "expense_splits"
+    __table_args__ = (
+        # Also serves lookups by expense_id
+        UniqueConstraint("expense_id", "user_id", name="uq_expense_splits_expense_id_user_id"),
+        Index("ix_expense_splits_user_id", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     expense_id = Column(Integer, ForeignKey("expenses.id"), nullable=False)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, func
+from app.database import Base
+
+class GroupInsight(Base):
+    """Generated insights for a group, tagged with the data version they were built from"""
+    __tablename__ = "group_insights"
+    
+    group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    model = Column(String, primary_key=True)
+    data_version = Column(String(32), nullable=False)
+    group_name = Column(String, nullable=False)
+    insights = Column(Text, nullable=False)
+    total_expenses = Column(Integer, nullable=False)
+    total_amount = Column(Float, nullable=False)
+    generation_ms = Column(Float)
+    generated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class InsightsPrecomputeRun(Base):
+    """Progress of one insights precompute pass; the cursor lets an interrupted run resume"""
+    __tablename__ = "insights_precompute_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="running")  # running, interrupted, completed or abandoned
+    model = Column(String, nullable=False)
+    active_since = Column(DateTime(timezone=True), nullable=False)
+    # Keyset position in (last expense time DESC, group id DESC) order
+    cursor_last_expense_at = Column(DateTime(timezone=True))
+    cursor_group_id = Column(Integer)
+    total_groups = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    generated = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    active_seconds = Column(Float, nullable=False, default=0.0)
+    last_error = Column(String)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True))
\ No newline at end of file
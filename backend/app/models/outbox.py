@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index
+from app.database import Base
+
+class OutboxEvent(Base):
+    """Side effect of a write, recorded in the write's transaction and applied in order per group"""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # Next pending event per group, and groups with pending work
+        Index("ix_outbox_events_status_group_id_id", "status", "group_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    event_type = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(16), nullable=False, default="pending")  # pending, done or dead
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    last_error = Column(String)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    processed_at = Column(DateTime(timezone=True))
\ No newline at end of file
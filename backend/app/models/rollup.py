@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Date, Float, ForeignKey, Index
+from app.database import Base
+
+class GroupDailySpend(Base):
+    """A group's expenses on one UTC day, kept current by the outbox; covers archived periods too"""
+    __tablename__ = "group_daily_spend"
+    
+    group_id = Column(Integer, ForeignKey("groups.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    expense_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+
+class UserDailySpend(Base):
+    """One member's spending in a group on one UTC day: what they paid and their share of the splits"""
+    __tablename__ = "user_daily_spend"
+    __table_args__ = (
+        # A user's series across all their groups
+        Index("ix_user_daily_spend_user_id_day", "user_id", "day"),
+    )
+    
+    group_id = Column(Integer, ForeignKey("groups.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    paid_count = Column(Integer, nullable=False, default=0)
+    paid_amount = Column(Float, nullable=False, default=0.0)
+    share_count = Column(Integer, nullable=False, default=0)
+    share_amount = Column(Float, nullable=False, default=0.0)
\ No newline at end of file
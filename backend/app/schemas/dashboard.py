@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from app.models.expense import SplitType
+
+class UserRef(BaseModel):
+    id: int
+    name: str
+
+class DashboardUser(UserRef):
+    email: str
+
+class DashboardSummary(BaseModel):
+    total_owed: float
+    total_owing: float
+    net_balance: float
+
+class DashboardGroup(DashboardSummary):
+    id: int
+    name: str
+    description: Optional[str] = None
+    member_count: int
+
+class DashboardExpense(BaseModel):
+    id: int
+    group_id: int
+    group_name: str
+    description: str
+    amount: float
+    split_type: SplitType
+    paid_by_user: UserRef
+    user_share: Optional[float] = None  # None when the user isn't in the split
+    created_at: datetime
+
+class Dashboard(BaseModel):
+    """Everything the client's home screen needs; ?fields= picks top-level sections"""
+    user: DashboardUser
+    summary: DashboardSummary
+    groups: List[DashboardGroup]
+    recent_expenses: List[DashboardExpense]
\ No newline at end of file
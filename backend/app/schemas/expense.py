@@ -49,9 +49,16 @@ class Expense(BaseModel):
     description: str
     amount: float
     split_type: SplitType
+    category: Optional[str] = None
     paid_by_user: User
     splits: List[ExpenseSplit]
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class CategoryTotal(BaseModel):
+    category: str
+    expense_count: int
+    total_amount: float
+    share: float  # of the group's total spending
\ No newline at end of file
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class BalanceCheckpointEntry(BaseModel):
+    owes_user_id: int
+    owed_to_user_id: int
+    amount: float
+    
+    class Config:
+        from_attributes = True
+
+class BalanceCheckpoint(BaseModel):
+    id: int
+    group_id: int
+    closed_before: datetime
+    expense_count: int
+    total_amount: float
+    created_at: Optional[datetime] = None
+    entries: List[BalanceCheckpointEntry] = []
+    
+    class Config:
+        from_attributes = True
+
+class BalanceRebuild(BaseModel):
+    group_id: int
+    pairs: int
\ No newline at end of file
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+from app.schemas.dashboard import UserRef
+
+class GroupSpendingPoint(BaseModel):
+    start: date  # first day of the bucket
+    expense_count: int
+    total_amount: float
+
+class MemberSpending(BaseModel):
+    user: UserRef
+    paid_count: int
+    paid_amount: float
+    share_count: int
+    share_amount: float
+
+class GroupSpending(BaseModel):
+    group_id: int
+    bucket: str
+    series: List[GroupSpendingPoint]
+    members: Optional[List[MemberSpending]] = None
+
+class UserSpendingPoint(BaseModel):
+    start: date
+    paid_count: int
+    paid_amount: float
+    share_count: int
+    share_amount: float
+
+class UserSpending(BaseModel):
+    user_id: int
+    group_id: Optional[int] = None
+    bucket: str
+    series: List[UserSpendingPoint]
\ No newline at end of file
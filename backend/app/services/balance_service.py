@@ -1,55 +1,66 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy import and_, or_, case, func, select
+from typing import Any, Iterable, List, Dict, Sequence, Tuple
 from app.models.balance import Balance
-from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group
 from app.models.user import User
 from app.schemas.balance import BalanceDetail, UserBalanceSummary, SettlementSuggestion
 from app.utils.balance_optimizer import BalanceOptimizer
 
+def _balance_rows_query(group_id: int):
+    owes_user = aliased(User)
+    owed_to_user = aliased(User)
+    return (
+        select(
+            owes_user.id,
+            owes_user.name,
+            owed_to_user.id,
+            owed_to_user.name,
+            Balance.amount
+        )
+        .select_from(Balance)
+        .join(owes_user, Balance.owes_user_id == owes_user.id)
+        .join(owed_to_user, Balance.owed_to_user_id == owed_to_user.id)
+        .where(Balance.group_id == group_id, Balance.amount > 0.01)
+    )
+
+def _shape_balance_rows(rows) -> List[Dict[str, Any]]:
+    return [
+        {
+            "owes_user": {"id": owes_id, "name": owes_name},
+            "owed_to_user": {"id": owed_to_id, "name": owed_to_name},
+            "amount": amount
+        }
+        for owes_id, owes_name, owed_to_id, owed_to_name, amount in rows
+    ]
+
 class BalanceService:
     def __init__(self, db: Session):
         self.db = db
     
-    def update_balances_for_expense(self, expense_id: int):
-        """Update balances when a new expense is added"""
-        expense = self.db.query(Expense).filter(Expense.id == expense_id).first()
-        if not expense:
-            return
-        
-        # Get all splits for this expense
-        splits = self.db.query(ExpenseSplit).filter(ExpenseSplit.expense_id == expense_id).all()
-        
-        for split in splits:
-            if split.user_id != expense.paid_by_user_id:
-                # This user owes money to the person who paid
-                self._update_balance(
-                    expense.group_id,
-                    split.user_id,  # owes
-                    expense.paid_by_user_id,  # owed to
-                    split.amount
-                )
+    @staticmethod
+    def expense_deltas(paid_by_user_id: int, splits: Iterable[Tuple[int, float]], sign: float = 1.0) -> List[List[Any]]:
+        """[owes, owed_to, amount] for every split not paid by the payer; sign=-1 reverses an expense"""
+        return [
+            [user_id, paid_by_user_id, sign * amount]
+            for user_id, amount in splits
+            if user_id != paid_by_user_id
+        ]
     
-    def remove_balances_for_expense(self, expense_id: int):
-        """Remove balance effects when an expense is deleted"""
-        expense = self.db.query(Expense).filter(Expense.id == expense_id).first()
-        if not expense:
-            return
-        
-        splits = self.db.query(ExpenseSplit).filter(ExpenseSplit.expense_id == expense_id).all()
-        
-        for split in splits:
-            if split.user_id != expense.paid_by_user_id:
-                # Reverse the balance
-                self._update_balance(
-                    expense.group_id,
-                    split.user_id,
-                    expense.paid_by_user_id,
-                    -split.amount  # Negative to reverse
-                )
+    def apply_balance_deltas(self, group_id: int, deltas: Iterable[Sequence[Any]]) -> List[List[Any]]:
+        """Net [owes, owed_to, amount] deltas into the group's balances; the caller commits under group_write_lock.
+        
+        Returns the resulting [owes, owed_to, amount] of every pair touched, amount 0 once settled.
+        """
+        pairs = {}
+        for owes_user_id, owed_to_user_id, amount in deltas:
+            pair = self._update_balance(group_id, owes_user_id, owed_to_user_id, amount)
+            pairs[frozenset(pair[:2])] = pair
+        return list(pairs.values())
     
-    def _update_balance(self, group_id: int, owes_user_id: int, owed_to_user_id: int, amount: float):
-        """Update or create balance between two users"""
+    def _update_balance(self, group_id: int, owes_user_id: int, owed_to_user_id: int, amount: float) -> List[Any]:
+        """Update or create balance between two users, returning the pair's [owes, owed_to, amount]"""
         
         # Check if balance already exists
         existing_balance = (
@@ -73,33 +84,43 @@ class BalanceService:
             .first()
         )
         
+        # Net both directions into a signed owes -> owed_to amount and keep a single row for the pair
+        net_amount = amount
         if existing_balance:
-            existing_balance.amount += amount
-            if existing_balance.amount <= 0.01:
-                self.db.delete(existing_balance)
-        elif reverse_balance:
-            # Net out against reverse balance
-            net_amount = reverse_balance.amount - amount
-            if net_amount > 0.01:
-                reverse_balance.amount = net_amount
-            elif net_amount < -0.01:
+            net_amount += existing_balance.amount
+        if reverse_balance:
+            net_amount -= reverse_balance.amount
+        
+        balance = existing_balance or reverse_balance
+        if existing_balance and reverse_balance:
+            self.db.delete(reverse_balance)
+            self.db.flush()
+        
+        if abs(net_amount) <= 0.01:
+            if balance:
+                self.db.delete(balance)
+            net_amount = 0.0
+        else:
+            if net_amount < 0:
                 # Reverse direction
-                reverse_balance.owes_user_id, reverse_balance.owed_to_user_id = reverse_balance.owed_to_user_id, reverse_balance.owes_user_id
-                reverse_balance.amount = abs(net_amount)
+                owes_user_id, owed_to_user_id = owed_to_user_id, owes_user_id
+            if balance:
+                balance.owes_user_id = owes_user_id
+                balance.owed_to_user_id = owed_to_user_id
+                balance.amount = abs(net_amount)
             else:
-                # Net zero, delete
-                self.db.delete(reverse_balance)
-        elif amount > 0.01:
-            # Create new balance
-            new_balance = Balance(
-                group_id=group_id,
-                owes_user_id=owes_user_id,
-                owed_to_user_id=owed_to_user_id,
-                amount=amount
-            )
-            self.db.add(new_balance)
+                # Create new balance
+                new_balance = Balance(
+                    group_id=group_id,
+                    owes_user_id=owes_user_id,
+                    owed_to_user_id=owed_to_user_id,
+                    amount=abs(net_amount)
+                )
+                self.db.add(new_balance)
         
-        self.db.commit()
+        # Flush rather than commit so the whole expense lands in one transaction
+        self.db.flush()
+        return [owes_user_id, owed_to_user_id, abs(net_amount)]
     
     def get_group_balances(self, group_id: int) -> List[BalanceDetail]:
         """Get all balances for a group"""
@@ -119,6 +140,10 @@ class BalanceService:
             for balance in balances
         ]
     
+    def get_group_balance_rows(self, group_id: int) -> List[Dict[str, Any]]:
+        """Get group balances as pre-shaped dicts with compact user references"""
+        return _shape_balance_rows(self.db.execute(_balance_rows_query(group_id)).all())
+    
     def get_user_balance_summary(self, user_id: int) -> UserBalanceSummary:
         """Get balance summary for a user across all groups"""
         
@@ -147,7 +172,79 @@ class BalanceService:
             net_balance=total_owed - total_owing
         )
     
+    def get_user_counterparty_rows(self, user_id: int) -> List[Tuple[str, str, float]]:
+        """(group name, counterparty name, amount) for the user's open balances.
+        
+        Signed from the user's side: positive means the counterparty owes the user.
+        """
+        counterparty = aliased(User)
+        user_is_creditor = Balance.owed_to_user_id == user_id
+        return [
+            tuple(row) for row in self.db.execute(
+                select(
+                    Group.name,
+                    counterparty.name,
+                    case((user_is_creditor, Balance.amount), else_=-Balance.amount)
+                )
+                .join(Group, Balance.group_id == Group.id)
+                .join(counterparty, counterparty.id == case(
+                    (user_is_creditor, Balance.owes_user_id), else_=Balance.owed_to_user_id
+                ))
+                .where(or_(Balance.owes_user_id == user_id, user_is_creditor), Balance.amount > 0.01)
+            )
+        ]
+    
     def get_settlement_suggestions(self, group_id: int) -> List[SettlementSuggestion]:
         """Get optimized settlement suggestions for a group"""
         balances = self.get_group_balances(group_id)
+        return BalanceOptimizer.optimize_settlements(balances)
+
+class AsyncBalanceService:
+    """Async counterpart of BalanceService for handlers running on the event loop"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_group_balances(self, group_id: int) -> List[BalanceDetail]:
+        """Get all balances for a group"""
+        result = await self.db.execute(
+            select(Balance)
+            .options(selectinload(Balance.owes_user), selectinload(Balance.owed_to_user))
+            .where(Balance.group_id == group_id, Balance.amount > 0.01)
+        )
+        
+        return [
+            BalanceDetail(
+                owes_user=balance.owes_user,
+                owed_to_user=balance.owed_to_user,
+                amount=balance.amount
+            )
+            for balance in result.scalars()
+        ]
+    
+    async def get_group_balance_rows(self, group_id: int) -> List[Dict[str, Any]]:
+        """Get group balances as pre-shaped dicts with compact user references"""
+        return _shape_balance_rows((await self.db.execute(_balance_rows_query(group_id))).all())
+    
+    async def get_user_balance_summary(self, user_id: int) -> UserBalanceSummary:
+        """Get balance summary for a user across all groups"""
+        total_owing = (await self.db.execute(
+            select(func.coalesce(func.sum(Balance.amount), 0.0)).where(Balance.owes_user_id == user_id)
+        )).scalar_one()
+        total_owed = (await self.db.execute(
+            select(func.coalesce(func.sum(Balance.amount), 0.0)).where(Balance.owed_to_user_id == user_id)
+        )).scalar_one()
+        
+        user = await self.db.get(User, user_id)
+        
+        return UserBalanceSummary(
+            user=user,
+            total_owed=total_owed,
+            total_owing=total_owing,
+            net_balance=total_owed - total_owing
+        )
+    
+    async def get_settlement_suggestions(self, group_id: int) -> List[SettlementSuggestion]:
+        """Get optimized settlement suggestions for a group"""
+        balances = await self.get_group_balances(group_id)
         return BalanceOptimizer.optimize_settlements(balances)
\ No newline at end of file
@@ -0,0 +1,251 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.services.balance_service import BalanceService
+from app.services.expense_service import ExpenseService
+from app.services.group_service import GroupService
+
+class IntentMetrics:
+    """Per-process counts of chat queries answered locally vs passed on to the LLM"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.by_intent: Dict[str, int] = {}
+            self.fallthrough = 0
+    
+    def record(self, intent: Optional[str]):
+        with self._lock:
+            if intent is None:
+                self.fallthrough += 1
+            else:
+                self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            local = sum(self.by_intent.values())
+            queries = local + self.fallthrough
+            return {
+                "queries": queries,
+                "local": local,
+                "llm": self.fallthrough,
+                "hit_rate": round(local / queries, 4) if queries else 0.0,
+                "by_intent": dict(self.by_intent)
+            }
+
+intent_metrics = IntentMetrics()
+
+# Politeness and imperative lead-ins that don't change what is being asked
+_LEAD = r"(?:(?:hey|hi|ok|so|please|can you|could you|tell me|show me|show|list|give me)\s+)*"
+_TOTAL = r"(?: in total| overall| altogether)?"
+
+def _pattern(body: str) -> "re.Pattern[str]":
+    return re.compile(rf"^{_LEAD}(?:{body})(?: please)?$")
+
+def _normalise(query: str) -> str:
+    text = query.lower().replace("’", "'").strip()
+    text = re.sub(r"[?!.]+$", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def _money(amount: float) -> str:
+    return f"${amount:,.2f}"
+
+def _find_name(wanted: str, names: List[str]) -> Optional[str]:
+    """Match a name from the query against known names: full name first, then first name"""
+    wanted = wanted.strip().lower()
+    for name in names:
+        if name.lower() == wanted:
+            return name
+    first_names = [name for name in names if name.lower().split(" ")[0] == wanted]
+    return first_names[0] if len(set(first_names)) == 1 else None
+
+class LocalIntentEngine:
+    """Answers the common chat questions straight from the services, without the LLM"""
+    
+    # Checked in order; a handler returning None (e.g. unknown name) lets later intents try
+    INTENTS = [
+        ("total_owing", _pattern(
+            rf"how much (?:money )?(?:do )?i owe(?: (?:everyone|people|others))?{_TOTAL}|what do i owe{_TOTAL}"
+            r"|who do i owe(?: money)?|what(?: is|'s) my (?:total )?debt"
+        )),
+        ("total_owed", _pattern(
+            rf"how much (?:money )?(?:am i owed|do (?:people|others|they) owe me|is owed to me){_TOTAL}"
+            r"|who owes me(?: money)?"
+        )),
+        ("net_balance", _pattern(
+            r"what(?: is|'s) my (?:net |overall |total |current )?balance|my (?:net |overall )?balance"
+            r"|am i (?:all )?settled(?: up)?"
+        )),
+        ("person_owes_me", _pattern(rf"how much (?:money )?does (?P<name>[\w .'-]+?) owe me{_TOTAL}")),
+        ("owe_person", _pattern(rf"how much (?:money )?(?:do )?i owe (?P<name>[\w .'-]+?){_TOTAL}")),
+        ("recent_expenses", _pattern(
+            r"(?:what (?:were|are|have been) )?(?:my )?(?:most )?(?:recent|latest|last)(?: (?P<count>\d+))? expenses"
+        )),
+        ("group_expenses", _pattern(r"(?:the )?expenses (?:from|in|for) (?:the |my )?(?P<group>.+?)(?: group)?")),
+        ("top_payer", _pattern(
+            r"who (?:has )?paid (?:the )?most(?: in (?:all )?(?:my groups|(?:the |my )?(?P<group>.+?)(?: group)?))?"
+        )),
+        ("my_groups", _pattern(r"(?:what|which) groups am i (?:in|a member of)|(?:what are )?my groups")),
+    ]
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.balance_service = BalanceService(db)
+        self.expense_service = ExpenseService(db)
+        self.group_service = GroupService(db)
+    
+    def resolve(self, query: str, user_id: int) -> Tuple[Optional[str], Optional[str]]:
+        """(intent, answer), or (None, None) when the query should go to the LLM.
+        
+        An unknown user is left to the LLM path too, which already answers for
+        users without data; the handlers assume the user exists.
+        """
+        text = _normalise(query)
+        user_checked = False
+        for intent, pattern in self.INTENTS:
+            match = pattern.match(text)
+            if not match:
+                continue
+            if not user_checked:
+                if self.db.execute(select(User.id).where(User.id == user_id)).first() is None:
+                    break
+                user_checked = True
+            answer = getattr(self, f"_answer_{intent}")(user_id, **match.groupdict())
+            if answer is not None:
+                intent_metrics.record(intent)
+                return intent, answer
+        
+        intent_metrics.record(None)
+        return None, None
+    
+    def _answer_total_owing(self, user_id: int) -> str:
+        summary = self.balance_service.get_user_balance_summary(user_id)
+        debts = sorted(
+            (row for row in self.balance_service.get_user_counterparty_rows(user_id) if row[2] < 0),
+            key=lambda row: row[2]
+        )
+        if not debts:
+            return "You don't owe anyone anything right now."
+        breakdown = ", ".join(f"{_money(-amount)} to {name} ({group})" for group, name, amount in debts[:5])
+        more = f" and {len(debts) - 5} more" if len(debts) > 5 else ""
+        return f"You owe {_money(summary.total_owing)} in total: {breakdown}{more}."
+    
+    def _answer_total_owed(self, user_id: int) -> str:
+        summary = self.balance_service.get_user_balance_summary(user_id)
+        credits = sorted(
+            (row for row in self.balance_service.get_user_counterparty_rows(user_id) if row[2] > 0),
+            key=lambda row: -row[2]
+        )
+        if not credits:
+            return "Nobody owes you anything right now."
+        breakdown = ", ".join(f"{name} owes {_money(amount)} ({group})" for group, name, amount in credits[:5])
+        more = f" and {len(credits) - 5} more" if len(credits) > 5 else ""
+        return f"You are owed {_money(summary.total_owed)} in total: {breakdown}{more}."
+    
+    def _answer_net_balance(self, user_id: int) -> str:
+        summary = self.balance_service.get_user_balance_summary(user_id)
+        if abs(summary.net_balance) <= 0.01 and summary.total_owed <= 0.01:
+            return "You're all settled up."
+        direction = "in your favour" if summary.net_balance >= 0 else "against you"
+        return (
+            f"Your net balance is {_money(abs(summary.net_balance))} {direction}: "
+            f"others owe you {_money(summary.total_owed)} and you owe {_money(summary.total_owing)}."
+        )
+    
+    def _person_balance(self, user_id: int, name: str) -> Optional[Tuple[str, float, int]]:
+        rows = self.balance_service.get_user_counterparty_rows(user_id)
+        person = _find_name(name, [counterparty for _, counterparty, _ in rows])
+        if person is None:
+            return None
+        amounts = [amount for _, counterparty, amount in rows if counterparty == person]
+        return person, sum(amounts), len(amounts)
+    
+    def _answer_person_owes_me(self, user_id: int, name: str) -> Optional[str]:
+        found = self._person_balance(user_id, name)
+        if found is None:
+            return None
+        person, net, groups = found
+        across = f" across {groups} groups" if groups > 1 else ""
+        if net > 0.01:
+            return f"{person} owes you {_money(net)}{across}."
+        if net < -0.01:
+            return f"{person} doesn't owe you anything; you owe {person} {_money(-net)}{across}."
+        return f"You and {person} are settled up."
+    
+    def _answer_owe_person(self, user_id: int, name: str) -> Optional[str]:
+        found = self._person_balance(user_id, name)
+        if found is None:
+            return None
+        person, net, groups = found
+        across = f" across {groups} groups" if groups > 1 else ""
+        if net < -0.01:
+            return f"You owe {person} {_money(-net)}{across}."
+        if net > 0.01:
+            return f"You don't owe {person} anything; {person} owes you {_money(net)}{across}."
+        return f"You and {person} are settled up."
+    
+    def _answer_recent_expenses(self, user_id: int, count: Optional[str] = None) -> str:
+        rows = self.expense_service.get_user_recent_expense_rows(user_id, min(int(count or 5), 20))
+        if not rows:
+            return "You don't have any expenses yet."
+        lines = [
+            f"- {created_at:%Y-%m-%d} {description} ({group}): {_money(amount)} paid by {payer}"
+            + (f", your share {_money(share)}" if share is not None else "")
+            for created_at, group, description, amount, payer, share in rows
+        ]
+        return "Your recent expenses:\n" + "\n".join(lines)
+    
+    def _answer_group_expenses(self, user_id: int, group: str) -> Optional[str]:
+        groups = self.group_service.get_user_group_rows(user_id)
+        name = _find_name(group, [group_name for _, group_name, _ in groups])
+        if name is None:
+            return None
+        group_id = next(group_id for group_id, group_name, _ in groups if group_name == name)
+        rows = self.expense_service.get_group_expense_rows(group_id, include_splits=False, limit=10)
+        if not rows:
+            return f"There are no expenses in {name} yet."
+        lines = [
+            f"- {row['created_at']:%Y-%m-%d} {row['description']}: {_money(row['amount'])} "
+            f"paid by {row['paid_by_user']['name']}"
+            for row in rows
+        ]
+        return f"Latest expenses in {name}:\n" + "\n".join(lines)
+    
+    def _answer_top_payer(self, user_id: int, group: Optional[str] = None) -> Optional[str]:
+        totals = self.expense_service.get_user_payer_totals(user_id)
+        scope = "your groups"
+        if group:
+            name = _find_name(group, list({group_name for group_name, _, _, _ in totals}))
+            if name is None:
+                return None
+            totals = [row for row in totals if row[0] == name]
+            scope = name
+        
+        by_payer: Dict[str, List[float]] = {}
+        for _, payer, total, count in totals:
+            paid = by_payer.setdefault(payer, [0.0, 0])
+            paid[0] += total
+            paid[1] += count
+        if not by_payer:
+            return f"Nobody has paid for anything in {scope} yet."
+        
+        ranked = sorted(by_payer.items(), key=lambda item: -item[1][0])
+        payer, (total, count) = ranked[0]
+        answer = f"{payer} paid the most in {scope}: {_money(total)} over {count} expense{'s' if count != 1 else ''}."
+        if len(ranked) > 1:
+            runner_up, (runner_up_total, _) = ranked[1]
+            answer += f" Next is {runner_up} with {_money(runner_up_total)}."
+        return answer
+    
+    def _answer_my_groups(self, user_id: int) -> str:
+        groups = self.group_service.get_user_group_rows(user_id)
+        if not groups:
+            return "You're not in any groups yet."
+        listed = ", ".join(f"{name} ({members} members)" for _, name, members in groups)
+        return f"You're in {len(groups)} group{'s' if len(groups) != 1 else ''}: {listed}."
\ No newline at end of file
@@ -0,0 +1,146 @@
+import hashlib
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.exceptions import UserNotFound
+from app.models.balance import Balance
+from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group, GroupMember
+from app.models.user import User
+from app.schemas.dashboard import Dashboard
+
+SECTIONS = tuple(Dashboard.model_fields)
+
+def _user_group_ids(user_id: int):
+    return select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+
+def _version_query(user_id: int):
+    """Fingerprint of everything on the user's dashboard, in one query"""
+    user_groups = _user_group_ids(user_id)
+    involves_user = or_(Balance.owes_user_id == user_id, Balance.owed_to_user_id == user_id)
+    return select(*(
+        query.scalar_subquery() for query in (
+            select(User.id).where(User.id == user_id),
+            select(User.updated_at).where(User.id == user_id),
+            select(func.max(Group.updated_at)).where(Group.id.in_(user_groups)),
+            select(func.count(GroupMember.id)).where(GroupMember.group_id.in_(user_groups)),
+            select(func.max(GroupMember.id)).where(GroupMember.group_id.in_(user_groups)),
+            # Renamed members show up in the payer names
+            select(func.max(User.updated_at)).join(GroupMember, GroupMember.user_id == User.id).where(GroupMember.group_id.in_(user_groups)),
+            select(func.count(Expense.id)).where(Expense.group_id.in_(user_groups)),
+            select(func.max(Expense.id)).where(Expense.group_id.in_(user_groups)),
+            select(func.sum(Expense.amount)).where(Expense.group_id.in_(user_groups)),
+            select(func.count(Balance.id)).where(involves_user),
+            select(func.max(Balance.updated_at)).where(involves_user),
+            select(func.sum(Balance.amount)).where(involves_user)
+        )
+    ))
+
+class AsyncDashboardService:
+    """The user's home screen in a fixed handful of batched queries, whatever their number of groups"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_etag(self, user_id: int, sections: Iterable[str], recent: int) -> str:
+        """Strong ETag for the dashboard as requested; changes whenever any section's data does"""
+        version = (await self.db.execute(_version_query(user_id))).one()
+        if version[0] is None:
+            raise UserNotFound(user_id)
+        key = repr((tuple(version), sorted(sections), recent)).encode()
+        return f'"{hashlib.sha1(key).hexdigest()}"'
+    
+    async def get_dashboard(self, user_id: int, sections: Optional[Iterable[str]] = None, recent: int = 10) -> Dict[str, Any]:
+        """The requested top-level sections (all by default) as plain dicts, ready for ORJSONResponse"""
+        sections = set(SECTIONS if sections is None else sections)
+        dashboard: Dict[str, Any] = {}
+        
+        if "user" in sections:
+            row = (await self.db.execute(select(User.id, User.name, User.email).where(User.id == user_id))).first()
+            if row is None:
+                raise UserNotFound(user_id)
+            dashboard["user"] = {"id": row.id, "name": row.name, "email": row.email}
+        
+        if sections & {"summary", "groups"}:
+            positions = await self._group_positions(user_id)
+            if "summary" in sections:
+                total_owed = sum(owed for owed, _ in positions.values())
+                total_owing = sum(owing for _, owing in positions.values())
+                dashboard["summary"] = {"total_owed": total_owed, "total_owing": total_owing, "net_balance": total_owed - total_owing}
+            if "groups" in sections:
+                dashboard["groups"] = await self._groups(user_id, positions)
+        
+        if "recent_expenses" in sections:
+            dashboard["recent_expenses"] = await self._recent_expenses(user_id, recent) if recent > 0 else []
+        return dashboard
+    
+    async def _group_positions(self, user_id: int) -> Dict[int, tuple]:
+        """(owed to the user, owed by the user) per group, over every balance the user is part of"""
+        rows = await self.db.execute(
+            select(
+                Balance.group_id,
+                func.sum(case((Balance.owed_to_user_id == user_id, Balance.amount), else_=0.0)),
+                func.sum(case((Balance.owes_user_id == user_id, Balance.amount), else_=0.0))
+            )
+            .where(or_(Balance.owes_user_id == user_id, Balance.owed_to_user_id == user_id))
+            .group_by(Balance.group_id)
+        )
+        return {group_id: (owed, owing) for group_id, owed, owing in rows}
+    
+    async def _groups(self, user_id: int, positions: Dict[int, tuple]):
+        rows = await self.db.execute(
+            select(Group.id, Group.name, Group.description, func.count(GroupMember.id))
+            .join(GroupMember, GroupMember.group_id == Group.id)
+            .where(Group.id.in_(_user_group_ids(user_id)))
+            .group_by(Group.id, Group.name, Group.description)
+            .order_by(Group.id)
+        )
+        groups = []
+        for group_id, name, description, member_count in rows:
+            owed, owing = positions.get(group_id, (0.0, 0.0))
+            groups.append({
+                "id": group_id,
+                "name": name,
+                "description": description,
+                "member_count": member_count,
+                "total_owed": owed,
+                "total_owing": owing,
+                "net_balance": owed - owing
+            })
+        return groups
+    
+    async def _recent_expenses(self, user_id: int, limit: int):
+        rows = await self.db.execute(
+            select(
+                Expense.id,
+                Expense.group_id,
+                Group.name,
+                Expense.description,
+                Expense.amount,
+                Expense.split_type,
+                User.id,
+                User.name,
+                ExpenseSplit.amount,
+                Expense.created_at
+            )
+            .join(Group, Expense.group_id == Group.id)
+            .join(User, Expense.paid_by_user_id == User.id)
+            .outerjoin(ExpenseSplit, and_(ExpenseSplit.expense_id == Expense.id, ExpenseSplit.user_id == user_id))
+            .where(Expense.group_id.in_(_user_group_ids(user_id)))
+            .order_by(Expense.created_at.desc(), Expense.id.desc())
+            .limit(limit)
+        )
+        return [
+            {
+                "id": expense_id,
+                "group_id": group_id,
+                "group_name": group_name,
+                "description": description,
+                "amount": amount,
+                "split_type": split_type.value,
+                "paid_by_user": {"id": payer_id, "name": payer_name},
+                "user_share": share,
+                "created_at": created_at
+            }
+            for expense_id, group_id, group_name, description, amount, split_type, payer_id, payer_name, share, created_at in rows
+        ]
\ No newline at end of file
@@ -1,18 +1,142 @@
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timezone
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import Any, Dict, List, Optional, Tuple
 from app.models.expense import Expense, ExpenseSplit
 from app.models.group import Group, GroupMember
+from app.models.user import User
 from app.schemas.expense import ExpenseCreate
-from app.services.balance_service import BalanceService
+from app.services.balance_service import AsyncBalanceService, BalanceService
+from app.services.spend_rollup_service import rollup_payload
+from app.services.outbox_service import CONSISTENCY_MODES, EXPENSE_CREATED, EXPENSE_DELETED, OutboxService, expense_event, notify_enqueued
+from app.utils.expense_categories import UNCATEGORISED, categorise
+from app.utils.expense_search import apply_search, search_terms
 from app.utils.split_calculator import SplitCalculator
 from app.core.exceptions import GroupNotFound, UserNotFound, InvalidSplitException
+from app.core.group_locks import async_group_write_lock, group_write_lock
+from app.core.push import EXPENSE_ADDED, EXPENSE_DELETED as EXPENSE_DELETED_MESSAGE, push_hub
+
+# Everything the Expense schema serialises, loaded up front (async sessions can't lazy-load)
+EXPENSE_LOAD_OPTIONS = (
+    selectinload(Expense.paid_by_user),
+    selectinload(Expense.splits).selectinload(ExpenseSplit.user),
+)
+
+def _expense_row_columns():
+    return (
+        select(
+            Expense.id,
+            Expense.description,
+            Expense.amount,
+            Expense.split_type,
+            Expense.category,
+            Expense.created_at,
+            User.id,
+            User.name
+        )
+        .join(User, Expense.paid_by_user_id == User.id)
+    )
+
+def _expense_rows_query(group_id: int, limit: Optional[int] = None):
+    query = _expense_row_columns().where(Expense.group_id == group_id).order_by(Expense.created_at.desc())
+    return query.limit(limit) if limit is not None else query
+
+def _expense_search_query(dialect: str, group_id: int, terms: List[str], limit: int):
+    return apply_search(_expense_row_columns(), dialect, group_id, terms).limit(limit)
+
+def _split_rows_query(group_id: int, expense_ids: Optional[List[int]] = None):
+    # One query for the splits instead of a lazy load per expense; a limited page
+    # only loads its own expenses' splits rather than the whole group's
+    query = (
+        select(
+            ExpenseSplit.id,
+            ExpenseSplit.expense_id,
+            ExpenseSplit.amount,
+            ExpenseSplit.percentage,
+            User.id,
+            User.name
+        )
+        .join(User, ExpenseSplit.user_id == User.id)
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .where(Expense.group_id == group_id)
+        .order_by(ExpenseSplit.id)
+    )
+    return query.where(ExpenseSplit.expense_id.in_(expense_ids)) if expense_ids is not None else query
+
+def _category_totals_query(group_id: int):
+    return (
+        select(Expense.category, func.count(Expense.id), func.sum(Expense.amount))
+        .where(Expense.group_id == group_id)
+        .group_by(Expense.category)
+    )
+
+def _shape_category_totals(rows) -> List[Dict[str, Any]]:
+    """Category rows, largest total first, each with its fraction of the group's spending"""
+    grand_total = sum(total for _, _, total in rows) or 1.0
+    totals = [
+        {
+            "category": category or UNCATEGORISED,
+            "expense_count": count,
+            "total_amount": total,
+            "share": round(total / grand_total, 4)
+        }
+        for category, count, total in rows
+    ]
+    totals.sort(key=lambda row: (-row["total_amount"], row["category"]))
+    return totals
+
+def _check_consistency(consistency: str):
+    if consistency not in CONSISTENCY_MODES:
+        raise ValueError(f"consistency must be one of {CONSISTENCY_MODES}, not {consistency!r}")
+
+def _created_event(expense: Expense, splits: List[ExpenseSplit]):
+    shares = [(split.user_id, split.amount) for split in splits]
+    deltas = BalanceService.expense_deltas(expense.paid_by_user_id, shares)
+    rollup = rollup_payload(expense.created_at, expense.amount, expense.paid_by_user_id, shares)
+    return expense_event(EXPENSE_CREATED, expense.group_id, expense.id, deltas, rollup)
+
+def _deleted_event(expense: Expense, splits: List[Tuple[int, float]]):
+    deltas = BalanceService.expense_deltas(expense.paid_by_user_id, splits, sign=-1.0)
+    rollup = rollup_payload(expense.created_at, expense.amount, expense.paid_by_user_id, splits)
+    return expense_event(EXPENSE_DELETED, expense.group_id, expense.id, deltas, rollup)
+
+def _expense_added_message(expense: Expense, splits: List[Tuple[int, float]]) -> Dict[str, Any]:
+    return {
+        "type": EXPENSE_ADDED,
+        "expense": {
+            "id": expense.id,
+            "description": expense.description,
+            "amount": expense.amount,
+            "split_type": expense.split_type.value,
+            "paid_by_user_id": expense.paid_by_user_id,
+            "created_at": expense.created_at,
+            "splits": [[user_id, amount] for user_id, amount in splits]
+        }
+    }
+
+def _publish(group_id: int, message: Dict[str, Any], derived: List[Dict[str, Any]]):
+    # After the commit, so subscribers never hear about a write that rolled back
+    push_hub.publish(group_id, message)
+    for derived_message in derived:
+        push_hub.publish(group_id, derived_message)
+
+def _expense_exists_query(expense_id: int):
+    return select(Expense.id).where(Expense.id == expense_id)
+
+def _split_amounts_query(expense_id: int):
+    return select(ExpenseSplit.user_id, ExpenseSplit.amount).where(ExpenseSplit.expense_id == expense_id)
 
 class ExpenseService:
     def __init__(self, db: Session):
         self.db = db
         self.balance_service = BalanceService(db)
+        self.outbox = OutboxService(db)
     
-    def create_expense(self, group_id: int, expense_data: ExpenseCreate) -> Expense:
+    def create_expense(self, group_id: int, expense_data: ExpenseCreate, consistency: str = "sync") -> Expense:
+        """Create an expense; balances follow from its outbox event, now ("sync") or via the worker ("eventual")"""
+        _check_consistency(consistency)
+        
         # Verify group exists
         group = self.db.query(Group).filter(Group.id == group_id).first()
         if not group:
@@ -24,6 +148,43 @@ class ExpenseService:
             self.db.query(GroupMember).filter(GroupMember.group_id == group_id).all()
         ]
         
+        split_amounts = self._calculate_split_amounts(expense_data, member_ids)
+        
+        # Expense, splits and balances commit together while holding the group's write lock
+        with group_write_lock(self.db, group_id):
+            # Create expense
+            db_expense = Expense(
+                group_id=group_id,
+                paid_by_user_id=expense_data.paid_by_user_id,
+                description=expense_data.description,
+                amount=expense_data.amount,
+                split_type=expense_data.split_type,
+                category=categorise(expense_data.description),
+                # Set here rather than by the database so the outbox event can carry the day it rolls up under
+                created_at=datetime.now(timezone.utc)
+            )
+            self.db.add(db_expense)
+            self.db.flush()
+            
+            # Create splits
+            splits = self._build_splits(db_expense.id, split_amounts, expense_data)
+            self.db.add_all(splits)
+            
+            # Balance updates are recorded in the same transaction
+            self.db.add(_created_event(db_expense, splits))
+            split_pairs = [(split.user_id, split.amount) for split in splits]
+            derived = self.outbox.drain_pending(group_id) if consistency == "sync" else []
+            
+            self.db.commit()
+        
+        if consistency == "eventual":
+            notify_enqueued(group_id)
+        self.db.refresh(db_expense)
+        _publish(group_id, _expense_added_message(db_expense, split_pairs), derived)
+        return db_expense
+    
+    @staticmethod
+    def _calculate_split_amounts(expense_data: ExpenseCreate, member_ids: List[int]) -> Dict[int, float]:
         # Verify payer is in group
         if expense_data.paid_by_user_id not in member_ids:
             raise InvalidSplitException("Payer must be a member of the group")
@@ -44,38 +205,23 @@ class ExpenseService:
                     f"Split total ({total_split}) doesn't match expense amount ({expense_data.amount})"
                 )
         
-        # Create expense
-        db_expense = Expense(
-            group_id=group_id,
-            paid_by_user_id=expense_data.paid_by_user_id,
-            description=expense_data.description,
-            amount=expense_data.amount,
-            split_type=expense_data.split_type
-        )
-        self.db.add(db_expense)
-        self.db.flush()
-        
-        # Create splits
-        for user_id, amount in split_amounts.items():
-            if amount > 0:  # Only create splits for non-zero amounts
-                split = ExpenseSplit(
-                    expense_id=db_expense.id,
-                    user_id=user_id,
-                    amount=amount,
-                    percentage=next(
-                        (s.percentage for s in expense_data.splits if s.user_id == user_id),
-                        None
-                    )
+        return split_amounts
+    
+    @staticmethod
+    def _build_splits(expense_id: int, split_amounts: Dict[int, float], expense_data: ExpenseCreate) -> List[ExpenseSplit]:
+        return [
+            ExpenseSplit(
+                expense_id=expense_id,
+                user_id=user_id,
+                amount=amount,
+                percentage=next(
+                    (s.percentage for s in expense_data.splits if s.user_id == user_id),
+                    None
                 )
-                self.db.add(split)
-        
-        self.db.commit()
-        
-        # Update balances
-        self.balance_service.update_balances_for_expense(db_expense.id)
-        
-        self.db.refresh(db_expense)
-        return db_expense
+            )
+            for user_id, amount in split_amounts.items()
+            if amount > 0  # Only create splits for non-zero amounts
+        ]
     
     def get_group_expenses(self, group_id: int) -> List[Expense]:
         return (
@@ -85,6 +231,58 @@ class ExpenseService:
             .all()
         )
     
+    def get_group_expense_rows(self, group_id: int, include_splits: bool = True, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get group expenses as pre-shaped dicts with compact user references"""
+        expenses = self.db.execute(_expense_rows_query(group_id, limit)).all()
+        page_ids = [row[0] for row in expenses] if limit is not None else None
+        splits = self.db.execute(_split_rows_query(group_id, page_ids)).all() if include_splits and expenses else []
+        return self._shape_expense_rows(expenses, splits, include_splits)
+    
+    def get_group_category_totals(self, group_id: int) -> List[Dict[str, Any]]:
+        """Spending per category over the group's live expenses, aggregated in SQL"""
+        return _shape_category_totals(self.db.execute(_category_totals_query(group_id)).all())
+    
+    def search_group_expense_rows(self, group_id: int, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Live expenses of a group whose description contains every word of the query (as a prefix), newest first"""
+        if not self.db.get(Group, group_id):
+            raise GroupNotFound(group_id)
+        terms = search_terms(query)
+        if not terms:
+            return []
+        search = _expense_search_query(self.db.get_bind().dialect.name, group_id, terms, limit)
+        return self._shape_expense_rows(self.db.execute(search).all(), [], include_splits=False)
+    
+    @staticmethod
+    def _shape_expense_rows(expenses, splits, include_splits: bool) -> List[Dict[str, Any]]:
+        rows = []
+        rows_by_id = {}
+        for expense_id, description, amount, split_type, category, created_at, payer_id, payer_name in expenses:
+            row = {
+                "id": expense_id,
+                "description": description,
+                "amount": amount,
+                "split_type": split_type.value,
+                "category": category,
+                "paid_by_user": {"id": payer_id, "name": payer_name},
+                "created_at": created_at
+            }
+            if include_splits:
+                row["splits"] = []
+            rows.append(row)
+            rows_by_id[expense_id] = row
+        
+        for split_id, expense_id, amount, percentage, user_id, user_name in splits:
+            if expense_id not in rows_by_id:
+                continue  # expense committed after the expense query ran
+            rows_by_id[expense_id]["splits"].append({
+                "id": split_id,
+                "user": {"id": user_id, "name": user_name},
+                "amount": amount,
+                "percentage": percentage
+            })
+        
+        return rows
+    
     def get_user_expenses(self, user_id: int) -> List[Expense]:
         return (
             self.db.query(Expense)
@@ -93,16 +291,189 @@ class ExpenseService:
             .all()
         )
     
-    def delete_expense(self, expense_id: int) -> bool:
+    def get_user_recent_expense_rows(self, user_id: int, limit: int) -> List[tuple]:
+        """(created_at, group name, description, amount, payer name, user's share) across the user's groups"""
+        user_group_ids = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        return [
+            tuple(row) for row in self.db.execute(
+                select(
+                    Expense.created_at,
+                    Group.name,
+                    Expense.description,
+                    Expense.amount,
+                    User.name,
+                    ExpenseSplit.amount
+                )
+                .join(Group, Expense.group_id == Group.id)
+                .join(User, Expense.paid_by_user_id == User.id)
+                .outerjoin(ExpenseSplit, and_(ExpenseSplit.expense_id == Expense.id, ExpenseSplit.user_id == user_id))
+                .where(Expense.group_id.in_(user_group_ids))
+                .order_by(Expense.created_at.desc())
+                .limit(limit)
+            )
+        ]
+    
+    def get_user_payer_totals(self, user_id: int) -> List[Tuple[str, str, float, int]]:
+        """(group name, payer name, total paid, expense count) across the user's groups"""
+        user_group_ids = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        return [
+            tuple(row) for row in self.db.execute(
+                select(Group.name, User.name, func.sum(Expense.amount), func.count(Expense.id))
+                .join(Group, Expense.group_id == Group.id)
+                .join(User, Expense.paid_by_user_id == User.id)
+                .where(Expense.group_id.in_(user_group_ids))
+                .group_by(Group.name, User.name)
+            )
+        ]
+    
+    def delete_expense(self, expense_id: int, consistency: str = "sync") -> bool:
+        _check_consistency(consistency)
         expense = self.db.query(Expense).filter(Expense.id == expense_id).first()
         if not expense:
             return False
         
-        # Delete associated balances first
-        self.balance_service.remove_balances_for_expense(expense_id)
+        group_id = expense.group_id
+        with group_write_lock(self.db, group_id):
+            if not self.db.execute(_expense_exists_query(expense_id)).first():
+                # Deleted or archived by a period close while we waited for the lock
+                self.db.rollback()
+                return False
+            
+            # Record the reversal before the splits go
+            self.db.add(_deleted_event(expense, self.db.execute(_split_amounts_query(expense_id)).all()))
+            
+            # Delete expense (splits will be cascade deleted)
+            self.db.delete(expense)
+            derived = self.outbox.drain_pending(group_id) if consistency == "sync" else []
+            self.db.commit()
+        
+        if consistency == "eventual":
+            notify_enqueued(group_id)
+        _publish(group_id, {"type": EXPENSE_DELETED_MESSAGE, "expense_id": expense_id}, derived)
+        return True
+
+class AsyncExpenseService:
+    """Async counterpart of ExpenseService for handlers running on the event loop"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.balance_service = AsyncBalanceService(db)
+    
+    async def create_expense(self, group_id: int, expense_data: ExpenseCreate, consistency: str = "sync") -> Expense:
+        _check_consistency(consistency)
+        group = await self.db.get(Group, group_id)
+        if not group:
+            raise GroupNotFound(group_id)
+        
+        member_ids = list(
+            (await self.db.execute(
+                select(GroupMember.user_id).where(GroupMember.group_id == group_id)
+            )).scalars()
+        )
+        
+        split_amounts = ExpenseService._calculate_split_amounts(expense_data, member_ids)
+        
+        async with async_group_write_lock(self.db, group_id):
+            db_expense = Expense(
+                group_id=group_id,
+                paid_by_user_id=expense_data.paid_by_user_id,
+                description=expense_data.description,
+                amount=expense_data.amount,
+                split_type=expense_data.split_type,
+                category=categorise(expense_data.description),
+                created_at=datetime.now(timezone.utc)
+            )
+            self.db.add(db_expense)
+            await self.db.flush()
+            
+            splits = ExpenseService._build_splits(db_expense.id, split_amounts, expense_data)
+            self.db.add_all(splits)
+            
+            self.db.add(_created_event(db_expense, splits))
+            derived = await self._drain_outbox(group_id) if consistency == "sync" else []
+            
+            await self.db.commit()
+        
+        if consistency == "eventual":
+            notify_enqueued(group_id)
+        created = await self.get_expense(db_expense.id)
+        _publish(group_id, _expense_added_message(created, [(split.user_id, split.amount) for split in created.splits]), derived)
+        return created
+    
+    async def _drain_outbox(self, group_id: int) -> List[Dict[str, Any]]:
+        # The outbox handlers are sync; run_sync gives them this session's connection and transaction
+        return await self.db.run_sync(lambda session: OutboxService(session).drain_pending(group_id))
+    
+    async def get_expense(self, expense_id: int) -> Optional[Expense]:
+        result = await self.db.execute(
+            select(Expense)
+            .options(*EXPENSE_LOAD_OPTIONS)
+            .where(Expense.id == expense_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_group_expenses(self, group_id: int, limit: Optional[int] = None) -> List[Expense]:
+        query = (
+            select(Expense)
+            .options(*EXPENSE_LOAD_OPTIONS)
+            .where(Expense.group_id == group_id)
+            .order_by(Expense.created_at.desc())
+        )
+        result = await self.db.execute(query.limit(limit) if limit is not None else query)
+        return list(result.scalars())
+    
+    async def get_group_expense_rows(self, group_id: int, include_splits: bool = True, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get group expenses as pre-shaped dicts with compact user references"""
+        expenses = (await self.db.execute(_expense_rows_query(group_id, limit))).all()
+        page_ids = [row[0] for row in expenses] if limit is not None else None
+        splits = (await self.db.execute(_split_rows_query(group_id, page_ids))).all() if include_splits and expenses else []
+        return ExpenseService._shape_expense_rows(expenses, splits, include_splits)
+    
+    async def get_group_category_totals(self, group_id: int) -> List[Dict[str, Any]]:
+        if not await self.db.get(Group, group_id):
+            raise GroupNotFound(group_id)
+        return _shape_category_totals((await self.db.execute(_category_totals_query(group_id))).all())
+    
+    async def search_group_expense_rows(self, group_id: int, query: str, limit: int) -> List[Dict[str, Any]]:
+        if not await self.db.get(Group, group_id):
+            raise GroupNotFound(group_id)
+        terms = search_terms(query)
+        if not terms:
+            return []
+        search = _expense_search_query(self.db.bind.dialect.name, group_id, terms, limit)
+        return ExpenseService._shape_expense_rows((await self.db.execute(search)).all(), [], include_splits=False)
+    
+    async def get_user_expenses(self, user_id: int) -> List[Expense]:
+        result = await self.db.execute(
+            select(Expense)
+            .options(*EXPENSE_LOAD_OPTIONS)
+            .where(Expense.paid_by_user_id == user_id)
+            .order_by(Expense.created_at.desc())
+        )
+        return list(result.scalars())
+    
+    async def delete_expense(self, expense_id: int, consistency: str = "sync") -> bool:
+        _check_consistency(consistency)
+        expense = await self.db.get(Expense, expense_id)
+        if not expense:
+            return False
         
-        # Delete expense (splits will be cascade deleted)
-        self.db.delete(expense)
-        self.db.commit()
+        group_id = expense.group_id
+        async with async_group_write_lock(self.db, group_id):
+            if not (await self.db.execute(_expense_exists_query(expense_id))).first():
+                # Deleted or archived by a period close while we waited for the lock
+                await self.db.rollback()
+                return False
+            
+            self.db.add(_deleted_event(expense, (await self.db.execute(_split_amounts_query(expense_id))).all()))
+            
+            # Splits are cascade deleted; AsyncSession.delete loads them first
+            await self.db.delete(expense)
+            derived = await self._drain_outbox(group_id) if consistency == "sync" else []
+            await self.db.commit()
         
+        if consistency == "eventual":
+            notify_enqueued(group_id)
+        _publish(group_id, {"type": EXPENSE_DELETED_MESSAGE, "expense_id": expense_id}, derived)
         return True
\ No newline at end of file
@@ -0,0 +1,57 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+from app.models.insight import GroupInsight
+
+class GroupInsightService:
+    """Persisted group insights, keyed by (group, model) and tagged with their data version"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_version(self, group_id: int, model: str) -> Optional[str]:
+        return self.db.execute(
+            select(GroupInsight.data_version)
+            .where(GroupInsight.group_id == group_id, GroupInsight.model == model)
+        ).scalar()
+    
+    def get_current(self, group_id: int, model: str, data_version: str) -> Optional[Dict[str, Any]]:
+        """Stored insights if they were built from this data version"""
+        row = self.db.get(GroupInsight, (group_id, model))
+        if row is None or row.data_version != data_version:
+            return None
+        return {
+            "insights": row.insights,
+            "group_name": row.group_name,
+            "total_expenses": row.total_expenses,
+            "total_amount": row.total_amount
+        }
+    
+    def save(self, group_id: int, model: str, data_version: str, insights: Dict[str, Any], generation_ms: float):
+        values = {
+            "data_version": data_version,
+            "group_name": insights["group_name"],
+            "insights": insights["insights"],
+            "total_expenses": insights["total_expenses"],
+            "total_amount": insights["total_amount"],
+            "generation_ms": generation_ms
+        }
+        
+        row = self.db.get(GroupInsight, (group_id, model))
+        if row is None:
+            self.db.add(GroupInsight(group_id=group_id, model=model, **values))
+        else:
+            for key, value in values.items():
+                setattr(row, key, value)
+        
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Another worker inserted the row first; last write wins
+            self.db.rollback()
+            self.db.query(GroupInsight).filter(
+                GroupInsight.group_id == group_id,
+                GroupInsight.model == model
+            ).update(values)
+            self.db.commit()
\ No newline at end of file
@@ -1,9 +1,43 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Tuple
+from app.models.archive import ArchivedExpense, ArchivedExpenseSplit, BalanceCheckpoint, BalanceCheckpointEntry
+from app.models.balance import Balance
 from app.models.group import Group, GroupMember
+from app.models.insight import GroupInsight
+from app.models.outbox import OutboxEvent
+from app.models.rollup import GroupDailySpend, UserDailySpend
 from app.models.user import User
 from app.schemas.group import GroupCreate, GroupUpdate
 from app.core.exceptions import GroupNotFound, UserNotFound
+from app.core.group_locks import async_group_write_lock, group_write_lock
+from app.core.push import MEMBER_JOINED, push_hub
+
+# Members are part of the Group schema, so load them with the group (async sessions can't lazy-load)
+GROUP_LOAD_OPTIONS = (
+    selectinload(Group.members).selectinload(GroupMember.user),
+)
+
+def _group_data_deletes(group_id: int) -> list:
+    """Deletes for the group's rows outside its members and expenses (which the ORM cascades to), children first.
+    
+    Spelled out rather than left to ON DELETE CASCADE, which SQLite only honours
+    with foreign key enforcement switched on.
+    """
+    checkpoint_ids = select(BalanceCheckpoint.id).where(BalanceCheckpoint.group_id == group_id)
+    statements = [
+        delete(ArchivedExpenseSplit).where(ArchivedExpenseSplit.checkpoint_id.in_(checkpoint_ids)),
+        delete(ArchivedExpense).where(ArchivedExpense.group_id == group_id),
+        delete(BalanceCheckpointEntry).where(BalanceCheckpointEntry.checkpoint_id.in_(checkpoint_ids)),
+        delete(BalanceCheckpoint).where(BalanceCheckpoint.group_id == group_id),
+        delete(Balance).where(Balance.group_id == group_id),
+        delete(OutboxEvent).where(OutboxEvent.group_id == group_id),
+        delete(GroupDailySpend).where(GroupDailySpend.group_id == group_id),
+        delete(UserDailySpend).where(UserDailySpend.group_id == group_id),
+        delete(GroupInsight).where(GroupInsight.group_id == group_id),
+    ]
+    return [statement.execution_options(synchronize_session=False) for statement in statements]
 
 class GroupService:
     def __init__(self, db: Session):
@@ -31,6 +65,7 @@ class GroupService:
         
         self.db.commit()
         self.db.refresh(db_group)
+        push_hub.publish(db_group.id, {"type": MEMBER_JOINED, "user_ids": list(group_data.member_ids)})
         return db_group
     
     def get_group(self, group_id: int) -> Group:
@@ -47,6 +82,19 @@ class GroupService:
             .all()
         )
     
+    def get_user_group_rows(self, user_id: int) -> List[Tuple[int, str, int]]:
+        """(group id, name, member count) for every group the user belongs to, in one query"""
+        user_group_ids = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        return [
+            tuple(row) for row in self.db.execute(
+                select(Group.id, Group.name, func.count(GroupMember.id))
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .where(Group.id.in_(user_group_ids))
+                .group_by(Group.id, Group.name)
+                .order_by(Group.name)
+            )
+        ]
+    
     def update_group(self, group_id: int, group_data: GroupUpdate) -> Group:
         group = self.get_group(group_id)
         
@@ -54,15 +102,19 @@ class GroupService:
             group.name = group_data.name
         if group_data.description is not None:
             group.description = group_data.description
-            
+        
         self.db.commit()
         self.db.refresh(group)
         return group
     
     def delete_group(self, group_id: int) -> bool:
         group = self.get_group(group_id)
-        self.db.delete(group)
-        self.db.commit()
+        # Under the write lock, so the outbox can't apply an event for the group halfway through
+        with group_write_lock(self.db, group_id):
+            for statement in _group_data_deletes(group_id):
+                self.db.execute(statement)
+            self.db.delete(group)
+            self.db.commit()
         return True
     
     def add_member(self, group_id: int, user_id: int) -> Group:
@@ -83,6 +135,101 @@ class GroupService:
             member = GroupMember(group_id=group_id, user_id=user_id)
             self.db.add(member)
             self.db.commit()
+            push_hub.publish(group_id, {"type": MEMBER_JOINED, "user_ids": [user_id]})
         
         self.db.refresh(group)
+        return group
+
+class AsyncGroupService:
+    """Async counterpart of GroupService for handlers running on the event loop"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_group(self, group_data: GroupCreate) -> Group:
+        # Verify all users exist in one query
+        existing_ids = set((await self.db.execute(
+            select(User.id).where(User.id.in_(group_data.member_ids))
+        )).scalars())
+        for user_id in group_data.member_ids:
+            if user_id not in existing_ids:
+                raise UserNotFound(user_id)
+        
+        db_group = Group(
+            name=group_data.name,
+            description=group_data.description
+        )
+        self.db.add(db_group)
+        await self.db.flush()
+        
+        self.db.add_all([
+            GroupMember(group_id=db_group.id, user_id=user_id)
+            for user_id in group_data.member_ids
+        ])
+        
+        await self.db.commit()
+        push_hub.publish(db_group.id, {"type": MEMBER_JOINED, "user_ids": list(group_data.member_ids)})
+        return await self.get_group(db_group.id)
+    
+    async def get_group(self, group_id: int) -> Group:
+        result = await self.db.execute(
+            select(Group)
+            .options(*GROUP_LOAD_OPTIONS)
+            .where(Group.id == group_id)
+            .execution_options(populate_existing=True)
+        )
+        group = result.scalar_one_or_none()
+        if not group:
+            raise GroupNotFound(group_id)
+        return group
+    
+    async def get_user_groups(self, user_id: int) -> List[Group]:
+        result = await self.db.execute(
+            select(Group)
+            .join(GroupMember)
+            .where(GroupMember.user_id == user_id)
+            .options(*GROUP_LOAD_OPTIONS)
+        )
+        return list(result.scalars().unique())
+    
+    async def update_group(self, group_id: int, group_data: GroupUpdate) -> Group:
+        group = await self.get_group(group_id)
+        
+        if group_data.name is not None:
+            group.name = group_data.name
+        if group_data.description is not None:
+            group.description = group_data.description
+        
+        await self.db.commit()
+        # Reload server-side updated_at
+        return await self.get_group(group_id)
+    
+    async def delete_group(self, group_id: int) -> bool:
+        group = await self.get_group(group_id)
+        async with async_group_write_lock(self.db, group_id):
+            for statement in _group_data_deletes(group_id):
+                await self.db.execute(statement)
+            await self.db.delete(group)
+            await self.db.commit()
+        return True
+    
+    async def add_member(self, group_id: int, user_id: int) -> Group:
+        group = await self.db.get(Group, group_id)
+        if not group:
+            raise GroupNotFound(group_id)
+        
+        user = await self.db.get(User, user_id)
+        if not user:
+            raise UserNotFound(user_id)
+        
+        existing = (await self.db.execute(
+            select(GroupMember).where(GroupMember.group_id == group_id, GroupMember.user_id == user_id)
+        )).scalars().first()
+        
+        if not existing:
+            self.db.add(GroupMember(group_id=group_id, user_id=user_id))
+            await self.db.commit()
+            push_hub.publish(group_id, {"type": MEMBER_JOINED, "user_ids": [user_id]})
+        
+        await self.db.refresh(group)
         return group
\ No newline at end of file
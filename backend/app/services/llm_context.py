@@ -0,0 +1,130 @@
+from datetime import datetime, timezone
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.models.balance import Balance
+from app.models.user import User
+from app.services.balance_service import BalanceService
+from app.services.expense_service import ExpenseService
+from app.services.group_service import GroupService
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text and numbers)"""
+    return (len(text) + 3) // 4
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    # Keep the row/column separators unambiguous
+    return str(value).replace("|", "/").replace("\n", " ")
+
+def _row(*values: Any) -> str:
+    return "|".join(_cell(value) for value in values)
+
+class UserContextBuilder:
+    """Builds the chat prompt's user context with a fixed number of queries and a token budget"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def build(self, user_id: int, token_budget: Optional[int] = None) -> str:
+        data = self.load(user_id)
+        if data is None:
+            return "user: unknown"
+        return self.render(data, settings.LLM_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget)
+    
+    def load(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Everything the context needs, in five aggregated queries"""
+        owed = select(func.coalesce(func.sum(Balance.amount), 0.0)).where(Balance.owed_to_user_id == user_id)
+        owing = select(func.coalesce(func.sum(Balance.amount), 0.0)).where(Balance.owes_user_id == user_id)
+        user = self.db.execute(
+            select(User.name, owed.scalar_subquery(), owing.scalar_subquery()).where(User.id == user_id)
+        ).first()
+        if user is None:
+            return None
+        
+        groups = GroupService(self.db).get_user_group_rows(user_id)
+        balances = BalanceService(self.db).get_user_counterparty_rows(user_id)
+        expense_service = ExpenseService(self.db)
+        paid_totals = expense_service.get_user_payer_totals(user_id)
+        expenses = expense_service.get_user_recent_expense_rows(user_id, settings.LLM_CONTEXT_MAX_EXPENSES)
+        
+        name, total_owed, total_owing = user
+        return {
+            "user": {"name": name, "total_owed": total_owed, "total_owing": total_owing},
+            "groups": [(group_name, member_count) for _, group_name, member_count in groups],
+            "balances": balances,
+            "paid_totals": paid_totals,
+            "recent_expenses": expenses
+        }
+    
+    @staticmethod
+    def render(data: Dict[str, Any], token_budget: int) -> str:
+        """Pipe-separated tables, filled in priority order until the budget runs out"""
+        user = data["user"]
+        lines = [
+            f"user: {_cell(user['name'])}",
+            f"totals: others owe you {user['total_owed']:.2f}; you owe {user['total_owing']:.2f}; "
+            f"net {user['total_owed'] - user['total_owing']:+.2f}"
+        ]
+        remaining = token_budget - sum(estimate_tokens(line) + 1 for line in lines)
+        
+        # Largest debts first, then a recency-weighted pick of expenses, then the biggest spenders
+        now = datetime.now(timezone.utc)
+        
+        def expense_priority(row) -> float:
+            created_at = row[0] if row[0].tzinfo else row[0].replace(tzinfo=timezone.utc)
+            return row[3] / (1 + max((now - created_at).days, 0))
+        
+        # (title, rows in priority order, share of the budget guaranteed in the first pass, display order)
+        sections: List[Tuple[str, List[tuple], float, Optional[Any]]] = [
+            ("groups [name|members]", data["groups"], 0.15, None),
+            ("balances [group|person|amount] (+ they owe you, - you owe them)",
+             sorted(data["balances"], key=lambda row: -abs(row[2])), 0.3, None),
+            ("recent_expenses [date|group|description|amount|paid_by|your_share]",
+             sorted(data["recent_expenses"], key=expense_priority, reverse=True), 0.35,
+             lambda row: row[0]),
+            ("paid_by_member [group|person|total|count]",
+             sorted(data["paid_totals"], key=lambda row: -row[2]), 0.2, None),
+        ]
+        sections = [section for section in sections if section[1]]
+        
+        # Each non-empty section pays for its title and a possible "+N more" line up front
+        remaining -= sum(estimate_tokens(title) + 8 for title, *_ in sections)
+        kept = [0] * len(sections)
+        
+        def fill(index: int, allowance: int) -> int:
+            rows = sections[index][1]
+            while kept[index] < len(rows):
+                cost = estimate_tokens(_row(*rows[kept[index]])) + 1
+                if cost > allowance:
+                    break
+                allowance -= cost
+                kept[index] += 1
+            return allowance
+        
+        # First pass: every section gets its share; second pass: leftovers go in priority order
+        first_pass_budget = max(remaining, 0)
+        for index, (_, _, share, _) in enumerate(sections):
+            allowance = min(int(first_pass_budget * share), remaining)
+            remaining -= allowance - fill(index, allowance)
+        for index in range(len(sections)):
+            remaining = fill(index, remaining)
+        
+        for (title, rows, _, display_order), count in zip(sections, kept):
+            if not count:
+                continue
+            shown = rows[:count]
+            if display_order:
+                shown = sorted(shown, key=display_order, reverse=True)
+            lines.append(title)
+            lines.extend(_row(*row) for row in shown)
+            if count < len(rows):
+                lines.append(f"(+{len(rows) - count} more not shown)")
+        
+        return "\n".join(lines)
\ No newline at end of file
@@ -1,19 +1,35 @@
-from openai import OpenAI
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+import asyncio
+import hashlib
 import json
+import time
 from app.core.config import settings
-from app.models.user import User
+from app.core.exceptions import GroupNotFound
+from app.core.llm_client import create_chat_completion, llm_configured, stream_chat_completion, stream_metrics
+from app.core.result_cache import AsyncResultCache
+from app.database import SessionLocal
+from app.models.balance import Balance
 from app.models.group import Group
 from app.models.expense import Expense
 from app.services.balance_service import BalanceService
+from app.services.chat_intents import LocalIntentEngine
 from app.services.expense_service import ExpenseService
+from app.services.group_insight_service import GroupInsightService
 from app.services.group_service import GroupService
+from app.services.llm_context import UserContextBuilder
+
+insights_cache = AsyncResultCache(
+    ttl_seconds=settings.INSIGHTS_CACHE_TTL_SECONDS,
+    max_entries=settings.INSIGHTS_CACHE_MAX_ENTRIES,
+    stale_seconds=settings.INSIGHTS_CACHE_STALE_SECONDS
+)
 
 class LLMService:
     def __init__(self, db: Session):
         self.db = db
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
         self.balance_service = BalanceService(db)
         self.expense_service = ExpenseService(db)
         self.group_service = GroupService(db)
@@ -21,103 +37,102 @@ class LLMService:
     async def process_query(self, query: str, user_id: int) -> str:
         """Process natural language query about expenses and balances"""
         
-        if not self.client:
+        # Common questions are answered from the database directly
+        _, answer = await run_in_threadpool(LocalIntentEngine(self.db).resolve, query, user_id)
+        if answer is not None:
+            return answer
+        
+        if not llm_configured():
             return "LLM service is not configured. Please set OPENAI_API_KEY."
         
-        # Get user context
-        context = self._get_user_context(user_id)
+        # Get user context (blocking DB work stays off the event loop)
+        context = await run_in_threadpool(UserContextBuilder(self.db).build, user_id)
         
         # Create system prompt
         system_prompt = self._create_system_prompt(context)
         
         try:
-            response = self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
+            response = await create_chat_completion(
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": query}
                 ],
+                operation="chat",
                 temperature=0.1,
                 max_tokens=500
             )
             
             return response.choices[0].message.content.strip()
-            
+        
         except Exception as e:
             return f"Sorry, I encountered an error processing your request: {str(e)}"
     
-    def _get_user_context(self, user_id: int) -> Dict[str, Any]:
-        """Get relevant context for the user"""
-        
-        # Get user info
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return {}
-        
-        # Get user's groups
-        groups = self.group_service.get_user_groups(user_id)
-        
-        # Get recent expenses
-        recent_expenses = (
-            self.db.query(Expense)
-            .join(Group)
-            .filter(
-                Group.id.in_([g.id for g in groups])
-            )
-            .order_by(Expense.created_at.desc())
-            .limit(10)
-            .all()
-        )
+    async def stream_query(self, query: str, user_id: int) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming variant of process_query.
         
-        # Get balance summary
-        balance_summary = self.balance_service.get_user_balance_summary(user_id)
-        
-        # Format context
-        context = {
-            "user": {
-                "id": user.id,
-                "name": user.name,
-                "email": user.email
-            },
-            "groups": [
-                {
-                    "id": group.id,
-                    "name": group.name,
-                    "member_count": len(group.members)
-                }
-                for group in groups
-            ],
-            "recent_expenses": [
-                {
-                    "id": expense.id,
-                    "description": expense.description,
-                    "amount": expense.amount,
-                    "group_name": expense.group.name,
-                    "paid_by": expense.paid_by_user.name,
-                    "created_at": expense.created_at.isoformat()
-                }
-                for expense in recent_expenses
-            ],
-            "balance_summary": {
-                "total_owed": balance_summary.total_owed,
-                "total_owing": balance_summary.total_owing,
-                "net_balance": balance_summary.net_balance
-            }
-        }
+        Loads the context up front (while the request's session is open) and returns an
+        iterator of ("delta", text) events ending in ("done", timings) or ("error", message).
+        """
+        started = time.perf_counter()
+        _, answer = await run_in_threadpool(LocalIntentEngine(self.db).resolve, query, user_id)
+        if answer is not None:
+            return self._local_answer(answer, started)
+        
+        if not llm_configured():
+            return self._single_event("error", "LLM service is not configured. Please set OPENAI_API_KEY.")
         
-        return context
+        context = await run_in_threadpool(UserContextBuilder(self.db).build, user_id)
+        messages = [
+            {"role": "system", "content": self._create_system_prompt(context)},
+            {"role": "user", "content": query}
+        ]
+        return self._stream_answer(messages, started)
     
-    def _create_system_prompt(self, context: Dict[str, Any]) -> str:
-        """Create system prompt with user context"""
+    @staticmethod
+    async def _single_event(kind: str, payload: Any) -> AsyncIterator[Tuple[str, Any]]:
+        yield kind, payload
+    
+    @staticmethod
+    async def _local_answer(answer: str, started: float) -> AsyncIterator[Tuple[str, Any]]:
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        yield "delta", answer
+        yield "done", {"ttft_ms": elapsed_ms, "total_ms": elapsed_ms, "source": "local"}
+    
+    @staticmethod
+    async def _stream_answer(messages: List[Dict[str, Any]], started: float) -> AsyncIterator[Tuple[str, Any]]:
+        ttft = None
+        outcome = "failed"
+        try:
+            async for delta in stream_chat_completion(messages, operation="chat_stream", temperature=0.1, max_tokens=500):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                yield "delta", delta
+            outcome = "completed"
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away; leaving the stream closes the upstream request
+            outcome = "disconnected"
+            raise
+        except Exception as e:
+            yield "error", f"Sorry, I encountered an error processing your request: {str(e)}"
+        finally:
+            total = time.perf_counter() - started
+            stream_metrics.record(outcome, ttft, total)
         
-        context_str = json.dumps(context, indent=2)
+        yield "done", {
+            "ttft_ms": round(ttft * 1000, 3) if ttft is not None else None,
+            "total_ms": round(total * 1000, 3),
+            "source": "llm"
+        }
+    
+    def _create_system_prompt(self, context: str) -> str:
+        """Create system prompt with user context"""
         
         return f"""
 You are an AI assistant for a Splitwise-like expense sharing application. 
 You help users understand their expenses, balances, and group activities through natural language queries.
 
-Current user context:
-{context_str}
+Current user context (pipe-separated tables; amounts in dollars):
+{context}
 
 Instructions:
 1. Answer questions about the user's expenses, balances, and groups based on the provided context
@@ -136,27 +151,120 @@ Example queries you can handle:
 - "Who paid the most in my groups?"
 """
 
-    def get_expense_insights(self, group_id: int) -> Dict[str, Any]:
-        """Get AI-powered insights about group expenses"""
+    async def get_expense_insights(self, group_id: int, allow_stale: Optional[bool] = None) -> Dict[str, Any]:
+        """Get AI-powered insights about group expenses, cached per group data version"""
         
-        if not self.client:
+        if not llm_configured():
             return {"error": "LLM service not configured"}
         
+        version = await run_in_threadpool(self.group_data_version, group_id)
+        if allow_stale is None:
+            allow_stale = settings.INSIGHTS_CACHE_SERVE_STALE
+        
+        try:
+            insights, cache = await insights_cache.get_or_compute(
+                (group_id, settings.OPENAI_MODEL),
+                version,
+                lambda: self._load_or_generate_insights(group_id, version),
+                allow_stale=allow_stale
+            )
+            return {**insights, "cache": cache}
+        
+        except Exception as e:
+            return {"error": f"Failed to generate insights: {str(e)}"}
+    
+    def group_data_version(self, group_id: int) -> str:
+        """Fingerprint of everything the insights prompt is built from, in one query"""
+        aggregates = [
+            select(aggregate).where(model.group_id == group_id).scalar_subquery()
+            for model, aggregate in (
+                (Expense, func.count(Expense.id)),
+                (Expense, func.max(Expense.id)),
+                (Expense, func.sum(Expense.amount)),
+                (Expense, func.count(Expense.category)),  # moves as the category backfill runs
+                (Balance, func.count(Balance.id)),
+                (Balance, func.max(Balance.updated_at)),
+                (Balance, func.sum(Balance.amount))
+            )
+        ]
+        
+        row = self.db.execute(
+            select(Group.name, *aggregates).where(Group.id == group_id)
+        ).first()
+        if row is None:
+            raise GroupNotFound(group_id)
+        return hashlib.sha1(repr(tuple(row)).encode()).hexdigest()[:16]
+    
+    @classmethod
+    async def _load_or_generate_insights(cls, group_id: int, version: str) -> Dict[str, Any]:
+        # Insights precomputed for this data version skip the LLM call
+        def load():
+            with SessionLocal() as db:
+                return GroupInsightService(db).get_current(group_id, settings.OPENAI_MODEL, version)
+        
+        stored = await run_in_threadpool(load)
+        if stored is not None:
+            return stored
+        return await cls.generate_and_store_insights(group_id, version)
+    
+    @classmethod
+    async def generate_and_store_insights(cls, group_id: int, version: str) -> Dict[str, Any]:
+        """Call the LLM for a group's insights and persist them under the data version they describe"""
+        started = time.perf_counter()
+        insights = await cls._generate_insights(group_id)
+        generation_ms = round((time.perf_counter() - started) * 1000, 3)
+        
+        def save():
+            with SessionLocal() as db:
+                GroupInsightService(db).save(group_id, settings.OPENAI_MODEL, version, insights, generation_ms)
+        
+        await run_in_threadpool(save)
+        return insights
+    
+    @staticmethod
+    async def _generate_insights(group_id: int) -> Dict[str, Any]:
+        # Own session: a background refresh can outlive the request that started it
+        def create_prompt():
+            with SessionLocal() as db:
+                return LLMService(db)._create_insights_prompt(group_id)
+        
+        group_name, total_expenses, total_amount, prompt = await run_in_threadpool(create_prompt)
+        
+        response = await create_chat_completion(
+            [{"role": "user", "content": prompt}],
+            operation="insights",
+            temperature=0.3,
+            max_tokens=400
+        )
+        
+        return {
+            "insights": response.choices[0].message.content.strip(),
+            "group_name": group_name,
+            "total_expenses": total_expenses,
+            "total_amount": total_amount
+        }
+    
+    def _create_insights_prompt(self, group_id: int):
+        """Load group data and build the insights prompt (blocking DB work)"""
+        
         # Get group data
         group = self.group_service.get_group(group_id)
-        expenses = self.expense_service.get_group_expenses(group_id)
+        expenses = self.expense_service.get_group_expense_rows(group_id, include_splits=False, limit=20)
         balances = self.balance_service.get_group_balances(group_id)
+        # Categories come precomputed from SQL rather than left to the model to infer from descriptions
+        categories = self.expense_service.get_group_category_totals(group_id)
         
         # Prepare data for analysis
         expense_data = [
             {
-                "description": exp.description,
-                "amount": exp.amount,
-                "paid_by": exp.paid_by_user.name,
-                "split_type": exp.split_type.value,
-                "date": exp.created_at.isoformat()
+                "description": exp["description"],
+                "amount": exp["amount"],
+                "paid_by": exp["paid_by_user"]["name"],
+                "split_type": exp["split_type"],
+                "category": exp["category"],
+                "date": exp["created_at"].isoformat()
             }
-            for exp in expenses[:20]  # Last 20 expenses
+            for exp in expenses  # Last 20 expenses
         ]
         
         balance_data = [
@@ -168,10 +276,23 @@ Example queries you can handle:
             for balance in balances
         ]
         
+        category_data = [
+            {
+                "category": row["category"],
+                "expenses": row["expense_count"],
+                "total": round(row["total_amount"], 2),
+                "share_of_spending": f"{row['share']:.0%}"
+            }
+            for row in categories
+        ]
+        
         prompt = f"""
 Analyze the following expense data for the group "{group.name}" and provide insights:
 
-Expenses:
+Spending by category:
+{json.dumps(category_data, indent=2)}
+
+Recent expenses:
 {json.dumps(expense_data, indent=2)}
 
 Current Balances:
@@ -180,27 +301,13 @@ Current Balances:
 Please provide:
 1. Summary of spending patterns
 2. Who contributes the most/least
-3. Most common expense types
+3. What the category breakdown says about where the money goes
 4. Any interesting observations
 5. Suggestions for the group
 
 Keep the response conversational and under 300 words.
 """
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=400
-            )
-            
-            return {
-                "insights": response.choices[0].message.content.strip(),
-                "group_name": group.name,
-                "total_expenses": len(expenses),
-                "total_amount": sum(exp.amount for exp in expenses)
-            }
-            
-        except Exception as e:
-            return {"error": f"Failed to generate insights: {str(e)}"}
\ No newline at end of file
+
+        total_expenses = sum(row["expense_count"] for row in categories)
+        total_amount = sum(row["total_amount"] for row in categories)
+        return group.name, total_expenses, total_amount, prompt
\ No newline at end of file
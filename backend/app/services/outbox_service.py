@@ -0,0 +1,256 @@
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.exceptions import SplitwiseException
+from app.core.group_locks import group_write_lock
+from app.core.metrics import outbox_event_lag, outbox_events
+from app.core.push import BALANCE_CHANGED, push_hub
+from app.models.outbox import OutboxEvent
+from app.services.balance_service import BalanceService
+from app.services.spend_rollup_service import SpendRollupService
+
+logger = logging.getLogger(__name__)
+
+EXPENSE_CREATED = "expense.created"
+EXPENSE_DELETED = "expense.deleted"
+
+CONSISTENCY_MODES = ("sync", "eventual")
+
+def _apply_balance_deltas(db: Session, event: OutboxEvent) -> Dict[str, Any]:
+    pairs = BalanceService(db).apply_balance_deltas(event.group_id, event.payload["deltas"])
+    return {"type": BALANCE_CHANGED, "pairs": pairs}
+
+def _apply_spend_rollups(db: Session, event: OutboxEvent) -> None:
+    rollup = event.payload.get("rollup")
+    if rollup is not None:  # absent from events queued before rollups existed; rebuild_spend_rollups covers those
+        SpendRollupService(db).apply(event.group_id, rollup, -1.0 if event.event_type == EXPENSE_DELETED else 1.0)
+
+# Derived updates per event type, run in order in the transaction that marks the event done.
+# A handler may return a push message, published to the group once that transaction commits.
+HANDLERS: Dict[str, Sequence[Callable[[Session, OutboxEvent], Optional[Dict[str, Any]]]]] = {
+    EXPENSE_CREATED: (_apply_balance_deltas, _apply_spend_rollups),
+    EXPENSE_DELETED: (_apply_balance_deltas, _apply_spend_rollups),
+}
+
+# Called with the group id after an eventual write commits; the in-process worker wakes up on it
+_enqueue_listeners: List[Callable[[int], None]] = []
+
+def add_enqueue_listener(listener: Callable[[int], None]):
+    _enqueue_listeners.append(listener)
+
+def remove_enqueue_listener(listener: Callable[[int], None]):
+    _enqueue_listeners.remove(listener)
+
+def notify_enqueued(group_id: int):
+    for listener in list(_enqueue_listeners):
+        listener(group_id)
+
+def expense_event(event_type: str, group_id: int, expense_id: int, deltas: List[List[Any]], rollup: Dict[str, Any]) -> OutboxEvent:
+    return OutboxEvent(
+        group_id=group_id,
+        event_type=event_type,
+        payload={"expense_id": expense_id, "deltas": deltas, "rollup": rollup}
+    )
+
+def retry_delay(attempts: int) -> float:
+    """Jittered exponential backoff before the next attempt"""
+    delay = min(settings.OUTBOX_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX_SECONDS)
+    return random.uniform(delay / 2, delay)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+class OutboxService:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def _pending(self, group_id: int):
+        return (
+            select(OutboxEvent)
+            .where(OutboxEvent.group_id == group_id, OutboxEvent.status == "pending")
+            .order_by(OutboxEvent.id)
+        )
+    
+    def _apply(self, event: OutboxEvent) -> Optional[List[Dict[str, Any]]]:
+        """Claim the event and run its handlers; None if it was already applied elsewhere"""
+        claimed = self.db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == event.id, OutboxEvent.processed_at.is_(None))
+            .values(status="done", processed_at=_utcnow())
+        ).rowcount
+        if not claimed:
+            logger.info("group %s: event %s was already applied, skipping it", event.group_id, event.id)
+            return None
+        messages = [message for message in (handler(self.db, event) for handler in HANDLERS[event.event_type]) if message]
+        self.db.flush()
+        return messages
+    
+    @staticmethod
+    def _record_applied(event_type: str, created_at: datetime, processed_at: datetime):
+        outbox_events.inc(event_type, "done")
+        outbox_event_lag.observe(value=max((processed_at - _as_utc(created_at)).total_seconds(), 0.0))
+    
+    def drain_pending(self, group_id: int) -> List[Dict[str, Any]]:
+        """Apply the group's pending events in order; the caller commits under group_write_lock.
+        
+        Stops at an event the worker is already retrying, leaving it and everything
+        after it to the worker, so one failing event can't fail every write to the group.
+        Returns the handlers' push messages for the caller to publish after committing.
+        """
+        self.db.flush()
+        messages = []
+        for event in self.db.execute(self._pending(group_id)).scalars().all():
+            if event.attempts:
+                logger.info("group %s: event %s is being retried, leaving later events to the worker", group_id, event.id)
+                break
+            applied = self._apply(event)
+            if applied is None:
+                continue
+            messages.extend(applied)
+            self._record_applied(event.event_type, event.created_at, event.processed_at)
+        return messages
+    
+    def drain_all(self, group_id: int) -> List[Dict[str, Any]]:
+        """Apply every pending event before a rebuild from the source tables; the caller holds group_write_lock.
+        
+        Raises if an event is still being retried, since the rebuild would count its
+        expense before the worker applies it again. Returns drain_pending's push messages.
+        """
+        messages = self.drain_pending(group_id)
+        pending = self.db.execute(
+            select(func.count(OutboxEvent.id)).where(OutboxEvent.group_id == group_id, OutboxEvent.status == "pending")
+        ).scalar()
+        if pending:
+            self.db.rollback()
+            raise SplitwiseException(f"Group {group_id} has {pending} outbox events awaiting retry; rebuild it once they are applied")
+        return messages
+    
+    def process_group(self, group_id: int, limit: int) -> Dict[str, int]:
+        """Apply up to `limit` due events for one group, one transaction each.
+        
+        A failed event is retried with backoff and blocks the group's later events
+        until it succeeds or is dead-lettered after OUTBOX_MAX_ATTEMPTS.
+        """
+        outcomes = {"done": 0, "retry": 0, "dead": 0}
+        for _ in range(limit):
+            with group_write_lock(self.db, group_id):
+                event = self.db.execute(self._pending(group_id).limit(1)).scalars().first()
+                if event is None or _as_utc(event.available_at) > _utcnow():
+                    self.db.rollback()
+                    break
+                
+                event_id, event_type = event.id, event.event_type
+                try:
+                    messages = self._apply(event)
+                    if messages is None:
+                        self.db.rollback()
+                        continue
+                    created_at, processed_at = event.created_at, event.processed_at
+                    self.db.commit()
+                except Exception as e:
+                    self.db.rollback()
+                    outcome = self._record_failure(event_id, e)
+                    if outcome is None:
+                        continue
+                else:
+                    self._record_applied(event_type, created_at, processed_at)
+                    for message in messages:
+                        push_hub.publish(group_id, message)
+                    outcomes["done"] += 1
+                    continue
+            
+            outcomes[outcome] += 1
+            outbox_events.inc(event_type, outcome)
+            if outcome == "retry":
+                break
+        return outcomes
+    
+    def _record_failure(self, event_id: int, error: Exception) -> Optional[str]:
+        """Count a failed attempt; None if the event was applied elsewhere in the meantime"""
+        counted = self.db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == event_id, OutboxEvent.processed_at.is_(None))
+            .values(attempts=OutboxEvent.attempts + 1, last_error=f"{error.__class__.__name__}: {error}"[:500])
+        ).rowcount
+        if not counted:
+            self.db.rollback()
+            return None
+        event = self.db.get(OutboxEvent, event_id)
+        if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            event.status = "dead"
+            logger.error("outbox event %s (group %s) dead after %d attempts: %s", event_id, event.group_id, event.attempts, event.last_error)
+        else:
+            event.available_at = _utcnow() + timedelta(seconds=retry_delay(event.attempts))
+            logger.warning("outbox event %s (group %s) failed, attempt %d: %s", event_id, event.group_id, event.attempts, event.last_error)
+        self.db.commit()
+        return "dead" if event.status == "dead" else "retry"
+    
+    def due_groups(self, limit: int, exclude: Sequence[int] = ()) -> List[int]:
+        """Groups whose oldest pending event is due, oldest first"""
+        heads = (
+            select(func.min(OutboxEvent.id).label("id"))
+            .where(OutboxEvent.status == "pending")
+            .group_by(OutboxEvent.group_id)
+            .subquery()
+        )
+        query = (
+            select(OutboxEvent.group_id)
+            .join(heads, OutboxEvent.id == heads.c.id)
+            .where(OutboxEvent.available_at <= _utcnow())
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+        )
+        if exclude:
+            query = query.where(OutboxEvent.group_id.not_in(list(exclude)))
+        return list(self.db.execute(query).scalars())
+    
+    def requeue_dead(self, group_id: Optional[int] = None) -> int:
+        """Give dead-lettered events a fresh set of attempts"""
+        query = (
+            update(OutboxEvent)
+            .where(OutboxEvent.status == "dead")
+            .values(status="pending", attempts=0, available_at=_utcnow())
+        )
+        if group_id is not None:
+            query = query.where(OutboxEvent.group_id == group_id)
+        count = self.db.execute(query).rowcount
+        self.db.commit()
+        return count
+    
+    def prune(self, older_than: timedelta) -> int:
+        """Delete events applied before now - older_than"""
+        count = self.db.execute(
+            delete(OutboxEvent).where(
+                OutboxEvent.status == "done",
+                OutboxEvent.processed_at < _utcnow() - older_than
+            )
+        ).rowcount
+        self.db.commit()
+        return count
+    
+    def status(self) -> Dict[str, Any]:
+        counts = dict(self.db.execute(
+            select(OutboxEvent.status, func.count(OutboxEvent.id)).group_by(OutboxEvent.status)
+        ).all())
+        oldest_pending = self.db.execute(
+            select(func.min(OutboxEvent.created_at)).where(OutboxEvent.status == "pending")
+        ).scalar()
+        # A dead event's deltas never reached its group's balances and rollups: those groups are wrong until requeued
+        dead_groups = self.db.execute(
+            select(OutboxEvent.group_id).where(OutboxEvent.status == "dead").distinct().order_by(OutboxEvent.group_id).limit(20)
+        ).scalars().all() if counts.get("dead") else []
+        return {
+            "pending": counts.get("pending", 0),
+            "dead": counts.get("dead", 0),
+            "dead_groups": dead_groups,
+            "done": counts.get("done", 0),
+            "oldest_pending_seconds": round((_utcnow() - _as_utc(oldest_pending)).total_seconds(), 3) if oldest_pending else None
+        }
\ No newline at end of file
@@ -0,0 +1,262 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+from app.core.exceptions import GroupNotFound, InvalidPeriodException
+from app.core.group_locks import group_write_lock
+from app.core.push import RESYNC, push_hub
+from app.models.archive import ArchivedExpense, ArchivedExpenseSplit, BalanceCheckpoint, BalanceCheckpointEntry
+from app.models.balance import Balance
+from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group
+from app.models.user import User
+from app.services.outbox_service import OutboxService
+
+# Pair amounts closer to zero than this are settled and not stored
+SETTLED_EPSILON = 1e-9
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes, and its DATETIME bind drops any offset; everything is stored as UTC
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _net(rows: Iterable[Tuple[int, int, float]], net: Optional[Dict[Tuple[int, int], float]] = None) -> Dict[Tuple[int, int], float]:
+    """Fold (owes, owed_to, amount) rows into signed amounts keyed by (lower id, higher id)"""
+    net = defaultdict(float, net or {})
+    for owes_user_id, owed_to_user_id, amount in rows:
+        if owes_user_id == owed_to_user_id:
+            continue
+        if owes_user_id < owed_to_user_id:
+            net[(owes_user_id, owed_to_user_id)] += amount
+        else:
+            net[(owed_to_user_id, owes_user_id)] -= amount
+    return net
+
+def _pairs(net: Dict[Tuple[int, int], float]) -> List[Tuple[int, int, float]]:
+    """Signed pair amounts as (owes, owed_to, positive amount), settled pairs dropped"""
+    return [
+        (low, high, amount) if amount > 0 else (high, low, -amount)
+        for (low, high), amount in sorted(net.items())
+        if abs(amount) > SETTLED_EPSILON
+    ]
+
+def _live_split_rows(group_id: int, before: Optional[datetime] = None):
+    query = (
+        select(ExpenseSplit.user_id, Expense.paid_by_user_id, ExpenseSplit.amount)
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .where(Expense.group_id == group_id)
+    )
+    return query.where(Expense.created_at < before) if before is not None else query
+
+class PeriodService:
+    """Closes a group's old periods into balance checkpoints and archive tables.
+    
+    Closing a period nets every expense created before a cut-off into a checkpoint
+    of the group's pair balances, then moves those expenses and their splits out of
+    the live tables into archived_expenses / archived_expense_splits. Live expense
+    reads and balance rebuilds then only touch the open period, starting from the
+    latest checkpoint; archived history stays readable through the archive queries.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def _get_group(self, group_id: int) -> Group:
+        group = self.db.get(Group, group_id)
+        if not group:
+            raise GroupNotFound(group_id)
+        return group
+    
+    def latest_checkpoint(self, group_id: int) -> Optional[BalanceCheckpoint]:
+        return self.db.execute(
+            select(BalanceCheckpoint)
+            .where(BalanceCheckpoint.group_id == group_id)
+            .order_by(BalanceCheckpoint.closed_before.desc(), BalanceCheckpoint.id.desc())
+            .limit(1)
+        ).scalars().first()
+    
+    def _checkpoint_net(self, checkpoint: Optional[BalanceCheckpoint]) -> Dict[Tuple[int, int], float]:
+        if checkpoint is None:
+            return {}
+        return _net(self.db.execute(
+            select(BalanceCheckpointEntry.owes_user_id, BalanceCheckpointEntry.owed_to_user_id, BalanceCheckpointEntry.amount)
+            .where(BalanceCheckpointEntry.checkpoint_id == checkpoint.id)
+        ).all())
+    
+    def expected_balances(self, group_id: int) -> List[Tuple[int, int, float]]:
+        """The group's (owes, owed_to, amount) balances: the latest checkpoint plus every live expense"""
+        net = self._checkpoint_net(self.latest_checkpoint(group_id))
+        return _pairs(_net(self.db.execute(_live_split_rows(group_id)).all(), net))
+    
+    def close_period(self, group_id: int, before: Optional[datetime] = None) -> BalanceCheckpoint:
+        """Checkpoint balances up to `before` (default now) and archive the expenses created before it"""
+        self._get_group(group_id)
+        now = datetime.now(timezone.utc)
+        before = _utc(before) if before is not None else now
+        if before > now:
+            raise InvalidPeriodException("a period can't be closed in the future")
+        
+        with group_write_lock(self.db, group_id):
+            previous = self.latest_checkpoint(group_id)
+            if previous is not None and before <= _utc(previous.closed_before):
+                self.db.rollback()
+                raise InvalidPeriodException(f"the group is already closed up to {_utc(previous.closed_before).isoformat()}")
+            
+            closing = (Expense.group_id == group_id, Expense.created_at < before)
+            expense_count, total_amount = self.db.execute(
+                select(func.count(Expense.id), func.coalesce(func.sum(Expense.amount), 0.0)).where(*closing)
+            ).one()
+            net = _net(self.db.execute(_live_split_rows(group_id, before)).all(), self._checkpoint_net(previous))
+            
+            checkpoint = BalanceCheckpoint(
+                group_id=group_id,
+                closed_before=before,
+                expense_count=expense_count,
+                total_amount=total_amount,
+                entries=[
+                    BalanceCheckpointEntry(owes_user_id=owes_user_id, owed_to_user_id=owed_to_user_id, amount=amount)
+                    for owes_user_id, owed_to_user_id, amount in _pairs(net)
+                ]
+            )
+            self.db.add(checkpoint)
+            self.db.flush()
+            
+            if expense_count:
+                self._archive(checkpoint.id, closing)
+            self.db.commit()
+        
+        if expense_count:
+            # Expenses left the live list; open clients refetch the group
+            push_hub.publish(group_id, {"type": RESYNC})
+        return checkpoint
+    
+    def _archive(self, checkpoint_id: int, closing):
+        """Move the closing expenses and their splits into the archive tables in set-based statements"""
+        closing_ids = select(Expense.id).where(*closing)
+        self.db.execute(
+            insert(ArchivedExpense).from_select(
+                ["checkpoint_id", "expense_id", "group_id", "paid_by_user_id", "description", "amount", "split_type", "category", "created_at"],
+                select(
+                    literal(checkpoint_id), Expense.id, Expense.group_id, Expense.paid_by_user_id,
+                    Expense.description, Expense.amount, Expense.split_type, Expense.category, Expense.created_at
+                ).where(*closing)
+            )
+        )
+        self.db.execute(
+            insert(ArchivedExpenseSplit).from_select(
+                ["checkpoint_id", "expense_id", "user_id", "amount", "percentage"],
+                select(
+                    literal(checkpoint_id), ExpenseSplit.expense_id, ExpenseSplit.user_id,
+                    ExpenseSplit.amount, ExpenseSplit.percentage
+                ).where(ExpenseSplit.expense_id.in_(closing_ids))
+            )
+        )
+        self.db.execute(delete(ExpenseSplit).where(ExpenseSplit.expense_id.in_(closing_ids)).execution_options(synchronize_session=False))
+        self.db.execute(delete(Expense).where(*closing).execution_options(synchronize_session=False))
+    
+    def rebuild_balances(self, group_id: int) -> int:
+        """Recompute the group's stored balances from its latest checkpoint and live expenses.
+        
+        Pending outbox events are applied first (see OutboxService.drain_all).
+        Returns the pair count.
+        """
+        self._get_group(group_id)
+        with group_write_lock(self.db, group_id):
+            OutboxService(self.db).drain_all(group_id)
+            pairs = self.expected_balances(group_id)
+            self.db.execute(delete(Balance).where(Balance.group_id == group_id).execution_options(synchronize_session=False))
+            self.db.add_all(
+                Balance(group_id=group_id, owes_user_id=owes_user_id, owed_to_user_id=owed_to_user_id, amount=amount)
+                for owes_user_id, owed_to_user_id, amount in pairs
+            )
+            self.db.commit()
+        
+        push_hub.publish(group_id, {"type": RESYNC})
+        return len(pairs)
+    
+    def get_checkpoints(self, group_id: int) -> List[BalanceCheckpoint]:
+        self._get_group(group_id)
+        return self.db.execute(
+            select(BalanceCheckpoint)
+            .where(BalanceCheckpoint.group_id == group_id)
+            .order_by(BalanceCheckpoint.closed_before.desc())
+        ).scalars().all()
+    
+    def get_archived_expense_rows(
+        self,
+        group_id: int,
+        checkpoint_id: Optional[int] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Archived expenses, newest first, shaped like the live compact expense rows"""
+        self._get_group(group_id)
+        query = (
+            select(
+                ArchivedExpense.checkpoint_id,
+                ArchivedExpense.expense_id,
+                ArchivedExpense.description,
+                ArchivedExpense.amount,
+                ArchivedExpense.split_type,
+                ArchivedExpense.category,
+                ArchivedExpense.created_at,
+                User.id,
+                User.name
+            )
+            .join(User, ArchivedExpense.paid_by_user_id == User.id)
+            .where(ArchivedExpense.group_id == group_id)
+            .order_by(ArchivedExpense.created_at.desc(), ArchivedExpense.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        if checkpoint_id is not None:
+            query = query.where(ArchivedExpense.checkpoint_id == checkpoint_id)
+        
+        rows = []
+        rows_by_key = {}
+        for checkpoint, expense_id, description, amount, split_type, category, created_at, payer_id, payer_name in self.db.execute(query):
+            row = {
+                "id": expense_id,
+                "checkpoint_id": checkpoint,
+                "description": description,
+                "amount": amount,
+                "split_type": split_type.value,
+                "category": category,
+                "paid_by_user": {"id": payer_id, "name": payer_name},
+                "created_at": created_at,
+                "splits": []
+            }
+            rows.append(row)
+            rows_by_key[(checkpoint, expense_id)] = row
+        if not rows:
+            return rows
+        
+        # Splits for this page only, matched on (checkpoint, original expense id)
+        splits = self.db.execute(
+            select(
+                ArchivedExpenseSplit.id,
+                ArchivedExpenseSplit.checkpoint_id,
+                ArchivedExpenseSplit.expense_id,
+                ArchivedExpenseSplit.amount,
+                ArchivedExpenseSplit.percentage,
+                User.id,
+                User.name
+            )
+            .join(User, ArchivedExpenseSplit.user_id == User.id)
+            .where(
+                ArchivedExpenseSplit.checkpoint_id.in_({checkpoint for checkpoint, _ in rows_by_key}),
+                ArchivedExpenseSplit.expense_id.in_({expense_id for _, expense_id in rows_by_key})
+            )
+            .order_by(ArchivedExpenseSplit.id)
+        )
+        for split_id, checkpoint, expense_id, amount, percentage, user_id, user_name in splits:
+            row = rows_by_key.get((checkpoint, expense_id))
+            if row is None:
+                continue  # same ids in another checkpoint, not on this page
+            row["splits"].append({
+                "id": split_id,
+                "user": {"id": user_id, "name": user_name},
+                "amount": amount,
+                "percentage": percentage
+            })
+        return rows
\ No newline at end of file
@@ -0,0 +1,289 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.exceptions import GroupNotFound, InvalidRangeException, UserNotFound
+from app.models.archive import ArchivedExpense, ArchivedExpenseSplit
+from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group
+from app.models.rollup import GroupDailySpend, UserDailySpend
+from app.models.user import User
+
+BUCKETS = ("day", "week", "month")
+
+def spend_day(created_at: datetime) -> date:
+    """The UTC day an expense is rolled up under; SQLite hands back naive UTC datetimes"""
+    if created_at.tzinfo is None:
+        return created_at.date()
+    return created_at.astimezone(timezone.utc).date()
+
+def rollup_payload(created_at: datetime, amount: float, paid_by_user_id: int, shares: Iterable[Tuple[int, float]]) -> Dict[str, Any]:
+    """What the rollup handler needs from an expense, carried in its outbox event (the row may be gone by then)"""
+    return {
+        "day": spend_day(created_at).isoformat(),
+        "amount": amount,
+        "paid_by_user_id": paid_by_user_id,
+        "shares": [[user_id, share] for user_id, share in shares]
+    }
+
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())  # ISO weeks start on Monday
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(weeks=1)
+    if bucket == "month":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+def _bucket_series(
+    rows: Iterable[Tuple[Any, ...]],
+    fields: Tuple[str, ...],
+    bucket: str,
+    start: Optional[date],
+    end: Optional[date]
+) -> List[Dict[str, Any]]:
+    """Sum (day, *values) rows into contiguous buckets from start (or the first day) to end (or the last)"""
+    totals: Dict[date, List[float]] = {}
+    for day, *values in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        key = bucket_start(day, bucket)
+        total = totals.setdefault(key, [0] * len(fields))
+        for i, value in enumerate(values):
+            total[i] += value
+    if not totals and (start is None or end is None):
+        return []
+    
+    first = bucket_start(start if start is not None else min(totals), bucket)
+    last = bucket_start(end if end is not None else max(totals), bucket)
+    series = []
+    current = first
+    while current <= last:
+        if len(series) >= settings.SPENDING_MAX_BUCKETS:
+            raise InvalidRangeException(
+                f"more than {settings.SPENDING_MAX_BUCKETS} {bucket} buckets requested; narrow the range or use a coarser bucket"
+            )
+        values = totals.get(current)
+        point = {"start": current}
+        point.update(zip(fields, values) if values else ((field, 0) for field in fields))
+        series.append(point)
+        current = next_bucket(current, bucket)
+    return series
+
+def _check_range(bucket: str, start: Optional[date], end: Optional[date]):
+    if bucket not in BUCKETS:
+        raise InvalidRangeException(f"bucket must be one of {', '.join(BUCKETS)}")
+    if start is not None and end is not None and start > end:
+        raise InvalidRangeException("start must not be after end")
+
+def _in_range(query, day_column, start: Optional[date], end: Optional[date]):
+    if start is not None:
+        query = query.where(day_column >= start)
+    if end is not None:
+        query = query.where(day_column <= end)
+    return query
+
+class SpendRollupService:
+    """Daily spend rollups per group and per member, and time series built from them.
+    
+    group_daily_spend and user_daily_spend hold one row per UTC day with spending
+    in it. The outbox applies each expense's amount, payer and split shares to them
+    (negated on delete) in the same transaction as its balance updates, so reads
+    never touch the expense tables: a series over years aggregates at most a few
+    thousand day rows. Closing a period leaves the rollups alone; they cover the
+    archive as well as the open period.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def apply(self, group_id: int, rollup: Dict[str, Any], sign: float = 1.0):
+        """Add (sign 1) or remove (sign -1) one expense's rollup payload; the caller commits under group_write_lock"""
+        day = date.fromisoformat(rollup["day"])
+        count = int(sign)
+        
+        group_row = self.db.get(GroupDailySpend, (group_id, day))
+        if group_row is None:
+            group_row = GroupDailySpend(group_id=group_id, day=day, expense_count=0, total_amount=0.0)
+            self.db.add(group_row)
+        group_row.expense_count += count
+        group_row.total_amount += sign * rollup["amount"]
+        self._drop_if_empty(group_row, group_row.expense_count)
+        
+        changes: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0, 0, 0.0])
+        payer = changes[rollup["paid_by_user_id"]]
+        payer[0] += count
+        payer[1] += sign * rollup["amount"]
+        for user_id, share in rollup["shares"]:
+            changes[user_id][2] += count
+            changes[user_id][3] += sign * share
+        
+        # Every touched member's row in one query rather than a lookup each
+        existing = {
+            row.user_id: row
+            for row in self.db.execute(
+                select(UserDailySpend).where(
+                    UserDailySpend.group_id == group_id,
+                    UserDailySpend.day == day,
+                    UserDailySpend.user_id.in_(list(changes))
+                )
+            ).scalars()
+        }
+        for user_id, (paid_count, paid_amount, share_count, share_amount) in changes.items():
+            user_row = existing.get(user_id)
+            if user_row is None:
+                user_row = UserDailySpend(
+                    group_id=group_id, user_id=user_id, day=day,
+                    paid_count=0, paid_amount=0.0, share_count=0, share_amount=0.0
+                )
+                self.db.add(user_row)
+            user_row.paid_count += paid_count
+            user_row.paid_amount += paid_amount
+            user_row.share_count += share_count
+            user_row.share_amount += share_amount
+            self._drop_if_empty(user_row, user_row.paid_count + user_row.share_count)
+    
+    def _drop_if_empty(self, row, count: int):
+        if count > 0:
+            return
+        if row in self.db.new:
+            self.db.expunge(row)
+        else:
+            self.db.delete(row)
+    
+    def rebuild(self, group_id: int) -> int:
+        """Recompute a group's rollups from its live and archived expenses; the caller holds the group's write lock.
+        
+        Returns the number of group day rows written.
+        """
+        self.db.execute(delete(GroupDailySpend).where(GroupDailySpend.group_id == group_id).execution_options(synchronize_session=False))
+        self.db.execute(delete(UserDailySpend).where(UserDailySpend.group_id == group_id).execution_options(synchronize_session=False))
+        
+        group_days: Dict[date, List[float]] = defaultdict(lambda: [0, 0.0])
+        user_days: Dict[Tuple[int, date], List[float]] = defaultdict(lambda: [0, 0.0, 0, 0.0])
+        expense_sources = (
+            select(Expense.created_at, Expense.amount, Expense.paid_by_user_id).where(Expense.group_id == group_id),
+            select(ArchivedExpense.created_at, ArchivedExpense.amount, ArchivedExpense.paid_by_user_id).where(ArchivedExpense.group_id == group_id)
+        )
+        for query in expense_sources:
+            for created_at, amount, paid_by_user_id in self.db.execute(query.execution_options(yield_per=10_000)):
+                day = spend_day(created_at)
+                group_days[day][0] += 1
+                group_days[day][1] += amount
+                user_days[(paid_by_user_id, day)][0] += 1
+                user_days[(paid_by_user_id, day)][1] += amount
+        
+        split_sources = (
+            select(Expense.created_at, ExpenseSplit.user_id, ExpenseSplit.amount)
+            .join(Expense, ExpenseSplit.expense_id == Expense.id)
+            .where(Expense.group_id == group_id),
+            select(ArchivedExpense.created_at, ArchivedExpenseSplit.user_id, ArchivedExpenseSplit.amount)
+            .join(
+                ArchivedExpense,
+                (ArchivedExpenseSplit.checkpoint_id == ArchivedExpense.checkpoint_id)
+                & (ArchivedExpenseSplit.expense_id == ArchivedExpense.expense_id)
+            )
+            .where(ArchivedExpense.group_id == group_id)
+        )
+        for query in split_sources:
+            for created_at, user_id, share in self.db.execute(query.execution_options(yield_per=10_000)):
+                user_day = user_days[(user_id, spend_day(created_at))]
+                user_day[2] += 1
+                user_day[3] += share
+        
+        if group_days:
+            self.db.execute(GroupDailySpend.__table__.insert(), [
+                {"group_id": group_id, "day": day, "expense_count": count, "total_amount": amount}
+                for day, (count, amount) in sorted(group_days.items())
+            ])
+        if user_days:
+            self.db.execute(UserDailySpend.__table__.insert(), [
+                {
+                    "group_id": group_id, "user_id": user_id, "day": day,
+                    "paid_count": paid_count, "paid_amount": paid_amount,
+                    "share_count": share_count, "share_amount": share_amount
+                }
+                for (user_id, day), (paid_count, paid_amount, share_count, share_amount) in sorted(user_days.items())
+            ])
+        return len(group_days)
+    
+    def group_series(self, group_id: int, bucket: str = "day", start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Any]:
+        """The group's expense count and total per bucket, with zero buckets filled in"""
+        _check_range(bucket, start, end)
+        if not self.db.get(Group, group_id):
+            raise GroupNotFound(group_id)
+        query = _in_range(
+            select(GroupDailySpend.day, GroupDailySpend.expense_count, GroupDailySpend.total_amount)
+            .where(GroupDailySpend.group_id == group_id),
+            GroupDailySpend.day, start, end
+        )
+        series = _bucket_series(self.db.execute(query), ("expense_count", "total_amount"), bucket, start, end)
+        return {"group_id": group_id, "bucket": bucket, "series": series}
+    
+    def group_member_totals(self, group_id: int, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Per member: paid and share totals over the range, largest share first"""
+        query = _in_range(
+            select(
+                UserDailySpend.user_id,
+                User.name,
+                func.sum(UserDailySpend.paid_count),
+                func.sum(UserDailySpend.paid_amount),
+                func.sum(UserDailySpend.share_count),
+                func.sum(UserDailySpend.share_amount)
+            )
+            .join(User, UserDailySpend.user_id == User.id)
+            .where(UserDailySpend.group_id == group_id)
+            .group_by(UserDailySpend.user_id, User.name),
+            UserDailySpend.day, start, end
+        )
+        totals = [
+            {
+                "user": {"id": user_id, "name": name},
+                "paid_count": paid_count,
+                "paid_amount": paid_amount,
+                "share_count": share_count,
+                "share_amount": share_amount
+            }
+            for user_id, name, paid_count, paid_amount, share_count, share_amount in self.db.execute(query)
+        ]
+        totals.sort(key=lambda row: -row["share_amount"])
+        return totals
+    
+    def user_series(
+        self,
+        user_id: int,
+        bucket: str = "day",
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        group_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """What the user paid and their share of expenses per bucket, across their groups or in one"""
+        _check_range(bucket, start, end)
+        if not self.db.get(User, user_id):
+            raise UserNotFound(user_id)
+        query = (
+            select(
+                UserDailySpend.day,
+                func.sum(UserDailySpend.paid_count),
+                func.sum(UserDailySpend.paid_amount),
+                func.sum(UserDailySpend.share_count),
+                func.sum(UserDailySpend.share_amount)
+            )
+            .where(UserDailySpend.user_id == user_id)
+            .group_by(UserDailySpend.day)
+        )
+        if group_id is not None:
+            query = query.where(UserDailySpend.group_id == group_id)
+        series = _bucket_series(
+            self.db.execute(_in_range(query, UserDailySpend.day, start, end)),
+            ("paid_count", "paid_amount", "share_count", "share_amount"),
+            bucket, start, end
+        )
+        return {"user_id": user_id, "group_id": group_id, "bucket": bucket, "series": series}
\ No newline at end of file
@@ -1,4 +1,6 @@
 from typing import List, Dict, Tuple
+import time
+from app.core.metrics import settlement_solver_duration
 from app.schemas.balance import SettlementSuggestion, BalanceDetail
 from app.schemas.user import User
 
@@ -9,6 +11,7 @@ class BalanceOptimizer:
         Optimize settlements to minimize the number of transactions needed.
         Uses a greedy approach to match debtors with creditors.
         """
+        started = time.perf_counter()
         
         # Calculate net balances for each user
         net_balances: Dict[int, float] = {}
@@ -66,4 +69,5 @@ class BalanceOptimizer:
             else:
                 creditors[0] = (creditor_id, remaining_credit)
         
+        settlement_solver_duration.observe(value=time.perf_counter() - started)
         return settlements
\ No newline at end of file
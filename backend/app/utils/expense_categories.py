@@ -0,0 +1,102 @@
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+from app.core.config import settings
+
+OTHER = "other"
+UNCATEGORISED = "uncategorised"  # reported for expenses written before categories, until the backfill reaches them
+
+# Category keywords, matched against whole words of the description. On a tie the
+# category listed first wins, so the more specific categories come first.
+KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "rent": ("rent", "mortgage", "lease", "landlord", "deposit"),
+    "utilities": (
+        "electricity", "electric", "water", "internet", "wifi", "broadband", "utility", "utilities",
+        "heating", "power", "phone", "mobile", "council"
+    ),
+    "groceries": (
+        "grocery", "groceries", "supermarket", "costco", "aldi", "lidl", "tesco", "safeway", "kroger",
+        "walmart", "produce", "milk", "eggs", "bread", "vegetables", "fruit"
+    ),
+    "dining": (
+        "restaurant", "dinner", "lunch", "breakfast", "brunch", "pizza", "sushi", "burger", "burgers",
+        "takeout", "takeaway", "cafe", "coffee", "starbucks", "bar", "drinks", "beer", "wine", "pub",
+        "tacos", "ramen", "curry", "bbq", "snacks", "food", "meal", "doordash", "ubereats", "deliveroo"
+    ),
+    "transport": (
+        "uber", "lyft", "taxi", "cab", "gas", "fuel", "petrol", "diesel", "parking", "toll", "tolls",
+        "train", "bus", "metro", "subway", "tram", "fare", "ferry", "car", "bike", "scooter"
+    ),
+    "travel": (
+        "flight", "flights", "airfare", "airline", "airport", "hotel", "airbnb", "hostel", "motel",
+        "resort", "booking", "trip", "vacation", "holiday", "visa", "luggage", "cruise", "camping"
+    ),
+    "entertainment": (
+        "movie", "movies", "cinema", "film", "concert", "tickets", "ticket", "netflix", "spotify",
+        "game", "games", "bowling", "museum", "show", "theatre", "theater", "party", "karaoke",
+        "festival", "club", "golf", "ski"
+    ),
+    "health": (
+        "pharmacy", "doctor", "medicine", "medical", "dentist", "hospital", "gym", "insurance",
+        "prescription", "clinic", "vet"
+    ),
+    "shopping": (
+        "amazon", "clothes", "clothing", "shoes", "gift", "gifts", "ikea", "target", "store", "mall",
+        "furniture", "electronics", "decorations", "supplies"
+    ),
+}
+
+# Multi-word phrases that override the keywords they contain ("gas bill" isn't fuel)
+PHRASES: Dict[str, str] = {
+    "gas bill": "utilities",
+    "phone bill": "utilities",
+    "water bill": "utilities",
+    "electric bill": "utilities",
+    "internet bill": "utilities",
+    "car rental": "travel",
+    "rental car": "travel",
+    "plane tickets": "travel",
+    "train tickets": "transport",
+    "bus tickets": "transport",
+    "movie tickets": "entertainment",
+    "concert tickets": "entertainment",
+    "ice cream": "dining",
+    "happy hour": "dining",
+    "cleaning supplies": "groceries",
+    "security deposit": "rent",
+}
+
+CATEGORIES: Tuple[str, ...] = (*KEYWORDS, OTHER)
+
+_CATEGORY_RANK = {category: rank for rank, category in enumerate(CATEGORIES)}
+_KEYWORD_CATEGORY = {keyword: category for category, keywords in KEYWORDS.items() for keyword in keywords}
+_PHRASE_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(phrase) for phrase in sorted(PHRASES, key=len, reverse=True)) + r")\b")
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+def normalise_description(description: str) -> str:
+    """Lower-cased words only, so "Uber #1234" and "uber" share a cache entry"""
+    return " ".join(_WORD_PATTERN.findall(description.lower()))
+
+@lru_cache(maxsize=settings.EXPENSE_CATEGORY_CACHE_SIZE)
+def _categorise_normalised(text: str) -> str:
+    phrase = _PHRASE_PATTERN.search(text)
+    if phrase:
+        return PHRASES[phrase.group(0)]
+    
+    votes: Dict[str, int] = {}
+    for word in text.split():
+        category = _KEYWORD_CATEGORY.get(word)
+        if category is None and word.endswith("s"):
+            category = _KEYWORD_CATEGORY.get(word[:-1])
+        if category is not None:
+            votes[category] = votes.get(category, 0) + 1
+    if not votes:
+        return OTHER
+    return min(votes, key=lambda category: (-votes[category], _CATEGORY_RANK[category]))
+
+def categorise(description: str) -> str:
+    """The expense category for a description, from the rule tables; memoised per normalised description"""
+    return _categorise_normalised(normalise_description(description))
+
+def cache_info():
+    return _categorise_normalised.cache_info()
\ No newline at end of file
@@ -0,0 +1,44 @@
+from typing import Any, Dict, List, Set
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+
+class NormalizedUsers:
+    """Turn compact rows' nested {"id", "name"} user references into *_id fields plus one users table"""
+    
+    USER_KEYS = ("paid_by_user", "user", "owes_user", "owed_to_user")
+    
+    @staticmethod
+    def extract(rows: List[Dict[str, Any]]) -> Set[int]:
+        """Replace user references in place (nested row lists too); returns the referenced user ids"""
+        user_ids: Set[int] = set()
+        pending = list(rows)
+        while pending:
+            row = pending.pop()
+            for key, value in list(row.items()):
+                if key in NormalizedUsers.USER_KEYS and isinstance(value, dict):
+                    del row[key]
+                    row[f"{key}_id"] = value["id"]
+                    user_ids.add(value["id"])
+                elif isinstance(value, list):
+                    pending.extend(item for item in value if isinstance(item, dict))
+        return user_ids
+    
+    @staticmethod
+    async def build(db: AsyncSession, key: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """{"users": [...], key: rows} with every referenced user loaded once, in one query"""
+        user_ids = NormalizedUsers.extract(rows)
+        users = []
+        if user_ids:
+            users = (await db.execute(
+                select(User.id, User.name, User.email, User.created_at, User.updated_at)
+                .where(User.id.in_(sorted(user_ids)))
+                .order_by(User.id)
+            )).all()
+        return {
+            "users": [
+                {"id": user_id, "name": name, "email": email, "created_at": created_at, "updated_at": updated_at}
+                for user_id, name, email, created_at, updated_at in users
+            ],
+            key: rows
+        }
\ No newline at end of file
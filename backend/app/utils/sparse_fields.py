@@ -0,0 +1,25 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+from fastapi import HTTPException, status
+
+class SparseFields:
+    @staticmethod
+    def parse(fields: Optional[str], allowed: Iterable[str]) -> Optional[Set[str]]:
+        """Parse a `?fields=a,b,c` parameter, rejecting names the resource doesn't have"""
+        if not fields:
+            return None
+        
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return requested
+    
+    @staticmethod
+    def select(rows: List[Dict[str, Any]], fields: Optional[Set[str]]) -> List[Dict[str, Any]]:
+        """Project pre-shaped row dicts down to the requested fields"""
+        if fields is None:
+            return rows
+        return [{key: row[key] for key in row if key in fields} for row in rows]
\ No newline at end of file
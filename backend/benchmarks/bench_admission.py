@@ -0,0 +1,109 @@
+"""Latency of cheap endpoints while expensive ones are flooded, with and without admission control.
+
+Usage (from backend/):
+    python -m benchmarks.bench_admission [--flood 32] [--probes 4] [--duration 10]
+
+Seeds a dataset, then for ADMISSION_ENABLED=false and =true starts the app under
+uvicorn in a subprocess and runs two client pools for --duration seconds:
+
+- --flood clients hammer GET /balances/analytics/balances (a low priority route)
+  as the most active users
+- --probes clients time GET /groups/{id}, a cheap route that admission control
+  never touches
+
+Reports probe latency percentiles and how the flood's requests were answered
+(200, 429 rate limited, 503 shed). Uses DATABASE_URL when set, otherwise a
+throwaway SQLite file.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_admission.db")
+
+import httpx  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registers every model on Base.metadata)
+from app.core.config import settings  # noqa: E402
+from app.database import SessionLocal, create_tables  # noqa: E402
+from benchmarks.datagen import Dataset, seed_dataset  # noqa: E402
+from benchmarks.load_suite import percentile, start_server  # noqa: E402
+
+
+async def flood(client: httpx.AsyncClient, user_ids: List[int], stop_at: float, outcomes: Counter, seed: int):
+    rng = random.Random(seed)
+    while time.perf_counter() < stop_at:
+        response = await client.get(f"{settings.API_V1_STR}/balances/analytics/balances", params={"user_id": rng.choice(user_ids)})
+        outcomes[response.status_code] += 1
+        if response.status_code in (429, 503):
+            # Well-behaved clients back off; a short pause keeps the pressure on
+            await asyncio.sleep(0.05)
+
+
+async def probe(client: httpx.AsyncClient, group_ids: List[int], stop_at: float, latencies: List[float], seed: int):
+    rng = random.Random(seed)
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        response = await client.get(f"{settings.API_V1_STR}/groups/{rng.choice(group_ids)}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+
+
+async def run_once(base_url: str, dataset: Dataset, args) -> Dict[str, object]:
+    busiest_users = sorted(dataset.user_ids, key=lambda user_id: -sum(user_id in members for members in dataset.members.values()))[:50]
+    outcomes: Counter = Counter()
+    latencies: List[float] = []
+    limits = httpx.Limits(max_connections=args.flood + args.probes)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        stop_at = time.perf_counter() + args.duration
+        await asyncio.gather(
+            *(flood(client, busiest_users, stop_at, outcomes, args.seed + i) for i in range(args.flood)),
+            *(probe(client, dataset.group_ids, stop_at, latencies, args.seed + 1000 + i) for i in range(args.probes))
+        )
+    latencies.sort()
+    return {
+        "probe_requests": len(latencies),
+        "probe_p50": percentile(latencies, 50),
+        "probe_p95": percentile(latencies, 95),
+        "probe_p99": percentile(latencies, 99),
+        "flood": dict(outcomes)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flood", type=int, default=32, help="clients calling the analytics endpoint")
+    parser.add_argument("--probes", type=int, default=4, help="clients timing a cheap endpoint")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--groups", type=int, default=300)
+    parser.add_argument("--expenses", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    create_tables()
+    with SessionLocal() as db:
+        dataset = seed_dataset(db, users=args.users, groups=args.groups, expenses=args.expenses, seed=args.seed)
+    
+    print(f"{args.flood} analytics clients, {args.probes} probe clients, {args.duration:.0f}s each")
+    print(f"{'admission':<10} {'probes':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  analytics responses")
+    for enabled in (False, True):
+        os.environ["ADMISSION_ENABLED"] = str(enabled).lower()
+        process, base_url = start_server(settings.DATABASE_URL, workers=1)
+        try:
+            result = asyncio.run(run_once(base_url, dataset, args))
+        finally:
+            process.terminate()
+            process.wait()
+        flood_summary = ", ".join(f"{status}: {count}" for status, count in sorted(result["flood"].items()))
+        print(f"{'on' if enabled else 'off':<10} {result['probe_requests']:>7} {result['probe_p50']:>8.1f} "
+              f"{result['probe_p95']:>8.1f} {result['probe_p99']:>8.1f}  {flood_summary}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
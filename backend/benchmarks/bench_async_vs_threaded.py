@@ -0,0 +1,112 @@
+"""Throughput of the threaded (sync Session) path vs the async (AsyncSession) path.
+
+Both variants serve the same group balances and expense list through their
+respective services, mounted side by side on a bench app, and are driven
+in-process at increasing concurrency.
+
+Usage (from backend/):
+    python -m benchmarks.bench_async_vs_threaded [--concurrency 10 100 500] [--requests 2000]
+
+Point DATABASE_URL at Postgres for representative numbers; SQLite serialises
+connections and mostly measures its own locking.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_async.db")
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import Base, SessionLocal, async_engine, engine, get_async_db, get_db  # noqa: E402
+from app.services.balance_service import AsyncBalanceService, BalanceService  # noqa: E402
+from app.services.expense_service import AsyncExpenseService, ExpenseService  # noqa: E402
+from benchmarks.datagen import seed_large_group  # noqa: E402
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/threaded/{group_id}/balances")
+def threaded_balances(group_id: int, db: Session = Depends(get_db)):
+    return BalanceService(db).get_group_balance_rows(group_id)
+
+
+@bench_app.get("/async/{group_id}/balances")
+async def async_balances(group_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await AsyncBalanceService(db).get_group_balance_rows(group_id)
+
+
+@bench_app.get("/threaded/{group_id}/expenses")
+def threaded_expenses(group_id: int, db: Session = Depends(get_db)):
+    return ExpenseService(db).get_group_expense_rows(group_id, include_splits=False)
+
+
+@bench_app.get("/async/{group_id}/expenses")
+async def async_expenses(group_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await AsyncExpenseService(db).get_group_expense_rows(group_id, include_splits=False)
+
+
+async def drive(url: str, concurrency: int, total: int):
+    transport = httpx.ASGITransport(app=bench_app)
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(url)
+    
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                target = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(target)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def run_matrix(group_id: int, concurrency_levels, total: int):
+    # One event loop for the whole run; the async engine's pool is bound to it
+    print(f"{'endpoint':<10} {'path':<9} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for endpoint in ("balances", "expenses"):
+        for concurrency in concurrency_levels:
+            for path in ("threaded", "async"):
+                result = await drive(f"/{path}/{group_id}/{endpoint}", concurrency, total)
+                print(f"{endpoint:<10} {path:<9} {concurrency:>5} {result['rps']:>9.0f} "
+                      f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+    # Close pooled async connections while their loop is still running
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=200)
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        group_id, _ = seed_large_group(db, members=args.members, expenses=args.expenses)
+    
+    asyncio.run(run_matrix(group_id, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
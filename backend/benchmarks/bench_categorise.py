@@ -0,0 +1,135 @@
+"""Expense categorisation: classifier cost, memoisation and the backfill job.
+
+Usage (from backend/):
+    python -m benchmarks.bench_categorise [--expenses 200000] [--workers 0,2,4]
+
+Seeds one group and gives its expenses realistic descriptions: a few hundred
+merchants and phrases, many carrying receipt numbers or dates, so raw descriptions
+are mostly distinct while their normalised forms repeat (--distinct makes every
+one unique, the worst case for the memo). Then reports:
+
+- classifier throughput over every description without memoisation, with a cold
+  cache and with a warm one
+- the backfill job (app.jobs.categorise_expenses) for each --workers value, from
+  all-NULL categories
+- the category distribution, GET /groups/{id}/expense-categories and the time to
+  build the insights prompt, which now carries those totals
+
+Uses DATABASE_URL when set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_categorise.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, update  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.jobs.categorise_expenses import run as run_backfill  # noqa: E402
+from app.models.expense import Expense  # noqa: E402
+from app.services.llm_service import LLMService  # noqa: E402
+from app.utils import expense_categories  # noqa: E402
+from benchmarks.datagen import seed_large_group  # noqa: E402
+
+MERCHANTS = (
+    "Uber", "Lyft", "Taxi", "Shell gas", "Parking garage", "Train fare", "Metro card", "Ferry",
+    "Costco", "Trader Joe's groceries", "Safeway", "Aldi", "Milk and eggs", "Farmers market produce",
+    "Dinner at Luigi's", "Pizza night", "Sushi", "Brunch", "Coffee", "Starbucks", "Beers at the pub",
+    "Takeout curry", "Ramen", "Happy hour", "Ice cream", "Tacos", "BBQ supplies",
+    "Rent", "Security deposit", "Electric bill", "Water bill", "Internet", "Phone bill", "Council tax",
+    "Hotel", "Airbnb", "Flights", "Car rental", "Hostel", "Airport shuttle", "Camping gear",
+    "Movie tickets", "Concert tickets", "Netflix", "Spotify", "Bowling", "Museum", "Karaoke", "Golf",
+    "Pharmacy", "Dentist", "Gym membership", "Vet",
+    "Amazon order", "IKEA furniture", "Birthday gift", "Clothes", "Cleaning supplies",
+    "Misc", "Split from last week", "Reimbursement", "Stuff", "Team thing",
+)
+PLACES = ("", "", "", " Lisbon", " downtown", " with Sam", " for the trip", " Friday", " (shared)")
+
+
+def random_description(rng: random.Random, distinct: bool) -> str:
+    description = rng.choice(MERCHANTS) + rng.choice(PLACES)
+    if distinct:
+        # A made-up word makes every normalised description unique: the memo never hits
+        return description + " " + "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(10))
+    roll = rng.random()
+    if roll < 0.4:
+        description += f" #{rng.randint(1000, 99999)}"
+    elif roll < 0.6:
+        description += f" {rng.randint(1, 28)}/{rng.randint(1, 12)}"
+    return description
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=200_000)
+    parser.add_argument("--workers", default="0,2,4", help="comma-separated backfill pool sizes to compare")
+    parser.add_argument("--batch", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--distinct", action="store_true", help="worst case: no two descriptions normalise alike")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(args.seed)
+    with SessionLocal() as db:
+        group_id, _ = seed_large_group(db, members=args.members, expenses=args.expenses, seed=args.seed)
+        expense_ids = db.execute(select(Expense.id).where(Expense.group_id == group_id)).scalars().all()
+        descriptions = {expense_id: random_description(rng, args.distinct) for expense_id in expense_ids}
+        db.execute(update(Expense), [{"id": expense_id, "description": text} for expense_id, text in descriptions.items()])
+        db.commit()
+    
+    texts = list(descriptions.values())
+    distinct_raw = len(set(texts))
+    distinct_normalised = len({expense_categories.normalise_description(text) for text in texts})
+    print(f"{len(texts)} expenses, {distinct_raw} distinct descriptions, {distinct_normalised} after normalising")
+    
+    unmemoised = expense_categories._categorise_normalised.__wrapped__
+    no_cache_ms, _ = timed(lambda: [unmemoised(expense_categories.normalise_description(text)) for text in texts])
+    expense_categories._categorise_normalised.cache_clear()
+    cold_ms, _ = timed(lambda: [expense_categories.categorise(text) for text in texts])
+    warm_ms, _ = timed(lambda: [expense_categories.categorise(text) for text in texts])
+    print(f"classifier: {no_cache_ms:.0f} ms unmemoised, {cold_ms:.0f} ms cold cache, {warm_ms:.0f} ms warm "
+          f"({warm_ms * 1000 / len(texts):.2f} us per description); {expense_categories.cache_info()}")
+    
+    print(f"{'workers':>7} {'backfill s':>11} {'rows/s':>9}")
+    for workers in (int(value) for value in args.workers.split(",")):
+        with SessionLocal() as db:
+            db.execute(update(Expense).values(category=None))
+            db.commit()
+        expense_categories._categorise_normalised.cache_clear()
+        start = time.perf_counter()
+        counts = run_backfill(workers, args.batch, reclassify=False)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>7} {elapsed:>11.2f} {counts['expenses'] / elapsed:>9.0f}", flush=True)
+    
+    with TestClient(app) as client:
+        url = f"{settings.API_V1_STR}/groups/{group_id}/expense-categories"
+        timings = []
+        for _ in range(5):
+            elapsed_ms, response = timed(lambda: client.get(url))
+            response.raise_for_status()
+            timings.append(elapsed_ms)
+        print(f"GET /groups/{{id}}/expense-categories: {statistics.median(timings):.1f} ms")
+        for row in response.json():
+            print(f"  {row['category']:<14} {row['expense_count']:>7} {row['total_amount']:>14,.2f} {row['share']:>7.1%}")
+    
+    with SessionLocal() as db:
+        prompt_ms, (_, total_expenses, _, prompt) = timed(lambda: LLMService(db)._create_insights_prompt(group_id))
+    print(f"insights prompt over {total_expenses} expenses built in {prompt_ms:.1f} ms ({len(prompt)} chars)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""Local intent hit rate, accuracy and latency on a set of sample chat queries.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chat_intents [--repeat 20] [--verbose]
+
+Seeds two small groups of named users, then runs every sample through
+LocalIntentEngine. Queries marked None must fall through to the LLM. Exits 1
+if any query is routed differently from its label. Uses DATABASE_URL when
+set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_chat_intents.db")
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+import app.main  # noqa: E402,F401  (registers every model on Base.metadata)
+from app.models.expense import SplitType  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.expense import ExpenseCreate, ExpenseSplitCreate  # noqa: E402
+from app.schemas.group import GroupCreate  # noqa: E402
+from app.services.chat_intents import LocalIntentEngine, intent_metrics  # noqa: E402
+from app.services.expense_service import ExpenseService  # noqa: E402
+from app.services.group_service import GroupService  # noqa: E402
+
+SAMPLE_QUERIES = [
+    ("How much do I owe in total?", "total_owing"),
+    ("how much do i owe", "total_owing"),
+    ("Who do I owe money?", "total_owing"),
+    ("What do I owe?", "total_owing"),
+    ("How much am I owed?", "total_owed"),
+    ("Who owes me?", "total_owed"),
+    ("How much do people owe me in total?", "total_owed"),
+    ("What's my balance?", "net_balance"),
+    ("what is my net balance", "net_balance"),
+    ("Am I settled up?", "net_balance"),
+    ("How much does Bob owe me?", "person_owes_me"),
+    ("how much does carol owe me", "person_owes_me"),
+    ("How much do I owe Dave?", "owe_person"),
+    ("Can you tell me how much I owe Bob?", "owe_person"),
+    ("What were my recent expenses?", "recent_expenses"),
+    ("Show my last 3 expenses", "recent_expenses"),
+    ("latest expenses", "recent_expenses"),
+    ("Show me expenses from the Weekend Trip group", "group_expenses"),
+    ("expenses in flat", "group_expenses"),
+    ("Who paid the most in my groups?", "top_payer"),
+    ("who paid the most in the weekend trip", "top_payer"),
+    ("Which groups am I in?", "my_groups"),
+    ("list my groups", "my_groups"),
+    # Open-ended or unresolvable: must reach the LLM
+    ("Should I settle up with Bob before the trip?", None),
+    ("Summarise our spending habits", None),
+    ("Why is my balance so high?", None),
+    ("How much does Zed owe me?", None),
+    ("Show me expenses from the Ski group", None),
+    ("Can you split a $90 dinner three ways?", None),
+    ("What's the cheapest way to settle everyone?", None),
+    ("Any tips to spend less on groceries?", None),
+]
+
+
+def seed() -> int:
+    """Two groups of named users with a few exact-split expenses; returns Alice's id"""
+    with SessionLocal() as db:
+        tag = int(time.time() * 1000)
+        users = {}
+        for name in ("Alice", "Bob", "Carol Smith", "Dave"):
+            user = User(name=name, email=f"{name.split()[0].lower()}-{tag}@example.com")
+            db.add(user)
+            db.flush()
+            users[name.split()[0]] = user.id
+        db.commit()
+        
+        group_service = GroupService(db)
+        trip = group_service.create_group(GroupCreate(
+            name="Weekend Trip", member_ids=[users["Alice"], users["Bob"], users["Carol"]]
+        ))
+        flat = group_service.create_group(GroupCreate(
+            name="Flat", member_ids=[users["Alice"], users["Bob"], users["Dave"]]
+        ))
+        
+        expense_service = ExpenseService(db)
+        for group, description, payer, shares in [
+            (trip, "Dinner", "Alice", {"Alice": 30, "Bob": 30, "Carol": 30}),
+            (trip, "Taxi", "Bob", {"Alice": 10, "Bob": 10, "Carol": 10}),
+            (flat, "Groceries", "Dave", {"Alice": 25, "Bob": 25, "Dave": 25}),
+            (flat, "Internet", "Alice", {"Alice": 20, "Dave": 20}),
+        ]:
+            expense_service.create_expense(group.id, ExpenseCreate(
+                description=description,
+                amount=sum(shares.values()),
+                paid_by_user_id=users[payer],
+                split_type=SplitType.EXACT,
+                splits=[ExpenseSplitCreate(user_id=users[name], amount=amount) for name, amount in shares.items()]
+            ))
+        return users["Alice"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--verbose", action="store_true", help="print every answer")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    user_id = seed()
+    
+    mismatches = 0
+    local_queries = []
+    with SessionLocal() as db:
+        local_engine = LocalIntentEngine(db)
+        for query, expected in SAMPLE_QUERIES:
+            intent, answer = local_engine.resolve(query, user_id)
+            if intent != expected:
+                mismatches += 1
+                print(f"[MISMATCH] {query!r}: expected {expected}, got {intent}")
+            if intent is not None:
+                local_queries.append(query)
+            if args.verbose:
+                print(f"{query}\n  -> [{intent or 'llm'}] {answer or ''}")
+        hit_rate = intent_metrics.snapshot()["hit_rate"]
+        
+        local_ms = []
+        for query in local_queries:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                local_engine.resolve(query, user_id)
+                timings.append((time.perf_counter() - start) * 1000)
+            local_ms.append(statistics.median(timings))
+    
+    total = len(SAMPLE_QUERIES)
+    print(f"{total} sample queries, {total - mismatches} routed as labelled")
+    print(f"local hit rate {hit_rate:.0%} ({len(local_queries)}/{total}); median local answer "
+          f"{statistics.median(local_ms):.2f} ms (max {max(local_ms):.2f} ms)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""Payload size and encode time of large-group responses per shape and content encoding.
+
+Usage (from backend/):
+    python -m benchmarks.bench_compression [--members 150] [--expenses 10000] [--repeat 5]
+
+Seeds one large group and requests its expense list and balances in each response
+shape (default nested users, compact id/name references, normalized users side
+table) with each Accept-Encoding (identity, gzip, br). Reports bytes on the wire,
+the median request time in-process, and how long compressing the identity body
+takes on its own at the configured level/quality. Uses DATABASE_URL when set,
+otherwise a throwaway SQLite file.
+"""
+import argparse
+import gzip
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_compression.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.core.compression import brotli  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from benchmarks.datagen import seed_large_group  # noqa: E402
+
+SHAPES = (("default", {}), ("compact", {"compact": "true"}), ("normalized", {"normalized": "true"}))
+
+
+def time_request(client: TestClient, url: str, params, encoding: str, repeat: int):
+    timings = []
+    response = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, params=params, headers={"Accept-Encoding": encoding})
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    # httpx has already decoded the body; Content-Length is what went over the wire
+    wire_bytes = int(response.headers.get("content-length", len(response.content)))
+    return statistics.median(timings), wire_bytes, response.headers.get("content-encoding", "identity")
+
+
+def compress_ms(body: bytes, encoding: str, repeat: int) -> float:
+    if encoding == "gzip":
+        compress = lambda: gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)  # noqa: E731
+    else:
+        compress = lambda: brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)  # noqa: E731
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compress()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=150)
+    parser.add_argument("--expenses", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        group_id, user_id = seed_large_group(db, members=args.members, expenses=args.expenses)
+    
+    prefix = settings.API_V1_STR
+    cases = [
+        ("expenses", f"{prefix}/groups/{group_id}/expenses", {}),
+        ("balances", f"{prefix}/balances/groups/{group_id}/balances", {"user_id": user_id}),
+    ]
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    
+    client = TestClient(app)
+    print(f"gzip level {settings.COMPRESSION_GZIP_LEVEL}, brotli quality {settings.COMPRESSION_BROTLI_QUALITY}")
+    print(f"{'endpoint':<10} {'shape':<11} {'encoding':<9} {'bytes':>10} {'vs default':>11} {'request ms':>11} {'compress ms':>12}")
+    for name, url, base_params in cases:
+        default_bytes = None
+        for shape, shape_params in SHAPES:
+            params = {**base_params, **shape_params}
+            body = client.get(url, params=params, headers={"Accept-Encoding": "identity"}).content
+            for encoding in encodings:
+                median_ms, wire_bytes, sent_encoding = time_request(client, url, params, encoding, args.repeat)
+                if default_bytes is None:
+                    default_bytes = wire_bytes
+                encode_ms = compress_ms(body, encoding, args.repeat) if sent_encoding != "identity" else 0.0
+                print(f"{name:<10} {shape:<11} {sent_encoding:<9} {wire_bytes:>10} {wire_bytes / default_bytes:>10.1%} "
+                      f"{median_ms:>11.1f} {encode_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
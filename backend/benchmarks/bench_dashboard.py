@@ -0,0 +1,101 @@
+"""The client's home screen: per-resource fan-out vs GET /users/{id}/dashboard.
+
+Usage (from backend/):
+    python -m benchmarks.bench_dashboard [--users 20] [--repeat 5]
+
+Seeds a skewed dataset and, for the --users most active users, loads the home
+screen three ways: the fan-out the client used to make (user, balance summary,
+and per group the group, its balances and its expenses), one dashboard call, and
+a dashboard revalidation with If-None-Match. Reports median time, requests, SQL
+statements and bytes per screen. Uses DATABASE_URL when set, otherwise a
+throwaway SQLite file.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_dashboard.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import SessionLocal, async_engine, create_tables, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from benchmarks.datagen import seed_dataset  # noqa: E402
+
+statements = 0
+
+
+def count_statement(*_):
+    global statements
+    statements += 1
+
+
+def fan_out(client: TestClient, user_id: int, group_ids: List[int]) -> Tuple[int, int]:
+    prefix = settings.API_V1_STR
+    urls = [f"{prefix}/users/{user_id}", f"{prefix}/users/{user_id}/balances"]
+    for group_id in group_ids:
+        urls += [f"{prefix}/groups/{group_id}", f"{prefix}/groups/{group_id}/balances", f"{prefix}/groups/{group_id}/expenses?compact=true"]
+    size = 0
+    for url in urls:
+        response = client.get(url)
+        response.raise_for_status()
+        size += len(response.content)
+    return len(urls), size
+
+
+def dashboard(client: TestClient, user_id: int, etag=None) -> Tuple[int, int]:
+    headers = {"If-None-Match": etag} if etag else {}
+    response = client.get(f"{settings.API_V1_STR}/users/{user_id}/dashboard", headers=headers)
+    assert response.status_code == (304 if etag else 200), response.status_code
+    return 1, len(response.content)
+
+
+def measure(load: Callable[[], Tuple[int, int]], repeat: int):
+    global statements
+    timings = []
+    for _ in range(repeat):
+        statements = 0
+        start = time.perf_counter()
+        requests, size = load()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), requests, statements, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="most active users to load the screen for")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    create_tables()
+    with SessionLocal() as db:
+        dataset = seed_dataset(db, users=2_000, groups=300, expenses=20_000, seed=args.seed)
+    for bound in (engine, async_engine.sync_engine):
+        event.listen(bound, "before_cursor_execute", count_statement)
+    
+    groups_of = {user_id: [group_id for group_id, members in dataset.members.items() if user_id in members] for user_id in dataset.user_ids}
+    busiest = sorted(dataset.user_ids, key=lambda user_id: -len(groups_of[user_id]))[:args.users]
+    
+    totals = {name: [] for name in ("fan-out", "dashboard", "dashboard 304")}
+    with TestClient(app) as client:
+        for user_id in busiest:
+            etag = client.get(f"{settings.API_V1_STR}/users/{user_id}/dashboard").headers["etag"]
+            totals["fan-out"].append(measure(lambda: fan_out(client, user_id, groups_of[user_id]), args.repeat))
+            totals["dashboard"].append(measure(lambda: dashboard(client, user_id), args.repeat))
+            totals["dashboard 304"].append(measure(lambda: dashboard(client, user_id, etag), args.repeat))
+    
+    print(f"{len(busiest)} users in {statistics.mean(len(groups_of[user_id]) for user_id in busiest):.1f} groups on average")
+    print(f"{'screen load':<14} {'median ms':>10} {'requests':>9} {'SQL':>6} {'bytes':>9}")
+    for name, results in totals.items():
+        print(f"{name:<14} {statistics.median(r[0] for r in results):>10.1f} {statistics.mean(r[1] for r in results):>9.1f} "
+              f"{statistics.mean(r[2] for r in results):>6.1f} {statistics.mean(r[3] for r in results):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
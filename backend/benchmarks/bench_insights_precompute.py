@@ -0,0 +1,202 @@
+"""Run the insights precompute job against the local LLM stub and check its guarantees.
+
+Usage (from backend/):
+    python -m benchmarks.bench_insights_precompute [--groups 40] [--concurrency 4] [--rate 10]
+
+Seeds small groups (one of them inactive for 90 days), then checks that:
+
+- a first run generates insights for every active group, within the concurrency and rate limits
+- a second run skips every group because no data version changed
+- after new expenses only the touched groups are regenerated
+- a run cancelled mid-way resumes from its checkpoint and finishes the remaining groups
+- GET /groups/{id}/insights serves the stored insights without calling the LLM
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+with socket.socket() as probe:
+    probe.bind(("127.0.0.1", 0))
+    STUB_PORT = probe.getsockname()[1]
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_insights_precompute.db")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("OPENAI_BASE_URL", f"http://127.0.0.1:{STUB_PORT}/v1")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from sqlalchemy import delete, update  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.llm_client import close_llm_client  # noqa: E402
+from app.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.jobs.precompute_insights import InsightsPrecomputeJob  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.expense import Expense, SplitType  # noqa: E402
+from app.models.insight import GroupInsight, InsightsPrecomputeRun  # noqa: E402
+from app.schemas.expense import ExpenseCreate, ExpenseSplitCreate  # noqa: E402
+from app.services.expense_service import ExpenseService  # noqa: E402
+from app.services.llm_service import insights_cache  # noqa: E402
+from benchmarks.datagen import seed_large_group  # noqa: E402
+from benchmarks.llm_stub_server import stub_app  # noqa: E402
+
+
+def start_stub() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(stub_app, host="127.0.0.1", port=STUB_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def seed(groups: int):
+    """Returns (active group ids, payer per group)"""
+    group_ids, payers = [], {}
+    with SessionLocal() as db:
+        for i in range(groups + 1):
+            group_id, user_id = seed_large_group(db, members=6, expenses=30, seed=1000 + i)
+            group_ids.append(group_id)
+            payers[group_id] = user_id
+        # The last group has been quiet for 90 days and falls outside the activity window
+        db.execute(
+            update(Expense)
+            .where(Expense.group_id == group_ids[-1])
+            .values(created_at=datetime.now(timezone.utc) - timedelta(days=90))
+        )
+        db.commit()
+    return group_ids[:-1], payers
+
+
+def check(label: str, ok: bool, detail: str) -> int:
+    print(f"[{'ok' if ok else 'FAIL'}] {label}: {detail}")
+    return 0 if ok else 1
+
+
+async def run(groups: int, concurrency: int, rate: float, latency: float) -> int:
+    failures = 0
+    group_ids, payers = seed(groups)
+    job = lambda: InsightsPrecomputeJob(days=30, concurrency=concurrency, rate_per_second=rate, batch_size=concurrency * 2)
+    
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{STUB_PORT}") as stub:
+        await stub.post("/stub/config", json={"latency": latency, "fail_rate": 0})
+        
+        # 1. Cold run
+        await stub.post("/stub/reset")
+        snapshot = await job().run()
+        stats = (await stub.get("/stub/stats")).json()
+        failures += check(
+            "cold run",
+            snapshot["generated"] == len(group_ids) and snapshot["total_groups"] == len(group_ids)
+            and stats["max_in_flight"] <= concurrency and snapshot["generated_per_second"] <= rate * 1.05,
+            f"{snapshot['generated']}/{len(group_ids)} generated in {snapshot['active_seconds']:.2f}s, "
+            f"{snapshot['generated_per_second']} calls/s (limit {rate}), peak in flight "
+            f"{stats['max_in_flight']}/{concurrency}"
+        )
+        
+        # 2. Nothing changed
+        await stub.post("/stub/reset")
+        snapshot = await job().run()
+        stats = (await stub.get("/stub/stats")).json()
+        failures += check(
+            "unchanged run",
+            snapshot["skipped"] == len(group_ids) and stats["calls"] == 0,
+            f"{snapshot['skipped']} skipped, {stats['calls']} LLM calls, "
+            f"{snapshot['groups_per_second']} groups/s"
+        )
+        
+        # 3. Only touched groups are regenerated
+        touched = group_ids[::max(len(group_ids) // 3, 1)][:3]
+        with SessionLocal() as db:
+            for group_id in touched:
+                ExpenseService(db).create_expense(group_id, ExpenseCreate(
+                    description="late addition",
+                    amount=12,
+                    paid_by_user_id=payers[group_id],
+                    split_type=SplitType.EQUAL,
+                    splits=[ExpenseSplitCreate(user_id=payers[group_id])]
+                ))
+        await stub.post("/stub/reset")
+        snapshot = await job().run()
+        failures += check(
+            "incremental run",
+            snapshot["generated"] == len(touched) and snapshot["skipped"] == len(group_ids) - len(touched),
+            f"{snapshot['generated']} regenerated after touching {len(touched)} groups"
+        )
+        
+        # 4. Cancel mid-run, then resume from the checkpoint
+        with SessionLocal() as db:
+            db.execute(delete(GroupInsight))
+            db.commit()
+        await stub.post("/stub/reset")
+        task = asyncio.create_task(job().run())
+        while True:
+            await asyncio.sleep(0.05)
+            with SessionLocal() as db:
+                latest = db.query(InsightsPrecomputeRun).order_by(InsightsPrecomputeRun.id.desc()).first()
+                if latest.processed >= concurrency * 2:
+                    break
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        with SessionLocal() as db:
+            interrupted = db.get(InsightsPrecomputeRun, latest.id)
+            checkpointed, status = interrupted.processed, interrupted.status
+        
+        snapshot = await job().run()
+        stats = (await stub.get("/stub/stats")).json()
+        # Calls cut off by the cancellation were lost, and at most one batch is redone
+        failures += check(
+            "resumed run",
+            status == "interrupted" and snapshot["run_id"] == latest.id and snapshot["status"] == "completed"
+            and snapshot["processed"] == len(group_ids) and stats["calls"] <= len(group_ids) + concurrency * 2,
+            f"cancelled at {checkpointed}/{len(group_ids)} ({status}), run {snapshot['run_id']} resumed and "
+            f"completed with {snapshot['processed']} processed, {stats['calls']} LLM calls in total"
+        )
+        
+        # 5. The endpoint serves precomputed insights without an LLM call
+        insights_cache.clear()
+        await stub.post("/stub/reset")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            start = time.perf_counter()
+            response = await client.get(f"{settings.API_V1_STR}/groups/{group_ids[0]}/insights")
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            health = (await client.get("/health/insights")).json()
+        stats = (await stub.get("/stub/stats")).json()
+        failures += check(
+            "first view",
+            response.status_code == 200 and "insights" in response.json() and stats["calls"] == 0,
+            f"answered in {elapsed_ms:.1f} ms with {stats['calls']} LLM calls; "
+            f"/health/insights reports run {health['precompute']['run_id']} {health['precompute']['status']}"
+        )
+    
+    await close_llm_client()
+    await async_engine.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=10.0, help="LLM calls per second")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub latency per call")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    server = start_stub()
+    failures = asyncio.run(run(args.groups, args.concurrency, args.rate, args.latency))
+    server.should_exit = True
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""Exercise the async LLM client against the local stub server.
+
+Starts benchmarks.llm_stub_server in a background thread, then drives the chat
+endpoint in-process and checks that:
+
+- /health stays responsive while LLM calls are in flight (no blocked event loop)
+- no more than LLM_MAX_CONCURRENCY calls reach the stub at once
+- injected 503s are retried, and slow calls are cut off at LLM_TIMEOUT_SECONDS
+
+Usage (from backend/):
+    python -m benchmarks.bench_llm_client [--requests 40] [--latency 0.3]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+with socket.socket() as probe:
+    probe.bind(("127.0.0.1", 0))
+    STUB_PORT = probe.getsockname()[1]
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_llm_client.db")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("OPENAI_BASE_URL", f"http://127.0.0.1:{STUB_PORT}/v1")
+os.environ.setdefault("LLM_MAX_CONCURRENCY", "4")
+os.environ.setdefault("LLM_TIMEOUT_SECONDS", "2")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.llm_client import close_llm_client  # noqa: E402
+from app.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from benchmarks.llm_stub_server import stub_app  # noqa: E402
+
+
+def start_stub() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(stub_app, host="127.0.0.1", port=STUB_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def chat_round(client: httpx.AsyncClient, stub: httpx.AsyncClient, user_id: int, requests: int):
+    """Fire concurrent chat requests while sampling /health latency"""
+    await stub.post("/stub/reset")
+    done = asyncio.Event()
+    health_ms = []
+    
+    async def sample_health():
+        while not done.is_set():
+            start = time.perf_counter()
+            (await client.get("/health")).raise_for_status()
+            health_ms.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.01)
+    
+    sampler = asyncio.create_task(sample_health())
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(
+        client.post(f"{settings.API_V1_STR}/users/{user_id}/chat", json={"message": "How much do I owe?"})
+        for _ in range(requests)
+    ))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await sampler
+    
+    answers = [response.json()["response"] for response in responses]
+    errors = [answer for answer in answers if answer.startswith("Sorry")]
+    return elapsed, errors, max(health_ms, default=0.0), (await stub.get("/stub/stats")).json()
+
+
+async def run(user_id: int, requests: int, latency: float, fail_rate: float) -> int:
+    failures = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client, \
+            httpx.AsyncClient(base_url=f"http://127.0.0.1:{STUB_PORT}") as stub:
+        # 1. Concurrency cap and event-loop responsiveness
+        await stub.post("/stub/config", json={"latency": latency, "fail_rate": 0})
+        elapsed, errors, health_max, stats = await chat_round(client, stub, user_id, requests)
+        floor = requests / settings.LLM_MAX_CONCURRENCY * latency
+        ok = not errors and stats["max_in_flight"] <= settings.LLM_MAX_CONCURRENCY and health_max < latency * 1000
+        failures += not ok
+        print(f"[{'ok' if ok else 'FAIL'}] {requests} chats in {elapsed:.2f}s (floor {floor:.2f}s), "
+              f"peak in flight {stats['max_in_flight']}/{settings.LLM_MAX_CONCURRENCY}, "
+              f"max /health {health_max:.1f} ms, {len(errors)} errors")
+        
+        # 2. Retries with jitter absorb transient 503s
+        await stub.post("/stub/config", json={"latency": 0.05, "fail_rate": fail_rate})
+        elapsed, errors, _, stats = await chat_round(client, stub, user_id, requests)
+        ok = stats["failures"] > 0 and len(errors) < stats["failures"]
+        failures += not ok
+        print(f"[{'ok' if ok else 'FAIL'}] fail rate {fail_rate:.0%}: {stats['failures']} injected 503s, "
+              f"{len(errors)} surfaced after {settings.LLM_MAX_RETRIES} retries")
+        
+        # 3. Per-call timeout
+        await stub.post("/stub/config", json={"latency": settings.LLM_TIMEOUT_SECONDS + 1, "fail_rate": 0})
+        elapsed, errors, _, _ = await chat_round(client, stub, user_id, 1)
+        budget = (settings.LLM_TIMEOUT_SECONDS + settings.LLM_RETRY_BACKOFF_SECONDS * 2 ** settings.LLM_MAX_RETRIES) \
+            * (settings.LLM_MAX_RETRIES + 1)
+        ok = len(errors) == 1 and elapsed < budget
+        failures += not ok
+        print(f"[{'ok' if ok else 'FAIL'}] slow upstream gave up after {elapsed:.2f}s "
+              f"({settings.LLM_MAX_RETRIES + 1} attempts x {settings.LLM_TIMEOUT_SECONDS:.0f}s timeout)")
+    
+    await close_llm_client()
+    await async_engine.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(name="llm-bench", email=f"llm-bench-{STUB_PORT}@example.com")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    
+    server = start_stub()
+    failures = asyncio.run(run(user_id, args.requests, args.latency, args.fail_rate))
+    server.should_exit = True
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
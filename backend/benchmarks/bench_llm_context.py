@@ -0,0 +1,145 @@
+"""Prompt size and build latency of the chat context: legacy JSON dump vs UserContextBuilder.
+
+Usage (from backend/):
+    python -m benchmarks.bench_llm_context [--groups 3] [--expenses 2000] [--budget 800]
+
+Token counts use tiktoken when it is installed, otherwise the builder's
+4-characters-per-token estimate. Uses DATABASE_URL when set, otherwise a
+throwaway SQLite file.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_llm_context.db")
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+import app.main  # noqa: E402,F401  (registers every model on Base.metadata)
+from app.models.expense import Expense  # noqa: E402
+from app.models.group import Group, GroupMember  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.balance_service import BalanceService  # noqa: E402
+from app.services.group_service import GroupService  # noqa: E402
+from app.services.llm_context import UserContextBuilder, estimate_tokens  # noqa: E402
+from benchmarks.datagen import seed_large_group  # noqa: E402
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+    
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+except ImportError:
+    count_tokens = estimate_tokens
+
+
+def legacy_context(db, user_id: int) -> str:
+    """The context the chat prompt used before UserContextBuilder, kept for comparison"""
+    user = db.query(User).filter(User.id == user_id).first()
+    groups = GroupService(db).get_user_groups(user_id)
+    recent_expenses = (
+        db.query(Expense)
+        .join(Group)
+        .filter(Group.id.in_([g.id for g in groups]))
+        .order_by(Expense.created_at.desc())
+        .limit(10)
+        .all()
+    )
+    balance_summary = BalanceService(db).get_user_balance_summary(user_id)
+    context = {
+        "user": {"id": user.id, "name": user.name, "email": user.email},
+        "groups": [
+            {"id": group.id, "name": group.name, "member_count": len(group.members)}
+            for group in groups
+        ],
+        "recent_expenses": [
+            {
+                "id": expense.id,
+                "description": expense.description,
+                "amount": expense.amount,
+                "group_name": expense.group.name,
+                "paid_by": expense.paid_by_user.name,
+                "created_at": expense.created_at.isoformat()
+            }
+            for expense in recent_expenses
+        ],
+        "balance_summary": {
+            "total_owed": balance_summary.total_owed,
+            "total_owing": balance_summary.total_owing,
+            "net_balance": balance_summary.net_balance
+        }
+    }
+    return json.dumps(context, indent=2), len(context["groups"]) + len(context["recent_expenses"])
+
+
+def measure(build, repeat: int):
+    queries = []
+    
+    def count(*_):
+        queries.append(1)
+    
+    event.listen(engine, "before_cursor_execute", count)
+    timings = []
+    try:
+        for _ in range(repeat):
+            # Fresh session each time, as per request
+            with SessionLocal() as db:
+                start = time.perf_counter()
+                text, rows = build(db)
+                timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return text, rows, statistics.median(timings), len(queries) // repeat
+
+
+def compact_context(db, user_id: int, budget: int):
+    text = UserContextBuilder(db).build(user_id, budget)
+    # Table rows, not titles or the "+N more" notes
+    rows = sum(1 for line in text.splitlines() if "|" in line and not line.endswith(")") and "[" not in line)
+    return text, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=3)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=2000, help="per group")
+    parser.add_argument("--budget", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--show", action="store_true", help="print the compact context")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        group_ids = []
+        for seed in range(args.groups):
+            group_id, user_id = seed_large_group(db, members=args.members, expenses=args.expenses, seed=seed)
+            group_ids.append(group_id)
+        # The last seeded user joins every group
+        db.execute(insert(GroupMember), [{"group_id": group_id, "user_id": user_id} for group_id in group_ids[:-1]])
+        db.commit()
+    
+    variants = [
+        ("legacy json", lambda db: legacy_context(db, user_id)),
+        ("compact", lambda db: compact_context(db, user_id, args.budget)),
+    ]
+    print(f"{'context':<12} {'rows':>5} {'chars':>7} {'tokens':>7} {'tok/row':>8} {'queries':>8} {'build ms':>9}")
+    for name, build in variants:
+        text, rows, build_ms, queries = measure(build, args.repeat)
+        tokens = count_tokens(text)
+        print(f"{name:<12} {rows:>5} {len(text):>7} {tokens:>7} {tokens / max(rows, 1):>8.1f} "
+              f"{queries:>8} {build_ms:>9.2f}")
+    
+    if args.show:
+        with SessionLocal() as db:
+            print()
+            print(UserContextBuilder(db).build(user_id, args.budget))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""Compare expense write latency with synchronous and eventually consistent balance updates.
+
+Usage (from backend/):
+    python -m benchmarks.bench_outbox [--members 50] [--writes 200]
+
+Posts equal-split expenses to one group through the API and reports p50/p95
+write latency for:
+
+- sync: balances updated before the response
+- eventual, worker paused: the request path alone; the backlog is then drained
+  and its throughput reported
+- eventual, worker running: the outbox worker applies events while writes
+  continue, competing for the group's write lock; reports the write-to-applied lag
+
+Uses DATABASE_URL when set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_outbox.db")
+
+import httpx  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.jobs.outbox_worker import OutboxWorker  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.outbox import OutboxEvent  # noqa: E402
+from app.services.outbox_service import OutboxService  # noqa: E402
+from benchmarks.datagen import seed_large_group  # noqa: E402
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def pending_events() -> int:
+    with SessionLocal() as db:
+        return OutboxService(db).status()["pending"]
+
+
+async def wait_until_drained() -> float:
+    start = time.perf_counter()
+    while pending_events():
+        await asyncio.sleep(0.01)
+    return time.perf_counter() - start
+
+
+def last_event_id() -> int:
+    with SessionLocal() as db:
+        return db.execute(select(func.max(OutboxEvent.id))).scalar() or 0
+
+
+def lags_ms(after_id: int):
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(OutboxEvent.created_at, OutboxEvent.processed_at).where(OutboxEvent.id > after_id)
+        ).all()
+    return [(processed_at - created_at).total_seconds() * 1000 for created_at, processed_at in rows]
+
+
+def report(label: str, timings):
+    print(f"{label:<26} {percentile(timings, 0.5):>8.2f} {percentile(timings, 0.95):>8.2f} {max(timings):>8.2f}", flush=True)
+
+
+async def post_expenses(client: httpx.AsyncClient, group_id: int, payer_id: int, writes: int, consistency: str):
+    timings = []
+    url = f"{settings.API_V1_STR}/groups/{group_id}/expenses?consistency={consistency}"
+    body = {"description": "bench", "amount": 120, "paid_by_user_id": payer_id, "split_type": "equal", "splits": [{"user_id": payer_id}]}
+    for _ in range(writes):
+        start = time.perf_counter()
+        response = await client.post(url, json=body)
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return timings
+
+
+async def run(members: int, writes: int):
+    with SessionLocal() as db:
+        group_id, payer_id = seed_large_group(db, members=members, expenses=10)
+    
+    # The app's own worker only runs under its lifespan; this one is paused and resumed at will
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await post_expenses(client, group_id, payer_id, 5, "sync")  # warm up
+        
+        print(f"{writes} writes, {members}-way equal split")
+        print(f"{'mode':<26} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        report("sync", await post_expenses(client, group_id, payer_id, writes, "sync"))
+        
+        report("eventual, worker paused", await post_expenses(client, group_id, payer_id, writes, "eventual"))
+        worker = OutboxWorker(poll_interval=0.01)
+        worker.start()
+        drained = await wait_until_drained()
+        print(f"{'':<26} backlog of {writes} events drained in {drained:.2f}s ({writes / drained:.0f} events/s)")
+        
+        first_id = last_event_id()
+        report("eventual, worker running", await post_expenses(client, group_id, payer_id, writes, "eventual"))
+        await wait_until_drained()
+        await worker.stop()
+        lags = lags_ms(first_id)
+        print(f"{'':<26} write-to-applied lag p50 {percentile(lags, 0.5):.1f} ms, p95 {percentile(lags, 0.95):.1f} ms")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--writes", type=int, default=200)
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    asyncio.run(run(args.members, args.writes))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Hot-path latency on a long-lived group before and after closing its old periods.
+
+Usage (from backend/):
+    python -m benchmarks.bench_period_close [--expenses 50000] [--keep-days 7] [--repeat 5]
+
+Seeds one group with --expenses expenses, one a minute going back in time, then
+times the group's expense list, a balance rebuild and an expense write. It closes
+the period up to --keep-days ago, which moves everything older into the archive
+tables, and times the same requests again plus a page of the archive. Uses
+DATABASE_URL when set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_period_close.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.models.expense import Expense, ExpenseSplit  # noqa: E402
+from benchmarks.datagen import seed_large_group  # noqa: E402
+
+
+def time_call(call, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = call()
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return statistics.median(timings)
+
+
+def table_sizes():
+    with SessionLocal() as db:
+        return (
+            db.execute(select(func.count(Expense.id))).scalar(),
+            db.execute(select(func.count(ExpenseSplit.id))).scalar()
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=50_000)
+    parser.add_argument("--keep-days", type=float, default=7.0, help="history left in the live tables")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        group_id, user_id = seed_large_group(db, members=args.members, expenses=args.expenses)
+    
+    prefix = f"{settings.API_V1_STR}/groups/{group_id}"
+    expense = {"description": "bench", "amount": 30, "paid_by_user_id": user_id, "split_type": "equal", "splits": [{"user_id": user_id}]}
+    client = TestClient(app)
+    cases = [
+        ("expense list (compact)", lambda: client.get(f"{prefix}/expenses", params={"compact": "true"})),
+        ("rebuild balances", lambda: client.post(f"{prefix}/rebuild-balances")),
+        ("add expense", lambda: client.post(f"{prefix}/expenses", json=expense)),
+    ]
+    
+    results = {}
+    for phase in ("before", "after"):
+        if phase == "after":
+            before = datetime.now(timezone.utc) - timedelta(days=args.keep_days)
+            start = time.perf_counter()
+            response = client.post(f"{prefix}/close-period", params={"before": before.isoformat()})
+            response.raise_for_status()
+            print(f"closed the period before {before:%Y-%m-%d %H:%M}: archived {response.json()['expense_count']} expenses "
+                  f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+            cases.append(("archive page (100)", lambda: client.get(f"{prefix}/archive/expenses", params={"limit": 100})))
+        expenses, splits = table_sizes()
+        print(f"{phase}: {expenses} live expenses, {splits} live splits")
+        for name, call in cases:
+            results[(phase, name)] = time_call(call, args.repeat)
+    
+    print(f"{'request':<24} {'before ms':>10} {'after ms':>10}")
+    for name, _ in cases:
+        before_ms = results.get(("before", name))
+        print(f"{name:<24} {before_ms if before_ms is not None else float('nan'):>10.1f} {results[('after', name)]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""Compare the default response_model path with the compact fast path.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--expenses 10000] [--repeat 5]
+
+Uses DATABASE_URL when set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_serialization.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from benchmarks.datagen import seed_large_group  # noqa: E402
+
+
+def time_request(client: TestClient, url: str, repeat: int):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        size = len(response.content)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=150)
+    parser.add_argument("--expenses", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        group_id, user_id = seed_large_group(db, members=args.members, expenses=args.expenses)
+    
+    prefix = settings.API_V1_STR
+    cases = [
+        ("expenses", f"{prefix}/groups/{group_id}/expenses"),
+        ("balances", f"{prefix}/balances/groups/{group_id}/balances?user_id={user_id}"),
+    ]
+    variants = [("default", ""), ("compact", "compact=true"), ("sparse", None)]
+    sparse = {"expenses": "fields=id,amount,paid_by_user,created_at", "balances": "fields=owes_user,amount"}
+    
+    client = TestClient(app)
+    print(f"{'endpoint':<10} {'variant':<8} {'rows':>6} {'median ms':>10} {'bytes':>10}")
+    for name, url in cases:
+        rows = len(client.get(url).json())
+        for variant, query in variants:
+            query = sparse[name] if query is None else query
+            full_url = url if not query else f"{url}{'&' if '?' in url else '?'}{query}"
+            median_ms, size = time_request(client, full_url, args.repeat)
+            print(f"{name:<10} {variant:<8} {rows:>6} {median_ms:>10.1f} {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
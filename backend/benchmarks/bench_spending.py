@@ -0,0 +1,182 @@
+"""Spending time series from the daily rollups versus scanning the expense tables.
+
+Usage (from backend/):
+    python -m benchmarks.bench_spending [--expenses 200000] [--years 5] [--repeat 5]
+
+Seeds one group with --expenses expenses spread evenly over --years years and
+builds its rollups with the rebuild job. For each query it reports the median
+time, rows read and SQL statements of:
+
+- raw: selecting every matching expense (or split) and bucketing it in Python,
+  which is what answering the question took before rollups
+- rollup: SpendRollupService, which aggregates day rows
+
+and checks both give the same series. Finally it times expense writes with and
+without the rollup outbox handler, which is what keeping the rollups current
+costs. Uses DATABASE_URL when set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_spending.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.jobs.rebuild_spend_rollups import rebuild_group  # noqa: E402
+from app.models.expense import Expense, ExpenseSplit  # noqa: E402
+from app.models.group import GroupMember  # noqa: E402
+from app.services import outbox_service  # noqa: E402
+from app.services.spend_rollup_service import SpendRollupService, _bucket_series, spend_day  # noqa: E402
+from benchmarks.datagen import seed_large_group  # noqa: E402
+
+USER_FIELDS = ("paid_count", "paid_amount", "share_count", "share_amount")
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+    
+    def _count(self, *args):
+        self.count += 1
+
+
+def utc_midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def in_days(query, start, end):
+    # The range goes to the database so the (group_id, created_at) index can narrow the scan
+    if start is not None:
+        query = query.where(Expense.created_at >= utc_midnight(start))
+    if end is not None:
+        query = query.where(Expense.created_at < utc_midnight(end + timedelta(days=1)))
+    return query
+
+
+def raw_group_series(db, group_id: int, bucket: str, start=None, end=None):
+    query = in_days(select(Expense.created_at, Expense.amount).where(Expense.group_id == group_id), start, end)
+    rows = [(spend_day(created_at), 1, amount) for created_at, amount in db.execute(query)]
+    return _bucket_series(rows, ("expense_count", "total_amount"), bucket, start, end), len(rows)
+
+
+def raw_user_series(db, user_id: int, bucket: str, start=None, end=None):
+    paid = db.execute(in_days(select(Expense.created_at, Expense.amount).where(Expense.paid_by_user_id == user_id), start, end)).all()
+    shares = db.execute(in_days(
+        select(Expense.created_at, ExpenseSplit.amount)
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .where(ExpenseSplit.user_id == user_id),
+        start, end
+    )).all()
+    rows = [(spend_day(created_at), 1, amount, 0, 0.0) for created_at, amount in paid]
+    rows += [(spend_day(created_at), 0, 0.0, 1, amount) for created_at, amount in shares]
+    return _bucket_series(rows, USER_FIELDS, bucket, start, end), len(rows)
+
+
+def same_series(left, right) -> bool:
+    if len(left) != len(right):
+        return False
+    for a, b in zip(left, right):
+        if a["start"] != b["start"] or any(abs(a[key] - b[key]) > 1e-6 for key in a if key != "start"):
+            return False
+    return True
+
+
+def measure(call, repeat: int, counter: StatementCounter):
+    timings = []
+    statements = 0
+    for _ in range(repeat):
+        before = counter.count
+        start = time.perf_counter()
+        result = call()
+        timings.append((time.perf_counter() - start) * 1000)
+        statements = counter.count - before
+    return statistics.median(timings), statements, result
+
+
+def time_writes(client: TestClient, group_id: int, payer_id: int, members, count: int) -> float:
+    body = {
+        "description": "bench",
+        "amount": 42.0,
+        "paid_by_user_id": payer_id,
+        "split_type": "equal",
+        "splits": [{"user_id": user_id} for user_id in members]
+    }
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.post(f"{settings.API_V1_STR}/groups/{group_id}/expenses", json=body, params={"consistency": "sync"})
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=200_000)
+    parser.add_argument("--years", type=float, default=5.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--writes", type=int, default=200)
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    spacing = timedelta(days=args.years * 365) / args.expenses
+    with SessionLocal() as db:
+        group_id, user_id = seed_large_group(db, members=args.members, expenses=args.expenses, spacing=spacing)
+        members = db.execute(select(GroupMember.user_id).where(GroupMember.group_id == group_id)).scalars().all()
+    
+    start = time.perf_counter()
+    days = rebuild_group(group_id)
+    print(f"{args.expenses} expenses over {args.years:g} years; rollup rebuild wrote {days} group days in {time.perf_counter() - start:.2f}s")
+    
+    last_year = (date.today() - timedelta(days=365), date.today())
+    cases = [
+        ("group by month, all time", "group", "month", None, None),
+        ("group by week, all time", "group", "week", None, None),
+        ("group by day, last year", "group", "day", *last_year),
+        ("user by month, all time", "user", "month", None, None),
+        ("user by week, last year", "user", "week", *last_year),
+    ]
+    counter = StatementCounter()
+    print(f"{'query':<28} {'raw ms':>9} {'rows':>8} {'sql':>4} {'rollup ms':>10} {'sql':>4} {'speedup':>8}  same")
+    with SessionLocal() as db:
+        service = SpendRollupService(db)
+        for label, kind, bucket, first, last in cases:
+            if kind == "group":
+                raw_ms, raw_sql, (raw, rows) = measure(lambda: raw_group_series(db, group_id, bucket, first, last), args.repeat, counter)
+                rollup_ms, rollup_sql, rollup = measure(lambda: service.group_series(group_id, bucket, first, last), args.repeat, counter)
+            else:
+                raw_ms, raw_sql, (raw, rows) = measure(lambda: raw_user_series(db, user_id, bucket, first, last), args.repeat, counter)
+                rollup_ms, rollup_sql, rollup = measure(lambda: service.user_series(user_id, bucket, first, last), args.repeat, counter)
+            print(f"{label:<28} {raw_ms:>9.1f} {rows:>8} {raw_sql:>4} {rollup_ms:>10.2f} {rollup_sql:>4} "
+                  f"{raw_ms / rollup_ms:>7.0f}x  {same_series(raw, rollup['series'])}", flush=True)
+    
+    with TestClient(app) as client:
+        url = f"{settings.API_V1_STR}/groups/{group_id}/spending"
+        endpoint_ms, _, _ = measure(lambda: client.get(url, params={"bucket": "month", "by_member": True}), args.repeat, counter)
+        print(f"GET /groups/{{id}}/spending?bucket=month&by_member=true: {endpoint_ms:.1f} ms")
+        
+        handlers = outbox_service.HANDLERS
+        with_rollups = time_writes(client, group_id, user_id, members, args.writes)
+        outbox_service.HANDLERS = {
+            event_type: tuple(handler for handler in chain if handler is not outbox_service._apply_spend_rollups)
+            for event_type, chain in handlers.items()
+        }
+        try:
+            without_rollups = time_writes(client, group_id, user_id, members, args.writes)
+        finally:
+            outbox_service.HANDLERS = handlers
+        print(f"expense write p50: {without_rollups:.2f} ms without the rollup handler, {with_rollups:.2f} ms with it")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
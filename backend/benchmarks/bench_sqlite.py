@@ -0,0 +1,282 @@
+"""SQLite as a first-class backend: default connections vs the tuned mode, and expense search.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sqlite [--seconds 10] [--processes 2] [--writers 2] [--readers 4] [--expenses 50000]
+
+Runs the same workload against two fresh database files: one with
+SQLITE_TUNING=false (the driver's defaults: rollback journal, FULL sync, every
+session on the primary pool) and one tuned (WAL, the pragmas in
+app/core/sqlite.py, BEGIN IMMEDIATE writers and a query_only reader pool that
+read sessions are routed to). After seeding, --processes processes share the
+file for --seconds, like uvicorn workers, each running
+
+- --writers threads creating expenses through ExpenseService (splits, outbox
+  event and balances in one transaction under the group write lock, which
+  doesn't reach across processes)
+- --readers threads on read sessions, alternating a group's balances and its
+  latest 50 expenses
+
+and the totals report writes/s, reads/s, p50/p99 latency per kind and errors
+("database is locked" when a connection gives up waiting). A last process
+times expense search over realistic descriptions, the FTS5 index against the
+substring scan other dialects fall back to, and --commits single-row
+transactions in a row: what the journal mode and synchronous setting cost a
+commit, which the expense workload's ORM work mostly hides.
+
+With --database-url pointing at an empty PostgreSQL database (it needs psycopg2
+and asyncpg) the same workload runs against it too, searching through the
+tsvector index, for a side-by-side comparison.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+# Common words, rare ones (receipt numbers) and one that never matches: the scan stops
+# early on the first kind and reads the whole group on the others
+SEARCHES = ("pizza", "uber", "hotel lisbon", "dinner", "coffee friday", "rent", "4821", "kayak")
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def seed(args) -> dict:
+    """Create the schema and --groups groups with realistic descriptions; returns {group_id: member ids}"""
+    from sqlalchemy import select, update
+    
+    from app.database import SessionLocal, create_tables
+    from app.models.expense import Expense
+    from app.models.group import GroupMember
+    from benchmarks.bench_categorise import random_description
+    from benchmarks.datagen import seed_large_group
+    
+    create_tables()
+    rng = random.Random(args.seed)
+    groups = {}
+    with SessionLocal() as db:
+        for index in range(args.groups):
+            group_id, _ = seed_large_group(db, members=args.members, expenses=args.expenses // args.groups, seed=args.seed + index)
+            groups[group_id] = db.execute(select(GroupMember.user_id).where(GroupMember.group_id == group_id)).scalars().all()
+        expense_ids = db.execute(select(Expense.id)).scalars().all()
+        db.execute(update(Expense), [{"id": expense_id, "description": random_description(rng, False)} for expense_id in expense_ids])
+        db.commit()
+    return groups
+
+
+def load(args, groups: dict) -> dict:
+    """Writer and reader threads in this process for --seconds; raw latencies and error counts"""
+    from app.database import SessionLocal, read_router
+    from app.schemas.expense import ExpenseCreate
+    from app.services.balance_service import BalanceService
+    from app.services.expense_service import ExpenseService
+    from benchmarks.bench_categorise import random_description
+    from benchmarks.datagen import random_expense_body
+    
+    groups = {int(group_id): members for group_id, members in groups.items()}
+    group_ids = list(groups)
+    stop = threading.Event()
+    report = {"write": [], "read": [], "write_errors": 0, "read_errors": 0, "error_samples": []}
+    lock = threading.Lock()
+    
+    def record(kind: str, started: float, error: Exception = None):
+        with lock:
+            if error is None:
+                report[kind].append((time.perf_counter() - started) * 1000)
+            else:
+                report[f"{kind}_errors"] += 1
+                if len(report["error_samples"]) < 3:
+                    report["error_samples"].append(f"{kind}: {error.__class__.__name__}: {str(error).splitlines()[0]}")
+    
+    def writer(worker: int):
+        thread_rng = random.Random(args.seed * 1000 + args.process * 100 + worker)
+        while not stop.is_set():
+            group_id = thread_rng.choice(group_ids)
+            body = random_expense_body(thread_rng, groups[group_id])
+            body["description"] = random_description(thread_rng, False)
+            started = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    ExpenseService(db).create_expense(group_id, ExpenseCreate(**body))
+                record("write", started)
+            except Exception as e:
+                record("write", started, e)
+    
+    def reader(worker: int):
+        thread_rng = random.Random(args.seed * 2000 + args.process * 100 + worker)
+        turn = 0
+        while not stop.is_set():
+            group_id = thread_rng.choice(group_ids)
+            started = time.perf_counter()
+            try:
+                with SessionLocal(bind=read_router.read_engine(False)) as db:
+                    if turn % 2:
+                        BalanceService(db).get_group_balance_rows(group_id)
+                    else:
+                        ExpenseService(db).get_group_expense_rows(group_id, include_splits=False, limit=50)
+                record("read", started)
+            except Exception as e:
+                record("read", started, e)
+            turn += 1
+    
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return report
+
+
+def probes(args, groups: dict) -> dict:
+    """Expense search in the first group, through the index and through the fallback scan, then
+    --commits single-row transactions one after another: the journal and sync cost of a commit
+    without the ORM work of an expense around it"""
+    from sqlalchemy import Column, Integer, MetaData, String, Table, insert
+    
+    from app.database import SessionLocal, engine
+    from app.services.expense_service import _expense_search_query
+    from app.utils.expense_search import search_terms
+    
+    group_id = int(next(iter(groups)))
+    report = {}
+    with SessionLocal() as db:
+        for label, dialect in (("index", engine.dialect.name), ("scan", "default")):
+            timings = []
+            for _ in range(args.search_rounds):
+                for text in SEARCHES:
+                    query = _expense_search_query(dialect, group_id, search_terms(text), 50)
+                    started = time.perf_counter()
+                    db.execute(query).all()
+                    timings.append((time.perf_counter() - started) * 1000)
+            report[label] = {"p50_ms": percentile(timings, 0.5), "p99_ms": percentile(timings, 0.99)}
+    
+    commits = Table("bench_commits", MetaData(), Column("id", Integer, primary_key=True), Column("payload", String))
+    commits.create(engine, checkfirst=True)
+    timings = []
+    for index in range(args.commits):
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            connection.execute(insert(commits).values(payload=f"commit {index}"))
+        timings.append((time.perf_counter() - started) * 1000)
+    commits.drop(engine)
+    report["commit"] = {"per_second": len(timings) / (sum(timings) / 1000), "p50_ms": percentile(timings, 0.5), "p99_ms": percentile(timings, 0.99)}
+    return report
+
+
+PHASES = {"seed": lambda args, groups: seed(args), "load": load, "probes": probes}
+
+
+def child(phase: str, database_url: str, tuning: bool, args, groups: dict = None, process: int = 0) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "benchmarks.bench_sqlite", "--phase", phase, "--process", str(process),
+        "--groups-json", json.dumps(groups or {}),
+        "--seconds", str(args.seconds), "--writers", str(args.writers), "--readers", str(args.readers),
+        "--groups", str(args.groups), "--members", str(args.members), "--expenses", str(args.expenses),
+        "--search-rounds", str(args.search_rounds), "--commits", str(args.commits), "--seed", str(args.seed),
+    ]
+    env = {**os.environ, "DATABASE_URL": database_url, "SQLITE_TUNING": str(tuning).lower()}
+    env.pop("ASYNC_DATABASE_URL", None)
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=BACKEND, env=env)
+
+
+def result_of(process: subprocess.Popen, label: str):
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"{label} failed:\n{stderr[-2000:]}")
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def run_backend(label: str, database_url: str, tuning: bool, args) -> dict:
+    """Seed, then --processes load processes at once against the same database, then search"""
+    print(f"running {label}...", flush=True)
+    groups = result_of(child("seed", database_url, tuning, args), f"{label} seed")
+    started = time.perf_counter()
+    loads = [child("load", database_url, tuning, args, groups, process) for process in range(args.processes)]
+    reports = [result_of(process, f"{label} load") for process in loads]
+    elapsed = time.perf_counter() - started
+    summary = {"error_samples": sum((report["error_samples"] for report in reports), [])[:3]}
+    for kind in ("write", "read"):
+        timings = sum((report[kind] for report in reports), [])
+        summary[kind] = {
+            "per_second": len(timings) / args.seconds,
+            "p50_ms": percentile(timings, 0.5),
+            "p99_ms": percentile(timings, 0.99),
+            "errors": sum(report[f"{kind}_errors"] for report in reports),
+        }
+    summary["wall_seconds"] = elapsed
+    summary["probes"] = result_of(child("probes", database_url, tuning, args, groups), f"{label} probes")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--processes", type=int, default=2, help="load processes sharing the database, like uvicorn workers")
+    parser.add_argument("--writers", type=int, default=2, help="writer threads per process")
+    parser.add_argument("--readers", type=int, default=4, help="reader threads per process")
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=50_000, help="seeded across the groups")
+    parser.add_argument("--search-rounds", type=int, default=5)
+    parser.add_argument("--commits", type=int, default=500, help="single-row transactions in the commit probe")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="also run against this (PostgreSQL) database")
+    parser.add_argument("--phase", choices=sorted(PHASES), help=argparse.SUPPRESS)
+    parser.add_argument("--process", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--groups-json", default="{}", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.phase:
+        print(json.dumps(PHASES[args.phase](args, json.loads(args.groups_json))))
+        return
+    
+    workdir = tempfile.mkdtemp()
+    reports = {
+        "sqlite default": run_backend("sqlite default", f"sqlite:///{workdir}/default.db", False, args),
+        "sqlite tuned": run_backend("sqlite tuned", f"sqlite:///{workdir}/tuned.db", True, args),
+    }
+    if args.database_url:
+        reports[args.database_url.split(":")[0]] = run_backend("--database-url", args.database_url, True, args)
+    
+    print(f"\n{args.processes} processes x ({args.writers} writers + {args.readers} readers) for {args.seconds:.0f}s "
+          f"over {args.expenses} seeded expenses")
+    print(f"{'backend':<16} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>9} {'errors':>7} "
+          f"{'reads/s':>9} {'p50 ms':>8} {'p99 ms':>9} {'errors':>7}")
+    for label, report in reports.items():
+        write, read = report["write"], report["read"]
+        print(f"{label:<16} {write['per_second']:>9.1f} {write['p50_ms']:>8.1f} {write['p99_ms']:>9.1f} {write['errors']:>7} "
+              f"{read['per_second']:>9.1f} {read['p50_ms']:>8.1f} {read['p99_ms']:>9.1f} {read['errors']:>7}")
+        for sample in report["error_samples"]:
+            print(f"    {sample}")
+    
+    print(f"\nexpense search, {len(SEARCHES)} queries x {args.search_rounds} on a {args.expenses // args.groups}-expense group; "
+          f"{args.commits} single-row commits")
+    print(f"{'backend':<16} {'index p50':>10} {'index p99':>10} {'scan p50':>10} {'scan p99':>10} "
+          f"{'commits/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, report in reports.items():
+        index, scan, commit = report["probes"]["index"], report["probes"]["scan"], report["probes"]["commit"]
+        print(f"{label:<16} {index['p50_ms']:>10.2f} {index['p99_ms']:>10.2f} {scan['p50_ms']:>10.2f} {scan['p99_ms']:>10.2f} "
+              f"{commit['per_second']:>10.0f} {commit['p50_ms']:>8.2f} {commit['p99_ms']:>8.2f}")
+    
+    default, tuned = reports["sqlite default"], reports["sqlite tuned"]
+    if default["write"]["per_second"] and default["read"]["per_second"]:
+        print(f"\ntuned vs default: writes x{tuned['write']['per_second'] / default['write']['per_second']:.2f}, "
+              f"reads x{tuned['read']['per_second'] / default['read']['per_second']:.2f}, "
+              f"commits x{tuned['probes']['commit']['per_second'] / default['probes']['commit']['per_second']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""Process startup: import time of app.main and cold start of a uvicorn worker.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--runs 5] [--top 12]
+
+Every measurement runs in a fresh interpreter, so nothing is cached between runs:
+
+- import: median wall time of `import app.main`, which optional heavy packages it
+  pulled in, and whether it still imports with the database unreachable
+- importtime: the slowest top-level imports under app.main (from -X importtime)
+- cold start: spawn uvicorn and time until /health answers (live), until
+  /health/ready answers 200 (ready) and the first API request completes
+
+Uses DATABASE_URL when set, otherwise a throwaway SQLite file.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).parent.parent
+HEAVY_MODULES = ("openai", "httpx", "asyncpg", "psycopg2", "brotli", "pyinstrument")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def last_error(stderr: str) -> str:
+    lines = stderr.strip().splitlines()
+    return next((line for line in reversed(lines) if "Error" in line), lines[-1] if lines else "")
+
+
+def run_python(args, database_url: str, **kwargs):
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, cwd=BACKEND,
+        env={**os.environ, "DATABASE_URL": database_url}, **kwargs
+    )
+
+
+def measure_import(database_url: str, runs: int):
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        result = run_python(["-c", IMPORT_SCRIPT], database_url)
+        if result.returncode != 0:
+            raise RuntimeError(last_error(result.stderr))
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(report["ms"])
+        loaded = report["loaded"]
+    return statistics.median(timings), loaded
+
+
+def import_without_database() -> str:
+    # A SQLite file in a directory that doesn't exist: any connection attempt fails
+    result = run_python(["-c", "import app.main"], "sqlite:////nonexistent/startup/bench.db")
+    if result.returncode == 0:
+        return "imports"
+    return "fails: " + last_error(result.stderr)
+
+
+def slowest_imports(database_url: str, top: int):
+    """(cumulative us, module) for modules imported directly by app.main, slowest first"""
+    result = run_python(["-X", "importtime", "-c", "import app.main"], database_url)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        # Direct children of app.main are indented by exactly two spaces
+        if name.startswith("  ") and not name.startswith("   "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_for(url: str, process, deadline: float, status_code: int = 200) -> float:
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == status_code:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {process.returncode}")
+        time.sleep(0.005)
+    raise RuntimeError(f"timed out waiting for {url}")
+
+
+def cold_start(database_url: str):
+    """Seconds from spawning uvicorn until live, ready and the first API response"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env={**os.environ, "DATABASE_URL": database_url}, cwd=BACKEND
+    )
+    try:
+        deadline = time.monotonic() + 60
+        live = wait_for(f"{base_url}/health", process, deadline)
+        ready = wait_for(f"{base_url}/health/ready", process, deadline)
+        httpx.get(f"{base_url}/api/v1/users/", timeout=10.0).raise_for_status()
+        first_request = time.perf_counter()
+    finally:
+        process.terminate()
+        process.wait()
+    return live - start, ready - start, first_request - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+    
+    database_url = os.environ.get("DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench_startup.db"
+    # Schema setup is a deployment step now, not something importing the app does
+    migrate = run_python(["-c", "import app.main; from app.database import create_tables; create_tables()"], database_url)
+    if migrate.returncode != 0:
+        raise RuntimeError(last_error(migrate.stderr))
+    
+    import_ms, loaded = measure_import(database_url, args.runs)
+    print(f"import app.main: {import_ms:.0f} ms median over {args.runs} runs; heavy modules loaded: {', '.join(loaded) or 'none'}")
+    print(f"import with the database unreachable: {import_without_database()}")
+    
+    print("slowest imports under app.main:")
+    for cumulative, name in slowest_imports(database_url, args.top):
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+    
+    starts = [cold_start(database_url) for _ in range(args.runs)]
+    print(f"cold start (median of {args.runs}): live {statistics.median(s[0] for s in starts):.2f}s, "
+          f"ready {statistics.median(s[1] for s in starts):.2f}s, "
+          f"first request {statistics.median(s[2] for s in starts):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
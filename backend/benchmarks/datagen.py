@@ -0,0 +1,288 @@
+"""Seeded synthetic data for the benchmark scripts.
+
+Rows are written with bulk inserts so a 10k-expense group seeds in seconds.
+
+    seed_large_group  one big group of equal-split expenses
+    seed_dataset      a whole population: skewed group sizes and activity, every split type
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.balance import Balance
+from app.models.expense import Expense, ExpenseSplit, SplitType
+from app.models.group import Group, GroupMember
+from app.models.user import User
+from app.schemas.expense import ExpenseSplitCreate
+from app.utils.split_calculator import SplitCalculator
+
+INSERT_CHUNK = 5_000
+
+# Share of generated expenses per split type
+SPLIT_TYPE_MIX = {SplitType.EQUAL: 0.6, SplitType.PERCENTAGE: 0.2, SplitType.EXACT: 0.2}
+
+
+@dataclass
+class Dataset:
+    """What seed_dataset created, for picking realistic request targets"""
+    user_ids: List[int]
+    group_ids: List[int]
+    members: Dict[int, List[int]]  # group id -> member ids, in insertion order
+    expense_counts: Dict[int, int]  # group id -> expenses seeded
+    split_type_counts: Dict[str, int] = field(default_factory=dict)
+    
+    def expense_body(self, rng: random.Random, group_id: int) -> Dict[str, object]:
+        return random_expense_body(rng, self.members[group_id])
+    
+    def summary(self) -> Dict[str, object]:
+        sizes = sorted(len(members) for members in self.members.values())
+        counts = sorted(self.expense_counts.values())
+        return {
+            "users": len(self.user_ids),
+            "groups": len(self.group_ids),
+            "group_size_median": sizes[len(sizes) // 2],
+            "group_size_max": sizes[-1],
+            "expenses": sum(counts),
+            "expenses_busiest_group": counts[-1],
+            "split_types": self.split_type_counts,
+        }
+
+
+def seed_large_group(
+    db: Session,
+    members: int = 150,
+    expenses: int = 10_000,
+    seed: int = 42,
+    spacing: timedelta = timedelta(minutes=1)
+) -> Tuple[int, int]:
+    """Create one group with equal-split expenses and the balances they produce.
+    
+    Expenses go back in time from now, one every `spacing`.
+    Returns (group_id, a member user_id).
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    
+    first_user_id = (db.query(User.id).order_by(User.id.desc()).limit(1).scalar() or 0) + 1
+    db.execute(insert(User), [
+        {"id": first_user_id + i, "name": f"user-{seed}-{i}", "email": f"user-{seed}-{i}@example.com"}
+        for i in range(members)
+    ])
+    user_ids = list(range(first_user_id, first_user_id + members))
+    
+    group = Group(name=f"bench-group-{seed}", description="synthetic benchmark group")
+    db.add(group)
+    db.flush()
+    db.execute(insert(GroupMember), [{"group_id": group.id, "user_id": user_id} for user_id in user_ids])
+    
+    first_expense_id = (db.query(Expense.id).order_by(Expense.id.desc()).limit(1).scalar() or 0) + 1
+    expense_rows = []
+    split_rows = []
+    pair_totals: Dict[Tuple[int, int], float] = {}
+    
+    for i in range(expenses):
+        expense_id = first_expense_id + i
+        payer_id = rng.choice(user_ids)
+        participants = rng.sample(user_ids, rng.randint(2, 5))
+        amount = round(rng.uniform(5, 500), 2)
+        share = round(amount / len(participants), 2)
+        
+        expense_rows.append({
+            "id": expense_id,
+            "group_id": group.id,
+            "paid_by_user_id": payer_id,
+            "description": f"expense {i}",
+            "amount": amount,
+            "split_type": SplitType.EQUAL,
+            "created_at": now - spacing * i,
+        })
+        for user_id in participants:
+            split_rows.append({"expense_id": expense_id, "user_id": user_id, "amount": share})
+            if user_id != payer_id:
+                # Net every pair onto (low id, high id); positive means low owes high
+                key = (min(user_id, payer_id), max(user_id, payer_id))
+                pair_totals[key] = pair_totals.get(key, 0) + (share if user_id < payer_id else -share)
+    
+    db.execute(insert(Expense), expense_rows)
+    db.execute(insert(ExpenseSplit), split_rows)
+    
+    balance_rows = []
+    for (low_id, high_id), net in pair_totals.items():
+        if abs(net) <= 0.01:
+            continue
+        owes_id, owed_to_id = (low_id, high_id) if net > 0 else (high_id, low_id)
+        balance_rows.append({
+            "group_id": group.id,
+            "owes_user_id": owes_id,
+            "owed_to_user_id": owed_to_id,
+            "amount": round(abs(net), 2),
+        })
+    db.execute(insert(Balance), balance_rows)
+    
+    db.commit()
+    return group.id, user_ids[0]
+
+
+def _skewed(rng: random.Random, alpha: float, minimum: int, maximum: int) -> int:
+    """Pareto-distributed integer: mostly near the minimum, with a long tail"""
+    return min(maximum, int(minimum * rng.paretovariate(alpha)))
+
+
+def _pick_members(rng: random.Random, user_ids: List[int], weights: List[float], size: int) -> List[int]:
+    # Popular users land in many groups; draw by weight until the group is full
+    chosen: Dict[int, None] = {}
+    while len(chosen) < size:
+        for user_id in rng.choices(user_ids, weights, k=size - len(chosen)):
+            chosen[user_id] = None
+    return list(chosen)
+
+
+def _random_split(rng: random.Random, split_type: SplitType, amount: float, members: List[int]) -> List[ExpenseSplitCreate]:
+    """A request body's splits, shaped the way the API expects for each split type"""
+    if split_type == SplitType.EQUAL:
+        return [ExpenseSplitCreate(user_id=members[0])]  # equal splits cover every member
+    
+    participants = rng.sample(members, rng.randint(min(2, len(members)), min(6, len(members))))
+    if split_type == SplitType.PERCENTAGE:
+        cuts = sorted(rng.sample(range(1, 100), len(participants) - 1))
+        shares = [high - low for low, high in zip([0] + cuts, cuts + [100])]
+        return [ExpenseSplitCreate(user_id=user_id, percentage=share) for user_id, share in zip(participants, shares)]
+    
+    cents = round(amount * 100)
+    cuts = sorted(rng.sample(range(1, cents), len(participants) - 1)) if cents > len(participants) else []
+    if len(cuts) != len(participants) - 1:
+        return [ExpenseSplitCreate(user_id=participants[0], amount=amount)]
+    shares = [(high - low) / 100 for low, high in zip([0] + cuts, cuts + [cents])]
+    return [ExpenseSplitCreate(user_id=user_id, amount=share) for user_id, share in zip(participants, shares)]
+
+
+def random_expense_body(rng: random.Random, members: List[int]) -> Dict[str, object]:
+    """JSON body for POST /groups/{id}/expenses with a split type drawn from SPLIT_TYPE_MIX"""
+    split_type = rng.choices(list(SPLIT_TYPE_MIX), list(SPLIT_TYPE_MIX.values()))[0]
+    amount = round(max(1.0, rng.lognormvariate(3.5, 0.9)), 2)
+    return {
+        "description": f"load {split_type.value} expense",
+        "amount": amount,
+        "paid_by_user_id": rng.choice(members),
+        "split_type": split_type.value,
+        "splits": [split.model_dump(exclude_none=True) for split in _random_split(rng, split_type, amount, members)],
+    }
+
+
+def seed_dataset(
+    db: Session,
+    users: int = 2_000,
+    groups: int = 300,
+    expenses: int = 50_000,
+    max_group_size: int = 200,
+    days: int = 180,
+    seed: int = 42
+) -> Dataset:
+    """Create a population of users and groups with realistic skew, plus the balances they produce.
+    
+    Group sizes and group activity are both Pareto-distributed, so most groups are a
+    handful of people with a few expenses while a few are large and busy. Expenses mix
+    every SplitType (see SPLIT_TYPE_MIX) and are split by SplitCalculator exactly as the
+    API would split them; balances are the per-pair netting of those splits.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    
+    first_user_id = (db.query(User.id).order_by(User.id.desc()).limit(1).scalar() or 0) + 1
+    user_ids = list(range(first_user_id, first_user_id + users))
+    for start in range(0, users, INSERT_CHUNK):
+        db.execute(insert(User), [
+            {"id": user_id, "name": f"user-{seed}-{user_id}", "email": f"user-{seed}-{user_id}@example.com"}
+            for user_id in user_ids[start:start + INSERT_CHUNK]
+        ])
+    popularity = [1 / (rank + 1) ** 0.6 for rank in range(users)]
+    
+    first_group_id = (db.query(Group.id).order_by(Group.id.desc()).limit(1).scalar() or 0) + 1
+    group_ids = list(range(first_group_id, first_group_id + groups))
+    members = {
+        group_id: _pick_members(rng, user_ids, popularity, _skewed(rng, 1.2, 2, min(max_group_size, users)))
+        for group_id in group_ids
+    }
+    db.execute(insert(Group), [
+        {"id": group_id, "name": f"group-{seed}-{group_id}", "description": f"{len(members[group_id])} members"}
+        for group_id in group_ids
+    ])
+    db.execute(insert(GroupMember), [
+        {"group_id": group_id, "user_id": user_id}
+        for group_id in group_ids for user_id in members[group_id]
+    ])
+    
+    # Busy groups get most of the expenses
+    activity = [rng.paretovariate(1.5) for _ in group_ids]
+    expense_groups = rng.choices(group_ids, activity, k=expenses)
+    expense_counts = {group_id: 0 for group_id in group_ids}
+    split_type_counts = {split_type.value: 0 for split_type in SplitType}
+    
+    first_expense_id = (db.query(Expense.id).order_by(Expense.id.desc()).limit(1).scalar() or 0) + 1
+    pair_totals: Dict[Tuple[int, int, int], float] = {}
+    expense_rows, split_rows = [], []
+    
+    def flush():
+        db.execute(insert(Expense), expense_rows)
+        db.execute(insert(ExpenseSplit), split_rows)
+        expense_rows.clear()
+        split_rows.clear()
+    
+    for i, group_id in enumerate(expense_groups):
+        expense_id = first_expense_id + i
+        body = random_expense_body(rng, members[group_id])
+        split_type = SplitType(body["split_type"])
+        requested = [ExpenseSplitCreate(**split) for split in body["splits"]]
+        amounts = SplitCalculator.calculate_splits(body["amount"], split_type, requested, members[group_id])
+        percentages = {split.user_id: split.percentage for split in requested}
+        payer_id = body["paid_by_user_id"]
+        
+        expense_counts[group_id] += 1
+        split_type_counts[split_type.value] += 1
+        expense_rows.append({
+            "id": expense_id,
+            "group_id": group_id,
+            "paid_by_user_id": payer_id,
+            "description": f"expense {i}",
+            "amount": body["amount"],
+            "split_type": split_type,
+            "created_at": now - timedelta(seconds=rng.uniform(0, days * 86400)),
+        })
+        for user_id, amount in amounts.items():
+            if amount <= 0:
+                continue
+            split_rows.append({
+                "expense_id": expense_id,
+                "user_id": user_id,
+                "amount": amount,
+                "percentage": percentages.get(user_id),
+            })
+            if user_id != payer_id:
+                # Net every pair onto (low id, high id); positive means low owes high
+                key = (group_id, min(user_id, payer_id), max(user_id, payer_id))
+                pair_totals[key] = pair_totals.get(key, 0) + (amount if user_id < payer_id else -amount)
+        
+        if len(expense_rows) >= INSERT_CHUNK:
+            flush()
+    if expense_rows:
+        flush()
+    
+    balance_rows = [
+        {
+            "group_id": group_id,
+            "owes_user_id": low_id if net > 0 else high_id,
+            "owed_to_user_id": high_id if net > 0 else low_id,
+            "amount": round(abs(net), 2),
+        }
+        for (group_id, low_id, high_id), net in pair_totals.items()
+        if abs(net) > 0.01
+    ]
+    for start in range(0, len(balance_rows), INSERT_CHUNK):
+        db.execute(insert(Balance), balance_rows[start:start + INSERT_CHUNK])
+    
+    db.commit()
+    return Dataset(user_ids, group_ids, members, expense_counts, split_type_counts)
\ No newline at end of file
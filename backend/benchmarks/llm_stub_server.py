@@ -0,0 +1,135 @@
+"""A local stand-in for the OpenAI chat completions API.
+
+Usage (from backend/):
+    python -m benchmarks.llm_stub_server [--port 8081] [--latency 0.5] [--fail-rate 0.1]
+
+then run the app with:
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8081/v1
+
+Latency (before the first token), token_delay (between streamed tokens) and
+failure rate can also be changed at runtime with
+POST /stub/config {"latency": 1.0, "fail_rate": 0.2}; GET /stub/stats reports
+calls, injected failures, streams cut off by the client and the peak number
+of concurrent requests.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+stub_app = FastAPI()
+config = {"latency": 0.5, "fail_rate": 0.0, "token_delay": 0.02, "stream_tokens": 40}
+stats = {"calls": 0, "failures": 0, "cancelled_streams": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+async def stream_chunks(model: str, include_usage: bool = False):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    
+    def chunk(delta: dict, finish_reason=None, usage=None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            "usage": usage,
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+    
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        yield chunk({"role": "assistant", "content": ""})
+        for i in range(int(config["stream_tokens"])):
+            await asyncio.sleep(config["token_delay"])
+            yield chunk({"content": f"token{i} "})
+        yield chunk({}, finish_reason="stop")
+        if include_usage:
+            # As the real API does for stream_options={"include_usage": true}
+            tokens = int(config["stream_tokens"])
+            yield chunk({}, usage={"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens})
+        yield "data: [DONE]\n\n"
+    except asyncio.CancelledError:
+        stats["cancelled_streams"] += 1
+        raise
+    finally:
+        stats["in_flight"] -= 1
+
+
+@stub_app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["calls"] += 1
+    if body.get("stream"):
+        await asyncio.sleep(config["latency"])
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return StreamingResponse(stream_chunks(body.get("model", "stub"), include_usage), media_type="text/event-stream")
+    
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(config["latency"])
+        if random.random() < config["fail_rate"]:
+            stats["failures"] += 1
+            return JSONResponse(status_code=503, content={"error": {"message": "stub overloaded", "type": "server_error"}})
+    finally:
+        stats["in_flight"] -= 1
+    
+    prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in body.get("messages", []))
+    content = f"Stub answer to {len(body.get('messages', []))} message(s)."
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content.split()),
+            "total_tokens": prompt_tokens + len(content.split()),
+        },
+    }
+
+
+@stub_app.post("/stub/config")
+async def update_config(values: dict):
+    config.update({key: float(value) for key, value in values.items() if key in config})
+    return config
+
+
+@stub_app.get("/stub/stats")
+async def get_stats():
+    return stats
+
+
+@stub_app.post("/stub/reset")
+async def reset_stats():
+    stats.update(calls=0, failures=0, cancelled_streams=0, in_flight=0, max_in_flight=0)
+    return stats
+
+
+def main():
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    
+    config.update(latency=args.latency, fail_rate=args.fail_rate)
+    uvicorn.run(stub_app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
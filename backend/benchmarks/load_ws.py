@@ -0,0 +1,236 @@
+"""Load test for the WebSocket push endpoint with thousands of local connections.
+
+Usage (from backend/):
+    python -m benchmarks.load_ws [--connections 2000] [--groups 100] [--writes 300] [--rate 10] [--write-concurrency 4]
+                                 [--slow 0.05] [--base-url URL]
+
+Seeds --connections users spread over --groups groups, starts the app under uvicorn
+in a subprocess (or targets --base-url), opens one /users/{id}/ws connection per
+user, then posts --writes expenses at --rate per second to random groups. Every
+connection times the expense.added messages it receives against the moment the
+expense's request was sent. A --slow fraction of the connections reads one message every
+100 ms to exercise backpressure: their queues overflow and they get resync markers
+instead of holding up the rest.
+
+Reports connect time, messages delivered vs expected, request-to-receive latency
+percentiles, resyncs, and the server's push metrics and resident memory.
+
+Uses DATABASE_URL when set, otherwise a throwaway SQLite file; a server given with
+--base-url must be running against the same database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/load_ws.db")
+
+import httpx  # noqa: E402
+import websockets  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registers every model on Base.metadata)
+from app.core.config import settings  # noqa: E402
+from app.database import SessionLocal, create_tables  # noqa: E402
+from app.models.group import Group, GroupMember  # noqa: E402
+from app.models.user import User  # noqa: E402
+from benchmarks.load_suite import percentile, start_server  # noqa: E402
+
+SLOW_READ_SECONDS = 0.1
+
+
+def seed(connections: int, groups: int, seed_value: int) -> Dict[int, List[int]]:
+    """Members by group; every user is in exactly one group"""
+    rng = random.Random(seed_value)
+    create_tables()
+    with SessionLocal() as db:
+        users = [User(name=f"ws user {i}", email=f"ws{i}@bench.example") for i in range(connections)]
+        db.add_all(users)
+        group_rows = [Group(name=f"ws group {i}") for i in range(groups)]
+        db.add_all(group_rows)
+        db.flush()
+        members: Dict[int, List[int]] = {group.id: [] for group in group_rows}
+        group_ids = list(members)
+        for user in users:
+            group_id = rng.choice(group_ids)
+            members[group_id].append(user.id)
+            db.add(GroupMember(group_id=group_id, user_id=user.id))
+        db.commit()
+    return {group_id: user_ids for group_id, user_ids in members.items() if user_ids}
+
+
+class Listener:
+    def __init__(self, user_id: int, slow: bool):
+        self.user_id = user_id
+        self.slow = slow
+        self.latencies: List[float] = []
+        self.received = 0
+        self.resyncs = 0
+        self.closed_by_server = False
+        self.error = None
+    
+    async def run(self, url: str, connected: asyncio.Event, ready: "asyncio.Queue[None]", done: asyncio.Event):
+        try:
+            async with websockets.connect(url, max_queue=16, open_timeout=60) as socket:
+                subscribed = json.loads(await socket.recv())
+                assert subscribed["type"] == "subscribed", subscribed
+                ready.put_nowait(None)
+                await connected.wait()
+                receiver = asyncio.create_task(self._receive(socket))
+                await done.wait()
+                receiver.cancel()
+        except Exception as e:
+            if self.error is None and not connected.is_set():
+                ready.put_nowait(None)
+            self.error = e
+    
+    async def _receive(self, socket):
+        try:
+            async for raw in socket:
+                message = json.loads(raw)
+                if message["type"] == "expense.added":
+                    self.received += 1
+                    posted_at = float(message["expense"]["description"].split("@", 1)[1])
+                    self.latencies.append((time.perf_counter() - posted_at) * 1000)
+                elif message["type"] == "resync":
+                    self.resyncs += 1
+                if self.slow:
+                    await asyncio.sleep(SLOW_READ_SECONDS)
+        except websockets.ConnectionClosedError:
+            self.closed_by_server = True
+
+
+async def post_expenses(client: httpx.AsyncClient, members: Dict[int, List[int]], args) -> Tuple[Dict[int, int], int]:
+    """Post at a fixed rate, mostly to a few busy groups; returns successful writes per group and failures"""
+    rng = random.Random(args.seed + 1)
+    group_ids = list(members)
+    weights = [1.0 / rank for rank in range(1, len(group_ids) + 1)]
+    per_group: Dict[int, int] = {}
+    failures = 0
+    in_flight = asyncio.Semaphore(args.write_concurrency)
+    interval = 1.0 / args.rate
+    start = time.perf_counter()
+    tasks = []
+    
+    async def post(group_id: int):
+        nonlocal failures
+        async with in_flight:
+            body = {
+                "description": f"ws bench@{time.perf_counter()!r}",
+                "amount": 100,
+                "paid_by_user_id": members[group_id][0],
+                "split_type": "equal",
+                "splits": [{"user_id": user_id} for user_id in members[group_id]]
+            }
+            response = await client.post(f"{settings.API_V1_STR}/groups/{group_id}/expenses", json=body)
+        if response.status_code == 200:
+            per_group[group_id] = per_group.get(group_id, 0) + 1
+        else:
+            failures += 1
+    
+    for i in range(args.writes):
+        tasks.append(asyncio.create_task(post(rng.choices(group_ids, weights)[0])))
+        await asyncio.sleep(max(start + (i + 1) * interval - time.perf_counter(), 0))
+    await asyncio.gather(*tasks)
+    return per_group, failures
+
+
+def server_rss_mb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def push_metrics(base_url: str) -> Dict[str, float]:
+    lines = httpx.get(f"{base_url}/metrics").text.splitlines()
+    return {name: float(value) for name, value in (line.rsplit(" ", 1) for line in lines if line.startswith("push_"))}
+
+
+async def run(args, members: Dict[int, List[int]], base_url: str, server_pid):
+    ws_base = base_url.replace("http", "ws", 1) + settings.API_V1_STR
+    rng = random.Random(args.seed + 2)
+    group_of = {user_id: group_id for group_id, user_ids in members.items() for user_id in user_ids}
+    listeners = [Listener(user_id, rng.random() < args.slow) for user_id in group_of]
+    
+    connected, done = asyncio.Event(), asyncio.Event()
+    ready: "asyncio.Queue[None]" = asyncio.Queue()
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(listener.run(f"{ws_base}/users/{listener.user_id}/ws", connected, ready, done)) for listener in listeners]
+    for _ in listeners:
+        await ready.get()
+    connect_seconds = time.perf_counter() - start
+    connected.set()
+    failed = [listener for listener in listeners if listener.error is not None]
+    if failed:
+        print(f"{len(failed)} connections failed, e.g. {failed[0].error!r}")
+        listeners = [listener for listener in listeners if listener.error is None]
+    rss_idle = server_rss_mb(server_pid) if server_pid else None
+    print(f"{len(listeners)} connections open in {connect_seconds:.2f}s"
+          + (f", server RSS {rss_idle:.0f} MB" if rss_idle else ""), flush=True)
+    
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        write_start = time.perf_counter()
+        per_group, failures = await post_expenses(client, members, args)
+        write_seconds = time.perf_counter() - write_start
+    
+    expected = {listener.user_id: per_group.get(group_of[listener.user_id], 0) for listener in listeners}
+    deadline = time.perf_counter() + args.drain_timeout
+    fast = [listener for listener in listeners if not listener.slow]
+    while time.perf_counter() < deadline and any(listener.received < expected[listener.user_id] for listener in fast):
+        await asyncio.sleep(0.05)
+    server_metrics = push_metrics(base_url)
+    done.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    
+    latencies = sorted(latency for listener in fast for latency in listener.latencies)
+    delivered = sum(listener.received for listener in fast)
+    wanted = sum(expected[listener.user_id] for listener in fast)
+    slow = [listener for listener in listeners if listener.slow]
+    print(f"{args.writes} writes in {write_seconds:.2f}s to {len(per_group)} groups, {failures} failed")
+    print(f"fast connections: {len(fast)}, delivered {delivered}/{wanted} expense.added messages")
+    if latencies:
+        print(f"request-to-receive ms: p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  "
+              f"p99 {percentile(latencies, 99):.1f}  max {latencies[-1]:.1f}")
+    if slow:
+        print(f"slow connections: {len(slow)}, received {sum(listener.received for listener in slow)}, "
+              f"resyncs {sum(listener.resyncs for listener in slow)}, closed by server {sum(listener.closed_by_server for listener in slow)}")
+    for name, value in server_metrics.items():
+        print(f"  {name} {value:g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--writes", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=10.0, help="expense writes per second")
+    parser.add_argument("--write-concurrency", type=int, default=4, help="writes in flight at once (SQLite has a single writer)")
+    parser.add_argument("--slow", type=float, default=0.05, help="fraction of connections that read slowly")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="seconds to wait for deliveries after the last write")
+    parser.add_argument("--base-url", default=None, help="target a running server instead of starting one")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    members = seed(args.connections, args.groups, args.seed)
+    
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        process, base_url = start_server(settings.DATABASE_URL, workers=1)
+    try:
+        asyncio.run(run(args, members, base_url, process.pid if process else None))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
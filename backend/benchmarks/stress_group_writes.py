@@ -0,0 +1,246 @@
+"""Hammer expense writes from many threads and check balances stay consistent.
+
+Usage (from backend/):
+    python -m benchmarks.stress_group_writes [--threads 16] [--groups 4] [--ops 200] [--consistency mixed] [--close-every 0.2]
+
+Each worker creates (and occasionally deletes) exact-split expenses with whole
+amounts in randomly chosen groups through ExpenseService. With --consistency
+eventual or mixed, balance updates go through the outbox while an outbox worker
+drains it concurrently; the check runs once the outbox is empty. With --close-every
+another thread keeps closing every group's period, archiving the expenses written
+so far. Afterwards every group's balances must equal its latest checkpoint plus the
+pairwise netting of its live expense_splits exactly, with at most one row per user
+pair, and the daily spend rollups must match a rebuild from the expense tables.
+Exits 1 on any mismatch. Uses DATABASE_URL when set (migrated with
+`alembic upgrade head`), otherwise a throwaway SQLite file.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/stress_group_writes.db")
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+import app.main  # noqa: E402,F401  (registers every model on Base.metadata)
+from app.models.balance import Balance  # noqa: E402
+from app.models.expense import SplitType  # noqa: E402
+from app.models.group import Group, GroupMember  # noqa: E402
+from app.models.rollup import GroupDailySpend, UserDailySpend  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.expense import ExpenseCreate, ExpenseSplitCreate  # noqa: E402
+from app.jobs.outbox_worker import OutboxWorker  # noqa: E402
+from app.services.expense_service import ExpenseService  # noqa: E402
+from app.services.outbox_service import OutboxService  # noqa: E402
+from app.services.period_service import PeriodService  # noqa: E402
+from app.services.spend_rollup_service import SpendRollupService  # noqa: E402
+
+
+def seed(groups: int, members: int):
+    """Create groups that share a pool of users; returns {group_id: [member ids]}"""
+    with SessionLocal() as db:
+        first_user_id = (db.execute(select(func.max(User.id))).scalar() or 0) + 1
+        tag = int(time.time())
+        user_ids = list(range(first_user_id, first_user_id + members))
+        db.execute(insert(User), [
+            {"id": user_id, "name": f"stress-{user_id}", "email": f"stress-{tag}-{user_id}@example.com"}
+            for user_id in user_ids
+        ])
+        memberships = {}
+        for i in range(groups):
+            group = Group(name=f"stress-group-{i}")
+            db.add(group)
+            db.flush()
+            memberships[group.id] = user_ids
+            db.execute(insert(GroupMember), [{"group_id": group.id, "user_id": user_id} for user_id in user_ids])
+        db.commit()
+    return memberships
+
+
+def worker(memberships, ops: int, seed_value: int, consistency: str, errors: list):
+    rng = random.Random(seed_value)
+    modes = ["sync", "eventual"] if consistency == "mixed" else [consistency]
+    created = []
+    with SessionLocal() as db:
+        service = ExpenseService(db)
+        for _ in range(ops):
+            try:
+                if created and rng.random() < 0.2:
+                    service.delete_expense(created.pop(rng.randrange(len(created))), rng.choice(modes))
+                    continue
+                group_id = rng.choice(list(memberships))
+                participants = rng.sample(memberships[group_id], rng.randint(2, 4))
+                splits = [ExpenseSplitCreate(user_id=user_id, amount=rng.randint(1, 50)) for user_id in participants]
+                expense = service.create_expense(group_id, ExpenseCreate(
+                    description="stress",
+                    amount=sum(split.amount for split in splits),
+                    paid_by_user_id=rng.choice(participants),
+                    split_type=SplitType.EXACT,
+                    splits=splits
+                ), rng.choice(modes))
+                created.append(expense.id)
+            except Exception as e:  # noqa: BLE001 - reported after the run
+                db.rollback()
+                errors.append(f"{e.__class__.__name__}: {e}")
+
+
+def closer(group_ids, stop: threading.Event, interval: float, errors: list, closed: list):
+    """Close every group's period up to now, again and again, while the writers run"""
+    with SessionLocal() as db:
+        service = PeriodService(db)
+        while not stop.wait(interval):
+            for group_id in group_ids:
+                try:
+                    closed.append(service.close_period(group_id).expense_count)
+                except Exception as e:  # noqa: BLE001 - reported after the run
+                    db.rollback()
+                    errors.append(f"close_period {e.__class__.__name__}: {e}")
+
+
+def check(group_ids) -> int:
+    """Compare stored balances with the latest checkpoint plus the netting of live expense_splits; returns the mismatch count"""
+    mismatches = 0
+    with SessionLocal() as db:
+        service = PeriodService(db)
+        for group_id in group_ids:
+            expected = defaultdict(float)
+            for owes_id, owed_to_id, amount in service.expected_balances(group_id):
+                expected[(owes_id, owed_to_id)] += amount
+                expected[(owed_to_id, owes_id)] -= amount
+            
+            actual = defaultdict(float)
+            rows_per_pair = defaultdict(int)
+            balances = db.execute(
+                select(Balance.owes_user_id, Balance.owed_to_user_id, Balance.amount)
+                .where(Balance.group_id == group_id)
+            )
+            for owes_id, owed_to_id, amount in balances:
+                actual[(owes_id, owed_to_id)] += amount
+                actual[(owed_to_id, owes_id)] -= amount
+                rows_per_pair[frozenset((owes_id, owed_to_id))] += 1
+            
+            for pair in set(expected) | set(actual):
+                if abs(expected[pair] - actual[pair]) > 1e-6:
+                    mismatches += 1
+                    print(f"group {group_id} pair {pair}: expected {expected[pair]:.2f}, stored {actual[pair]:.2f}")
+            for pair, count in rows_per_pair.items():
+                if count > 1:
+                    mismatches += 1
+                    print(f"group {group_id} pair {sorted(pair)}: {count} balance rows")
+    return mismatches
+
+
+def rollup_rows(db, group_id: int):
+    """{("group", day) or ("user", user_id, day): (counts and amounts)} for one group"""
+    rows = {}
+    for day, *values in db.execute(
+        select(GroupDailySpend.day, GroupDailySpend.expense_count, GroupDailySpend.total_amount)
+        .where(GroupDailySpend.group_id == group_id)
+    ):
+        rows[("group", day)] = values
+    for user_id, day, *values in db.execute(
+        select(UserDailySpend.user_id, UserDailySpend.day, UserDailySpend.paid_count, UserDailySpend.paid_amount,
+               UserDailySpend.share_count, UserDailySpend.share_amount)
+        .where(UserDailySpend.group_id == group_id)
+    ):
+        rows[("user", user_id, day)] = values
+    return rows
+
+
+def check_rollups(group_ids) -> int:
+    """Compare the incrementally maintained spend rollups with a rebuild from the expense tables"""
+    mismatches = 0
+    with SessionLocal() as db:
+        for group_id in group_ids:
+            maintained = rollup_rows(db, group_id)
+            SpendRollupService(db).rebuild(group_id)
+            rebuilt = rollup_rows(db, group_id)
+            db.rollback()
+            for key in set(maintained) | set(rebuilt):
+                left, right = maintained.get(key), rebuilt.get(key)
+                if left is None or right is None or any(abs(a - b) > 1e-6 for a, b in zip(left, right)):
+                    mismatches += 1
+                    print(f"group {group_id} rollup {key}: maintained {left}, rebuilt {right}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--members", type=int, default=6)
+    parser.add_argument("--ops", type=int, default=200, help="operations per thread")
+    parser.add_argument("--consistency", choices=["sync", "eventual", "mixed"], default="sync")
+    parser.add_argument("--close-every", type=float, default=0.0, help="close every group's period this often (seconds) during the run")
+    args = parser.parse_args()
+    
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(bind=engine)
+    memberships = seed(args.groups, args.members)
+    
+    errors = []
+    threads = [
+        threading.Thread(target=worker, args=(memberships, args.ops, i, args.consistency, errors))
+        for i in range(args.threads)
+    ]
+    # The outbox worker drains while the writers run, then until nothing is due
+    outbox_worker = OutboxWorker(concurrency=args.groups, poll_interval=0.05)
+    writers_done = threading.Event()
+    
+    async def drain_while_writing():
+        outbox_worker.start()
+        await asyncio.to_thread(writers_done.wait)
+        await outbox_worker.stop()
+    
+    draining = threading.Thread(target=lambda: asyncio.run(drain_while_writing()))
+    if args.consistency != "sync":
+        draining.start()
+    closed = []
+    closing_done = threading.Event()
+    closing = threading.Thread(target=closer, args=(list(memberships), closing_done, args.close_every, errors, closed))
+    if args.close_every > 0:
+        closing.start()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if args.close_every > 0:
+        closing_done.set()
+        closing.join()
+        print(f"closed {len(closed)} periods during the run, archiving {sum(closed)} expenses")
+    if args.consistency != "sync":
+        writers_done.set()
+        draining.join()
+        asyncio.run(OutboxWorker(concurrency=args.groups).run(once=True))
+        print(f"outbox worker applied {outbox_worker.counters['done']} events during the run, "
+              f"{outbox_worker.counters['retry']} retries")
+    
+    total = args.threads * args.ops
+    print(f"{total} operations on {args.groups} groups from {args.threads} threads "
+          f"in {elapsed:.2f}s ({total / elapsed:.0f} ops/s), {len(errors)} errors")
+    for error in errors[:10]:
+        print(f"  {error}")
+    
+    mismatches = check(memberships)
+    print(f"{mismatches} balance mismatches")
+    rollup_mismatches = check_rollups(memberships)
+    print(f"{rollup_mismatches} spend rollup mismatches")
+    mismatches += rollup_mismatches
+    with SessionLocal() as db:
+        outbox = OutboxService(db).status()
+    print(f"outbox: {outbox['pending']} pending, {outbox['dead']} dead")
+    mismatches += outbox["pending"] + outbox["dead"]
+    sys.exit(1 if mismatches or errors else 0)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
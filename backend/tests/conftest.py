@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+# Settings are read when app.core.config is first imported: point them at a throwaway
+# SQLite file and keep the real LLM (the .env placeholder key) and background workers out of tests
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/tests.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["OPENAI_API_KEY"] = ""
+os.environ["OUTBOX_WORKER_ENABLED"] = "false"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+API = "/api/v1"
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    """Every test starts from empty tables"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+
+
+@pytest.fixture
+def client():
+    # Without the context manager the lifespan (outbox worker, push relay) doesn't start
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def make_user(client):
+    count = iter(range(1, 10_000))
+    
+    def make(name: str = None) -> int:
+        number = next(count)
+        name = name or f"user-{number}"
+        response = client.post(f"{API}/users/", json={"name": name, "email": f"{name}-{number}@example.com"})
+        response.raise_for_status()
+        return response.json()["id"]
+    
+    return make
+
+
+@pytest.fixture
+def make_group(client, make_user):
+    def make(members: int = 3) -> tuple:
+        """(group id, member ids)"""
+        member_ids = [make_user() for _ in range(members)]
+        response = client.post(f"{API}/groups/", json={"name": "trip", "member_ids": member_ids})
+        response.raise_for_status()
+        return response.json()["id"], member_ids
+    
+    return make
+
+
+@pytest.fixture
+def add_expense(client):
+    def add(
+        group_id: int, paid_by: int, member_ids: list, amount: float = 30.0, description: str = "dinner", consistency: str = "sync"
+    ) -> dict:
+        response = client.post(f"{API}/groups/{group_id}/expenses", params={"consistency": consistency}, json={
+            "description": description,
+            "amount": amount,
+            "paid_by_user_id": paid_by,
+            "split_type": "equal",
+            "splits": [{"user_id": user_id} for user_id in member_ids]
+        })
+        response.raise_for_status()
+        return response.json()
+    
+    return add
\ No newline at end of file
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.core import admission
+from app.core.admission import HIGH, LOW, AdmissionControlMiddleware, ConcurrencyLimiter
+
+
+def test_slot_handed_over_as_the_wait_times_out_is_kept(monkeypatch):
+    async def run():
+        limiter = ConcurrencyLimiter(1)
+        assert await limiter.acquire(LOW, 1.0)
+        
+        async def hand_over_then_time_out(waiter, timeout):
+            limiter.release()
+            assert waiter.done()
+            raise asyncio.TimeoutError
+        
+        monkeypatch.setattr(admission.asyncio, "wait_for", hand_over_then_time_out)
+        assert await limiter.acquire(LOW, 1.0)
+        assert limiter.active == 1
+        monkeypatch.undo()
+        
+        limiter.release()
+        assert limiter.active == 0
+        assert await limiter.acquire(LOW, 0.0)
+    
+    asyncio.run(run())
+
+
+def test_high_priority_waiters_go_first():
+    async def run():
+        limiter = ConcurrencyLimiter(1)
+        assert await limiter.acquire(LOW, 1.0)
+        low = asyncio.create_task(limiter.acquire(LOW, 1.0))
+        high = asyncio.create_task(limiter.acquire(HIGH, 1.0))
+        await asyncio.sleep(0)
+        
+        limiter.release()
+        assert await high
+        assert not low.done()
+        limiter.release()
+        assert await low
+    
+    asyncio.run(run())
+
+
+def limited_app(release: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+    
+    @app.get("/users/{user_id}/report")
+    async def report(user_id: int):
+        await release.wait()
+        return {"user_id": user_id}
+    
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        routes={"GET /users/{user_id}/report": LOW},
+        concurrency={},
+        default_concurrency=1,
+        max_concurrency=4,
+        queue_seconds={LOW: 0.05},
+        rate_per_minute={LOW: 60.0},
+        burst=2
+    )
+    return app
+
+
+def test_rate_limit_and_shedding():
+    async def run():
+        release = asyncio.Event()
+        transport = httpx.ASGITransport(app=limited_app(release))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # User 1 holds the route's only slot, so user 2 waits out the queue budget and is shed
+            first = asyncio.create_task(client.get("/users/1/report"))
+            await asyncio.sleep(0.01)
+            shed = await client.get("/users/2/report")
+            release.set()
+            assert (await first).status_code == 200
+            assert shed.status_code == 503
+            assert int(shed.headers["retry-after"]) >= 1
+            
+            # User 1 has spent one of the two tokens in its burst
+            assert (await client.get("/users/1/report")).status_code == 200
+            limited = await client.get("/users/1/report")
+            assert limited.status_code == 429
+            assert int(limited.headers["retry-after"]) >= 1
+            assert (await client.get("/users/3/report")).status_code == 200
+    
+    asyncio.run(run())
\ No newline at end of file
@@ -0,0 +1,44 @@
+from app.services.chat_intents import LocalIntentEngine, intent_metrics
+from tests.conftest import API
+
+NOT_CONFIGURED = "LLM service is not configured. Please set OPENAI_API_KEY."
+
+
+def chat(client, user_id: int, message: str):
+    return client.post(f"{API}/users/{user_id}/chat", json={"message": message})
+
+
+def test_unknown_user_falls_through_to_the_llm_path(client):
+    intent_metrics.reset()
+    
+    response = chat(client, 9999, "how much do I owe?")
+    
+    assert response.status_code == 200
+    assert response.json() == {"response": NOT_CONFIGURED}
+    assert intent_metrics.snapshot()["llm"] == 1
+
+
+def test_unknown_user_stream_falls_through_to_the_llm_path(client):
+    response = client.post(f"{API}/users/9999/chat/stream", json={"message": "what's my balance"})
+    
+    assert response.status_code == 200
+    assert NOT_CONFIGURED in response.text
+
+
+def test_balance_questions_are_answered_locally(client, make_user, add_expense):
+    alice, bob = make_user("Alice"), make_user("Bob")
+    group_id = client.post(f"{API}/groups/", json={"name": "flat", "member_ids": [alice, bob]}).json()["id"]
+    add_expense(group_id, alice, [alice, bob], amount=40.0)
+    
+    assert chat(client, bob, "How much do I owe?").json()["response"] == "You owe $20.00 in total: $20.00 to Alice (flat)."
+    assert chat(client, alice, "how much does bob owe me").json()["response"] == "Bob owes you $20.00."
+    assert chat(client, alice, "my groups").json()["response"] == "You're in 1 group: flat (2 members)."
+
+
+def test_unmatched_questions_and_unknown_names_go_to_the_llm(db, make_user):
+    user_id = make_user("Alice")
+    engine = LocalIntentEngine(db)
+    
+    assert engine.resolve("summarise my spending habits", user_id) == (None, None)
+    assert engine.resolve("how much does zed owe me", user_id) == (None, None)
+    assert engine.resolve("am I settled up?", user_id) == ("net_balance", "You're all settled up.")
\ No newline at end of file
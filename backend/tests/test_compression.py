@@ -0,0 +1,101 @@
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, parse_accept_encoding
+
+ETAG = '"v1"'
+ROWS = [{"id": index, "description": f"expense {index}", "amount": index * 1.5} for index in range(200)]
+
+
+def compressing_app() -> TestClient:
+    app = FastAPI()
+    
+    @app.get("/rows")
+    def rows(request: Request):
+        if request.headers.get("if-none-match") == ETAG:
+            return Response(status_code=304, headers={"ETag": ETAG})
+        return Response(
+            content=str(ROWS).encode(), media_type="application/json", headers={"ETag": ETAG, "Vary": "Authorization"}
+        )
+    
+    @app.get("/small")
+    def small():
+        return Response(content=b'{"ok": true}', media_type="application/json", headers={"ETag": ETAG})
+    
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter([b"data: 1\n\n"] * 200), media_type="text/event-stream")
+    
+    @app.get("/chunks")
+    def chunks():
+        return StreamingResponse((str(row).encode() for row in ROWS), media_type="application/json")
+    
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=1024,
+        encodings=["br", "gzip"],
+        content_types=["application/json", "text/"],
+        gzip_level=6,
+        brotli_quality=5
+    )
+    return TestClient(app)
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.5, br, *;q=0") == {"gzip": 0.5, "br": 1.0, "*": 0.0}
+    assert parse_accept_encoding("GZIP ; Q=0.8, identity") == {"gzip": 0.8, "identity": 1.0}
+
+
+def test_negotiates_the_clients_preferred_encoding():
+    client = compressing_app()
+    body = str(ROWS).encode()
+    
+    response = client.get("/rows", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.content == body
+    assert response.headers["vary"] == "Authorization, Accept-Encoding"
+    assert response.headers["etag"] == f"W/{ETAG}"
+    assert int(response.headers["content-length"]) < len(body) / 3
+    
+    response = client.get("/rows", headers={"Accept-Encoding": "br;q=0.5, gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == body
+    
+    response = client.get("/rows", headers={"Accept-Encoding": "br;q=0, gzip;q=0"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+
+
+def test_small_bodies_and_event_streams_go_out_unencoded():
+    client = compressing_app()
+    
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.headers["vary"] == "Accept-Encoding"
+    
+    events = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in events.headers
+    assert events.text.count("data: 1") == 200
+
+
+def test_streamed_json_is_compressed_chunk_by_chunk():
+    client = compressing_app()
+    
+    response = client.get("/chunks", headers={"Accept-Encoding": "gzip"})
+    
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == b"".join(str(row).encode() for row in ROWS)
+
+
+def test_not_modified_repeats_the_weak_validator():
+    client = compressing_app()
+    
+    full = client.get("/rows", headers={"Accept-Encoding": "gzip"})
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    revalidated = client.get("/rows", headers={"Accept-Encoding": "gzip", "If-None-Match": ETAG})
+    
+    assert revalidated.status_code == 304
+    assert full.headers["etag"] == small.headers["etag"] == revalidated.headers["etag"] == f"W/{ETAG}"
+    assert "vary" not in revalidated.headers
\ No newline at end of file
@@ -0,0 +1,37 @@
+from tests.conftest import API
+
+
+def test_dashboard_etag_revalidates_until_the_data_changes(client, make_group, add_expense):
+    group_id, (alice, bob) = make_group(2)
+    url = f"{API}/users/{alice}/dashboard"
+    
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert set(first.json()) == {"user", "summary", "groups", "recent_expenses"}
+    
+    unchanged = client.get(url, headers={"If-None-Match": etag})
+    assert (unchanged.status_code, unchanged.content, unchanged.headers["etag"]) == (304, b"", etag)
+    # Weak (as sent to clients that accept compression) and strong forms both match
+    assert etag.startswith("W/")
+    assert client.get(url, headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'}).status_code == 304
+    
+    add_expense(group_id, bob, [alice, bob], amount=20.0)
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["summary"]["total_owing"] == 10.0
+    assert [row["amount"] for row in changed.json()["recent_expenses"]] == [20.0]
+
+
+def test_dashboard_etag_depends_on_the_requested_sections(client, make_user):
+    user_id = make_user()
+    url = f"{API}/users/{user_id}/dashboard"
+    
+    full = client.get(url)
+    partial = client.get(url, params={"fields": "user"})
+    
+    assert partial.headers["etag"] != full.headers["etag"]
+    assert set(partial.json()) == {"user"}
+    assert client.get(url, params={"fields": "user"}, headers={"If-None-Match": full.headers["etag"]}).status_code == 200
+    assert client.get(f"{API}/users/9999/dashboard").status_code == 404
\ No newline at end of file
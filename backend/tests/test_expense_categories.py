@@ -0,0 +1,30 @@
+from app.utils.expense_categories import OTHER, categorise, normalise_description
+from tests.conftest import API
+
+
+def test_rules_pick_a_category():
+    assert categorise("Uber to the airport #1234") == "transport"
+    assert categorise("Pizzas & beers") == "dining"
+    # Phrases override the keywords they contain
+    assert categorise("Gas bill March") == "utilities"
+    assert categorise("Gas for the car") == "transport"
+    assert categorise("movie tickets") == "entertainment"
+    # Ties go to the category listed first
+    assert categorise("hotel dinner") == "dining"
+    assert categorise("Misc") == OTHER
+    assert normalise_description("  Uber #12, Lyft!") == "uber lyft"
+
+
+def test_expenses_are_categorised_on_write_and_totalled(client, make_group, add_expense):
+    group_id, members = make_group(2)
+    assert add_expense(group_id, members[0], members, amount=60.0, description="Weekly groceries")["category"] == "groceries"
+    add_expense(group_id, members[0], members, amount=30.0, description="Sushi dinner")
+    add_expense(group_id, members[1], members, amount=10.0, description="Coffee")
+    
+    response = client.get(f"{API}/groups/{group_id}/expense-categories")
+    
+    assert response.status_code == 200
+    assert response.json() == [
+        {"category": "groceries", "expense_count": 1, "total_amount": 60.0, "share": 0.6},
+        {"category": "dining", "expense_count": 2, "total_amount": 40.0, "share": 0.4},
+    ]
\ No newline at end of file
@@ -0,0 +1,67 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.database import engine
+from app.services.expense_service import ExpenseService
+from tests.conftest import API
+
+
+def test_limited_page_only_loads_its_own_splits(db, make_group, add_expense):
+    group_id, members = make_group(3)
+    for index in range(5):
+        add_expense(group_id, members[0], members, description=f"expense {index}")
+    
+    statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        rows = ExpenseService(db).get_group_expense_rows(group_id, limit=2)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    
+    assert len(rows) == 2
+    assert all(len(row["splits"]) == 3 for row in rows)
+    split_statements = [(sql, params) for sql, params in statements if "FROM expense_splits" in sql]
+    assert len(split_statements) == 1
+    sql, params = split_statements[0]
+    assert "expense_splits.expense_id IN" in sql
+    assert sorted(row["id"] for row in rows) == sorted(param for param in params[1:])
+
+
+def test_unlimited_rows_carry_every_split(db, make_group, add_expense):
+    group_id, members = make_group(2)
+    for index in range(3):
+        add_expense(group_id, members[1], members, amount=10.0 * (index + 1))
+    
+    rows = ExpenseService(db).get_group_expense_rows(group_id)
+    
+    assert len(rows) == 3
+    assert sorted(sum(split["amount"] for split in row["splits"]) for row in rows) == [10.0, 20.0, 30.0]
+
+
+def test_limited_async_page_only_loads_its_own_splits(client, make_group, add_expense):
+    group_id, members = make_group(3)
+    created = [add_expense(group_id, members[0], members, description=f"expense {index}") for index in range(5)]
+    
+    split_statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM expense_splits" in statement:
+            split_statements.append(statement)
+    
+    # Every engine: the route reads through the read replicas or SQLite reader pool
+    event.listen(Engine, "before_cursor_execute", capture)
+    try:
+        response = client.get(f"{API}/groups/{group_id}/expenses", params={"compact": "true", "limit": 2})
+    finally:
+        event.remove(Engine, "before_cursor_execute", capture)
+    
+    assert response.status_code == 200
+    rows = response.json()
+    assert [row["id"] for row in rows] == [expense["id"] for expense in created[:-3:-1]]
+    assert all(len(row["splits"]) == 3 for row in rows)
+    assert len(split_statements) == 1 and "expense_splits.expense_id IN" in split_statements[0]
+    assert len(client.get(f"{API}/groups/{group_id}/expenses", params={"limit": 2}).json()) == 2
\ No newline at end of file
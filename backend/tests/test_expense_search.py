@@ -0,0 +1,40 @@
+from tests.conftest import API
+
+
+def search(client, group_id: int, q: str) -> list:
+    response = client.get(f"{API}/groups/{group_id}/expenses/search", params={"q": q})
+    response.raise_for_status()
+    return [row["description"] for row in response.json()]
+
+
+def test_search_matches_every_term_as_a_prefix_newest_first(client, make_group, add_expense):
+    group_id, members = make_group(2)
+    for description in ("Pizza night", "Taxi to airport", "pizza and beer", "Groceries"):
+        add_expense(group_id, members[0], members, description=description)
+    
+    assert search(client, group_id, "pizz") == ["pizza and beer", "Pizza night"]
+    assert search(client, group_id, "PIZZA beer") == ["pizza and beer"]
+    assert search(client, group_id, "air") == ["Taxi to airport"]
+    assert search(client, group_id, "sushi") == []
+
+
+def test_search_stays_within_the_group_and_follows_deletes(client, make_group, add_expense):
+    group_id, members = make_group(2)
+    other_group_id, other_members = make_group(2)
+    kept = add_expense(group_id, members[0], members, description="hotel booking")
+    removed = add_expense(group_id, members[0], members, description="hotel breakfast")
+    add_expense(other_group_id, other_members[0], other_members, description="hotel deposit")
+    
+    client.delete(f"{API}/groups/expenses/{removed['id']}").raise_for_status()
+    
+    assert search(client, group_id, "hotel") == [kept["description"]]
+    assert search(client, other_group_id, "hotel") == ["hotel deposit"]
+
+
+def test_search_ignores_query_syntax(client, make_group, add_expense):
+    group_id, members = make_group(2)
+    add_expense(group_id, members[0], members, description="Dinner (team)")
+    
+    assert search(client, group_id, 'dinner" (team*') == ["Dinner (team)"]
+    assert search(client, group_id, "***") == []
+    assert client.get(f"{API}/groups/9999/expenses/search", params={"q": "x"}).status_code == 404
\ No newline at end of file
@@ -0,0 +1,42 @@
+from sqlalchemy import func, select
+
+from app.models.archive import ArchivedExpense, ArchivedExpenseSplit, BalanceCheckpoint, BalanceCheckpointEntry
+from app.models.balance import Balance
+from app.models.expense import Expense, ExpenseSplit
+from app.models.outbox import OutboxEvent
+from app.models.rollup import GroupDailySpend, UserDailySpend
+from tests.conftest import API
+
+GROUP_TABLES = [
+    Expense, ExpenseSplit, Balance, OutboxEvent, GroupDailySpend, UserDailySpend,
+    BalanceCheckpoint, BalanceCheckpointEntry, ArchivedExpense, ArchivedExpenseSplit
+]
+
+
+def row_counts(db) -> dict:
+    db.expire_all()
+    return {model.__tablename__: db.execute(select(func.count()).select_from(model)).scalar() for model in GROUP_TABLES}
+
+
+def test_deleting_a_group_removes_its_derived_and_archived_rows(client, db, make_group, add_expense):
+    group_id, members = make_group(3)
+    kept_group_id, kept_members = make_group(2)
+    add_expense(group_id, members[0], members)
+    client.post(f"{API}/groups/{group_id}/close-period").raise_for_status()
+    add_expense(group_id, members[1], members)
+    add_expense(group_id, members[2], members, consistency="eventual")
+    add_expense(kept_group_id, kept_members[0], kept_members)
+    before = row_counts(db)
+    assert all(before.values())
+    
+    response = client.delete(f"{API}/groups/{group_id}")
+    
+    assert response.status_code == 200
+    assert client.get(f"{API}/groups/{group_id}").status_code == 404
+    after = row_counts(db)
+    # Only the other group's expense, its splits, balance, event and rollups are left
+    assert after == {
+        "expenses": 1, "expense_splits": 2, "balances": 1, "outbox_events": 1,
+        "group_daily_spend": 1, "user_daily_spend": 2,
+        "balance_checkpoints": 0, "balance_checkpoint_entries": 0, "archived_expenses": 0, "archived_expense_splits": 0
+    }
\ No newline at end of file
@@ -0,0 +1,61 @@
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from app.core import group_locks
+from app.database import SessionLocal, engine
+
+
+def test_local_lock_is_shared_while_held_and_dropped_after():
+    with SessionLocal() as db:
+        with group_locks.group_write_lock(db, 7):
+            assert group_locks._local_lock(7).locked()
+            assert 7 in group_locks._local_locks
+            db.rollback()
+        gc.collect()
+        assert 7 not in group_locks._local_locks
+
+
+def test_local_lock_table_does_not_grow_with_groups():
+    with SessionLocal() as db:
+        for group_id in range(1000, 3000):
+            with group_locks.group_write_lock(db, group_id):
+                db.rollback()
+    gc.collect()
+    assert len(group_locks._local_locks) == 0
+
+
+def test_writers_to_one_group_are_serialised():
+    inside = []
+    overlaps = []
+    
+    def write():
+        with SessionLocal() as db:
+            for _ in range(50):
+                with group_locks.group_write_lock(db, 1):
+                    inside.append(1)
+                    if len(inside) > 1:
+                        overlaps.append(len(inside))
+                    inside.pop()
+                    db.rollback()
+    
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == []
+
+
+def test_sqlite_block_holds_the_database_write_lock_from_the_start():
+    """Another process's writer can't commit between the block's reads and its writes"""
+    with SessionLocal() as db:
+        with group_locks.group_write_lock(db, 1):
+            assert db.connection().connection.driver_connection.in_transaction
+            other = sqlite3.connect(engine.url.database, timeout=0)
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                other.execute("BEGIN IMMEDIATE")
+            other.close()
+            db.rollback()
\ No newline at end of file
@@ -0,0 +1,29 @@
+import re
+
+from tests.conftest import API
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """The value of one series in Prometheus text format, 0 when absent"""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_requests_and_their_sql_are_counted_per_route_template(client, make_group):
+    group_id, _ = make_group(2)
+    labels = {"method": "GET", "route": "/api/v1/groups/{group_id}"}
+    before = client.get("/metrics").text
+    
+    for _ in range(3):
+        assert client.get(f"{API}/groups/{group_id}").status_code == 200
+    assert client.get(f"{API}/groups/9999").status_code == 404
+    after = client.get("/metrics").text
+    
+    assert after.startswith("# HELP")
+    assert sample(after, "http_requests_total", **labels, status="200") - sample(before, "http_requests_total", **labels, status="200") == 3
+    assert sample(after, "http_requests_total", **labels, status="404") - sample(before, "http_requests_total", **labels, status="404") == 1
+    assert sample(after, "http_request_duration_seconds_count", **labels) - sample(before, "http_request_duration_seconds_count", **labels) == 4
+    assert sample(after, "db_queries_total", **labels) > sample(before, "db_queries_total", **labels)
+    # Ids never become label values
+    assert f"/api/v1/groups/{group_id}\"" not in after
\ No newline at end of file
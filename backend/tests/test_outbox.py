@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.balance import Balance
+from app.models.outbox import OutboxEvent
+from app.services import outbox_service
+from app.services.outbox_service import EXPENSE_CREATED, OutboxService
+
+
+def balances(db, group_id: int) -> list:
+    db.expire_all()
+    return db.execute(
+        select(Balance.owes_user_id, Balance.owed_to_user_id, Balance.amount).where(Balance.group_id == group_id)
+    ).all()
+
+
+@pytest.fixture
+def failing_handlers(monkeypatch):
+    """Make expense.created events fail until the returned switch is turned off"""
+    state = {"failing": True}
+    handlers = outbox_service.HANDLERS[EXPENSE_CREATED]
+    
+    def flaky(db, event):
+        if state["failing"]:
+            raise RuntimeError("handler down")
+    
+    monkeypatch.setitem(outbox_service.HANDLERS, EXPENSE_CREATED, (flaky,) + tuple(handlers))
+    return state
+
+
+def test_failed_event_is_retried_with_backoff(db, make_group, add_expense, failing_handlers):
+    group_id, (payer, *others) = make_group(3)
+    add_expense(group_id, payer, [payer, *others], consistency="eventual")
+    
+    assert OutboxService(db).process_group(group_id, 10) == {"done": 0, "retry": 1, "dead": 0}
+    event = db.execute(select(OutboxEvent)).scalar_one()
+    assert (event.status, event.attempts, event.last_error) == ("pending", 1, "RuntimeError: handler down")
+    # Not due again until the backoff has passed
+    assert OutboxService(db).process_group(group_id, 10) == {"done": 0, "retry": 0, "dead": 0}
+    assert balances(db, group_id) == []
+    
+    failing_handlers["failing"] = False
+    db.execute(update(OutboxEvent).values(available_at=datetime.now(timezone.utc)))
+    db.commit()
+    assert OutboxService(db).process_group(group_id, 10)["done"] == 1
+    assert sorted(balances(db, group_id)) == [(other, payer, 10.0) for other in others]
+
+
+def test_dead_letters_fail_the_outbox_health_check_until_requeued(client, db, make_group, add_expense, failing_handlers, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 1)
+    group_id, (payer, *others) = make_group(3)
+    add_expense(group_id, payer, [payer, *others], consistency="eventual")
+    
+    assert OutboxService(db).process_group(group_id, 10)["dead"] == 1
+    response = client.get("/health/outbox")
+    assert response.status_code == 503
+    assert response.json()["status"] == "failing"
+    assert response.json()["events"]["dead_groups"] == [group_id]
+    
+    failing_handlers["failing"] = False
+    assert OutboxService(db).requeue_dead(group_id) == 1
+    assert OutboxService(db).process_group(group_id, 10)["done"] == 1
+    assert sorted(balances(db, group_id)) == [(other, payer, 10.0) for other in others]
+    response = client.get("/health/outbox")
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert response.json()["events"]["dead_groups"] == []
+
+
+def test_event_applied_elsewhere_is_not_applied_again(db, make_group, add_expense):
+    group_id, (payer, *others) = make_group(3)
+    add_expense(group_id, payer, [payer, *others], consistency="eventual")
+    stale = db.execute(select(OutboxEvent)).scalar_one()
+    
+    # Another worker process applies the event after this one read it
+    with SessionLocal() as other:
+        assert OutboxService(other).process_group(group_id, 10)["done"] == 1
+    
+    assert OutboxService(db)._apply(stale) is None
+    db.commit()
+    assert sorted(balances(db, group_id)) == [(other, payer, 10.0) for other in others]
\ No newline at end of file
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from app.models.balance import Balance
+from app.models.expense import Expense
+from tests.conftest import API
+
+
+def balances(db, group_id: int) -> list:
+    db.expire_all()
+    return sorted(db.execute(
+        select(Balance.owes_user_id, Balance.owed_to_user_id, Balance.amount).where(Balance.group_id == group_id)
+    ).all())
+
+
+def test_closing_a_period_archives_expenses_and_keeps_balances(client, db, make_group, add_expense):
+    group_id, (alice, bob, carol) = make_group(3)
+    first = add_expense(group_id, alice, [alice, bob, carol], amount=30.0, description="hotel")
+    second = add_expense(group_id, bob, [alice, bob, carol], amount=60.0, description="car")
+    before = balances(db, group_id)
+    
+    response = client.post(f"{API}/groups/{group_id}/close-period")
+    
+    assert response.status_code == 200
+    checkpoint = response.json()
+    assert (checkpoint["expense_count"], checkpoint["total_amount"]) == (2, 90.0)
+    assert sorted((e["owes_user_id"], e["owed_to_user_id"], e["amount"]) for e in checkpoint["entries"]) == before
+    assert client.get(f"{API}/groups/{group_id}/expenses").json() == []
+    archived = client.get(f"{API}/groups/{group_id}/archive/expenses").json()
+    assert [(row["id"], row["checkpoint_id"], len(row["splits"])) for row in archived] == [
+        (second["id"], checkpoint["id"], 3), (first["id"], checkpoint["id"], 3)
+    ]
+    assert balances(db, group_id) == before
+    
+    # New expenses build on the checkpoint, and a rebuild from it lands on the same balances
+    add_expense(group_id, carol, [alice, bob, carol], amount=90.0)
+    after = balances(db, group_id)
+    assert client.post(f"{API}/groups/{group_id}/rebuild-balances").json() == {"group_id": group_id, "pairs": len(after)}
+    assert balances(db, group_id) == after
+
+
+def test_close_rejects_future_and_already_closed_cutoffs(client, make_group, add_expense):
+    group_id, members = make_group(2)
+    add_expense(group_id, members[0], members)
+    url = f"{API}/groups/{group_id}/close-period"
+    future = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    
+    assert client.post(url, params={"before": future}).status_code == 400
+    closed = client.post(url).json()["closed_before"]
+    response = client.post(url, params={"before": closed})
+    assert response.status_code == 400
+    assert "already closed" in response.json()["detail"]
+    assert client.post(f"{API}/groups/9999/close-period").status_code == 404
+    assert [checkpoint["id"] for checkpoint in client.get(f"{API}/groups/{group_id}/checkpoints").json()] == [1]
+
+
+def test_close_converts_an_offset_cutoff_to_utc(client, db, make_group, add_expense):
+    group_id, members = make_group(2)
+    early = add_expense(group_id, members[0], members, description="breakfast")
+    late = add_expense(group_id, members[0], members, description="lunch")
+    for expense, hour in ((early, 2), (late, 6)):
+        db.execute(update(Expense).where(Expense.id == expense["id"]).values(created_at=datetime(2024, 1, 1, hour)))
+    db.commit()
+    
+    # 09:00 at +05:00 is 04:00 UTC: between the two expenses
+    response = client.post(f"{API}/groups/{group_id}/close-period", params={"before": "2024-01-01T09:00:00+05:00"})
+    
+    assert response.status_code == 200
+    checkpoint = response.json()
+    assert checkpoint["expense_count"] == 1
+    assert datetime.fromisoformat(checkpoint["closed_before"]).replace(tzinfo=None) == datetime(2024, 1, 1, 4)
+    assert [row["id"] for row in client.get(f"{API}/groups/{group_id}/expenses").json()] == [late["id"]]
\ No newline at end of file
@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.profiling import PROFILE_ID_HEADER, PROFILE_TOKEN_HEADER, ProfilingMiddleware
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def profiled_app(tmp_path, **options) -> TestClient:
+    app = FastAPI()
+    
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+    
+    app.add_middleware(ProfilingMiddleware, output_dir=str(tmp_path), admin_token="secret", **options)
+    return TestClient(app)
+
+
+def summaries(tmp_path) -> list:
+    return [json.loads((tmp_path / name).read_text()) for name in sorted(os.listdir(tmp_path)) if name.endswith("-GET-items_1.json")]
+
+
+def test_header_trigger_needs_the_admin_token(tmp_path):
+    client = profiled_app(tmp_path)
+    
+    assert PROFILE_ID_HEADER not in client.get("/items/1", headers={PROFILE_TOKEN_HEADER: "wrong"}).headers
+    assert summaries(tmp_path) == []
+    
+    response = client.get("/items/1", headers={PROFILE_TOKEN_HEADER: "secret"})
+    assert response.headers[PROFILE_ID_HEADER]
+    assert [summary["trigger"] for summary in summaries(tmp_path)] == ["header"]
+
+
+def test_route_and_sample_triggers_still_need_the_admin_token(tmp_path):
+    client = profiled_app(tmp_path, routes=["/items/{item_id}"], sample_rate=1.0)
+    
+    response = client.get("/items/1")
+    assert response.status_code == 200
+    assert PROFILE_ID_HEADER not in response.headers
+    assert summaries(tmp_path) == []
+    
+    response = client.get("/items/1", headers={PROFILE_TOKEN_HEADER: "secret"})
+    assert response.headers[PROFILE_ID_HEADER]
+    assert [summary["trigger"] for summary in summaries(tmp_path)] == ["route /items/{item_id}"]
+
+
+def test_nothing_is_profiled_without_a_token_configured(tmp_path):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, output_dir=str(tmp_path), sample_rate=1.0)
+    
+    assert TestClient(app).get("/", headers={PROFILE_TOKEN_HEADER: ""}).status_code == 404
+    assert os.listdir(tmp_path) == []
+
+
+def test_a_failed_profile_write_does_not_fail_the_request(tmp_path, monkeypatch):
+    def broken_write(self, profile):
+        raise RuntimeError("dictionary changed size during iteration")
+    
+    monkeypatch.setattr(ProfilingMiddleware, "_write", broken_write)
+    client = profiled_app(tmp_path)
+    
+    response = client.get("/items/1", headers={PROFILE_TOKEN_HEADER: "secret"})
+    
+    assert response.status_code == 200
+    assert response.json() == {"id": 1}
+
+
+def test_importing_the_app_leaves_anyio_internals_alone():
+    code = (
+        "import os, sys; os.environ['OPENAI_API_KEY'] = ''; import app.main; "
+        "print('anyio._backends._asyncio' in sys.modules)"
+    )
+    env = dict(os.environ, PROFILING_ENABLED="false")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=BACKEND, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "False"
\ No newline at end of file
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import threading
+
+from app.core.metrics import push_deliveries, push_resyncs, registry
+from app.core.push import BALANCE_CHANGED, EXPENSE_ADDED, MEMBER_JOINED, RESYNC, PushHub
+
+
+def counted(counter) -> float:
+    return registry._merged().get((counter, ()), 0.0)
+
+
+def drain(subscription) -> list:
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(json.loads(subscription.queue.get_nowait()))
+    return messages
+
+
+def test_messages_reach_the_groups_subscribers_only():
+    async def run():
+        hub = PushHub(queue_size=8, max_connections=10)
+        hub.publish(1, {"type": EXPENSE_ADDED})  # before start(): nowhere to deliver, so dropped
+        await hub.start()
+        alice = hub.subscribe(1, [10])
+        bob = hub.subscribe(2, [10, 20])
+        
+        hub.publish(10, {"type": EXPENSE_ADDED, "expense_id": 5})
+        # Writes run in worker threads; their messages are handed to the loop
+        thread = threading.Thread(target=hub.publish, args=(20, {"type": BALANCE_CHANGED, "pairs": []}))
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)
+        
+        assert drain(alice) == [{"type": EXPENSE_ADDED, "group_id": 10, "expense_id": 5}]
+        assert drain(bob) == [
+            {"type": EXPENSE_ADDED, "group_id": 10, "expense_id": 5},
+            {"type": BALANCE_CHANGED, "group_id": 20, "pairs": []}
+        ]
+        
+        # A new member's open connection follows the group from then on
+        hub.publish(20, {"type": MEMBER_JOINED, "user_ids": [1]})
+        hub.publish(20, {"type": EXPENSE_ADDED, "expense_id": 6})
+        assert [message["type"] for message in drain(alice)] == [MEMBER_JOINED, EXPENSE_ADDED]
+        
+        hub.unsubscribe(alice)
+        hub.unsubscribe(bob)
+        assert hub.connections == 0
+        await hub.stop()
+    
+    asyncio.run(run())
+
+
+def test_overflow_turns_the_backlog_into_one_resync_and_capacity_is_capped():
+    async def run():
+        hub = PushHub(queue_size=3, max_connections=1)
+        await hub.start()
+        slow = hub.subscribe(1, [10])
+        assert hub.subscribe(2, [10]) is None
+        deliveries, resyncs = counted(push_deliveries), counted(push_resyncs)
+        
+        for expense_id in range(5):
+            hub.publish(10, {"type": EXPENSE_ADDED, "expense_id": expense_id})
+        
+        assert drain(slow) == [{"type": RESYNC}, {"type": EXPENSE_ADDED, "group_id": 10, "expense_id": 4}]
+        assert slow.resyncs == 1
+        # The message that overflowed is counted as a resync, not a delivery
+        assert (counted(push_deliveries) - deliveries, counted(push_resyncs) - resyncs) == (4, 1)
+        await hub.stop()
+    
+    asyncio.run(run())
\ No newline at end of file
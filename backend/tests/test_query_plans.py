@@ -0,0 +1,143 @@
+"""The statements the services actually emit on the request path are served by indexes.
+
+Each service call runs against a seeded, ANALYZEd SQLite database while every
+statement it sends is captured; each captured statement is then planned with
+EXPLAIN QUERY PLAN (with its real parameters) and any full scan of a table
+fails the test. Writes count too: the UPDATE and DELETE lookups of an expense
+write are planned like reads.
+"""
+import asyncio
+import random
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, text
+
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine, read_router
+from app.schemas.expense import ExpenseCreate
+from app.services.balance_service import BalanceService
+from app.services.dashboard_service import AsyncDashboardService
+from app.services.expense_service import ExpenseService
+from app.services.group_service import GroupService
+from app.services.llm_context import UserContextBuilder
+from app.services.outbox_service import OutboxService
+from app.services.period_service import PeriodService
+from app.services.spend_rollup_service import SpendRollupService
+from benchmarks.datagen import random_expense_body, seed_dataset
+
+SCAN = re.compile(r"^SCAN (\S+)(.*)$")
+SUBQUERY = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (\S+)")
+# An FTS5 MATCH shows up as a scan of the virtual table with a non-empty index plan ("INDEX 0:M2")
+FTS_MATCH = re.compile(r" VIRTUAL TABLE INDEX \d+:\S")
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith(("PRAGMA", "BEGIN", "SAVEPOINT", "RELEASE")):
+            statements.append((statement, parameters))
+    
+    targets = [engine, async_engine.sync_engine] + [replica.engine for replica in read_router.replicas]
+    targets += [replica.async_engine.sync_engine for replica in read_router.replicas]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", capture)
+
+
+def run_async(call):
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await call(db)
+        finally:
+            # aiosqlite connections hold a thread each; close them inside this event loop
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def dataset():
+    with SessionLocal() as db:
+        data = seed_dataset(db, users=300, groups=60, expenses=3000, max_group_size=40)
+        db.commit()
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+        connection.commit()
+    return data
+
+
+def service_calls(group_id: int, user_id: int, members: list):
+    """(label, call) for the hot service paths; calls take a sync Session"""
+    body = random_expense_body(random.Random(7), members)
+    
+    def create_and_delete(db):
+        expense = ExpenseService(db).create_expense(group_id, ExpenseCreate(**body))
+        ExpenseService(db).delete_expense(expense.id)
+    
+    return [
+        ("group expense rows", lambda db: ExpenseService(db).get_group_expense_rows(group_id)),
+        ("group expense page", lambda db: ExpenseService(db).get_group_expense_rows(group_id, limit=20)),
+        ("user expenses", lambda db: ExpenseService(db).get_user_expenses(user_id)),
+        ("user recent expenses", lambda db: ExpenseService(db).get_user_recent_expense_rows(user_id, 10)),
+        ("user payer totals", lambda db: ExpenseService(db).get_user_payer_totals(user_id)),
+        ("group category totals", lambda db: ExpenseService(db).get_group_category_totals(group_id)),
+        ("expense search", lambda db: ExpenseService(db).search_group_expense_rows(group_id, "expense", 20)),
+        ("group balances", lambda db: BalanceService(db).get_group_balance_rows(group_id)),
+        ("user balance summary", lambda db: BalanceService(db).get_user_balance_summary(user_id)),
+        ("user counterparties", lambda db: BalanceService(db).get_user_counterparty_rows(user_id)),
+        ("settlement suggestions", lambda db: BalanceService(db).get_settlement_suggestions(group_id)),
+        ("groups for user", lambda db: GroupService(db).get_user_groups(user_id)),
+        ("group rows for user", lambda db: GroupService(db).get_user_group_rows(user_id)),
+        ("group", lambda db: GroupService(db).get_group(group_id)),
+        ("group spending series", lambda db: SpendRollupService(db).group_series(group_id)),
+        ("user spending series", lambda db: SpendRollupService(db).user_series(user_id)),
+        ("chat context", lambda db: UserContextBuilder(db).build(user_id)),
+        ("checkpoints", lambda db: PeriodService(db).get_checkpoints(group_id)),
+        ("outbox due groups", lambda db: OutboxService(db).due_groups(10)),
+        ("create and delete an expense", create_and_delete),
+    ]
+
+
+def scanned_tables(plan):
+    """Tables a query plan walks in full; scanning a materialised subquery or an FTS5 MATCH is fine"""
+    subqueries = {match.group(1) for match in map(SUBQUERY.match, plan) if match}
+    return [
+        match.group(1) for match in map(SCAN.match, plan)
+        if match and match.group(1) not in subqueries and match.group(1) != "CONSTANT" and not FTS_MATCH.match(match.group(2))
+    ]
+
+
+def full_scans(statements):
+    with engine.connect() as connection:
+        for sql, parameters in statements:
+            plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters)]
+            if scanned_tables(plan):
+                yield sql, plan
+
+
+def test_hot_queries_use_indexes(dataset):
+    group_id = max(dataset.expense_counts, key=dataset.expense_counts.get)
+    members = dataset.members[group_id]
+    user_id = members[0]
+    
+    failures = []
+    for label, call in service_calls(group_id, user_id, members):
+        with captured_statements() as statements:
+            with SessionLocal() as db:
+                call(db)
+        assert statements, f"{label}: no statements captured"
+        failures += [(label, sql, plan) for sql, plan in full_scans(statements)]
+    
+    with captured_statements() as statements:
+        run_async(lambda db: AsyncDashboardService(db).get_dashboard(user_id))
+    failures += [("dashboard", sql, plan) for sql, plan in full_scans(statements)]
+    
+    report = "\n\n".join(f"{label}:\n{sql}\n  " + "\n  ".join(plan) for label, sql, plan in failures)
+    assert not failures, f"full table scans:\n\n{report}"
\ No newline at end of file
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.core.readiness import ReadinessProbe
+from app.database import Base, engine
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def test_ready_only_between_startup_and_shutdown():
+    probe = ReadinessProbe(engine, Base.metadata)
+    assert probe.check()[0] is False
+    
+    probe.mark_started()
+    ready, report = probe.check()
+    assert ready
+    assert (report["status"], report["database"], report["schema"]) == ("ready", "ok", "ok")
+    
+    probe.mark_draining()
+    ready, report = probe.check()
+    assert not ready
+    assert report["draining"]
+
+
+def test_missing_tables_and_unreachable_database_are_not_ready(tmp_path):
+    probe = ReadinessProbe(create_engine(f"sqlite:///{tmp_path}/empty.db"), Base.metadata)
+    probe.mark_started()
+    ready, report = probe.check()
+    assert not ready
+    assert "expenses" in report["schema"]["missing_tables"]
+    
+    probe = ReadinessProbe(create_engine(f"sqlite:///{tmp_path}/missing/dir.db"), Base.metadata)
+    probe.mark_started()
+    ready, report = probe.check()
+    assert not ready
+    assert report["database"] == "OperationalError"
+
+
+def test_importing_the_app_touches_no_database(tmp_path):
+    # A URL whose directory doesn't exist: any connection attempt at import time would fail
+    code = "import app.main"
+    env = {"DATABASE_URL": f"sqlite:///{tmp_path}/missing/app.db", "OPENAI_API_KEY": "", "PATH": ""}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=BACKEND)
+    assert result.returncode == 0, result.stderr
+    assert not (tmp_path / "missing").exists()
\ No newline at end of file
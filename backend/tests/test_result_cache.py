@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.core.result_cache import AsyncResultCache
+
+
+def counting(results: list, delay: float = 0.0):
+    """A compute function returning "value-N" on its Nth call"""
+    async def compute():
+        results.append(None)
+        await asyncio.sleep(delay)
+        return f"value-{len(results)}"
+    return compute
+
+
+def test_versions_and_concurrent_misses():
+    async def run():
+        cache = AsyncResultCache(ttl_seconds=60, max_entries=10, stale_seconds=60)
+        calls = []
+        
+        first, second = await asyncio.gather(
+            cache.get_or_compute("group:1", "v1", counting(calls, 0.01)),
+            cache.get_or_compute("group:1", "v1", counting(calls, 0.01))
+        )
+        assert (first[0], first[1]["status"], second[0], second[1]["status"]) == ("value-1", "miss", "value-1", "shared")
+        assert (await cache.get_or_compute("group:1", "v1", counting(calls)))[1]["status"] == "hit"
+        
+        # A new version is a miss unless a stale answer is acceptable
+        value, meta = await cache.get_or_compute("group:1", "v2", counting(calls))
+        assert (value, meta["status"], meta["version"]) == ("value-2", "miss", "v2")
+        assert len(calls) == 2
+    
+    asyncio.run(run())
+
+
+def test_stale_entry_is_served_while_it_refreshes():
+    async def run():
+        cache = AsyncResultCache(ttl_seconds=60, max_entries=10, stale_seconds=60)
+        calls = []
+        await cache.get_or_compute("group:1", "v1", counting(calls))
+        
+        value, meta = await cache.get_or_compute("group:1", "v2", counting(calls, 0.01), allow_stale=True)
+        assert (value, meta["status"], meta["version"]) == ("value-1", "stale", "v1")
+        await asyncio.sleep(0.05)
+        value, meta = await cache.get_or_compute("group:1", "v2", counting(calls))
+        assert (value, meta["status"]) == ("value-2", "hit")
+    
+    asyncio.run(run())
+
+
+def test_failures_are_not_cached_and_entries_are_bounded():
+    async def run():
+        cache = AsyncResultCache(ttl_seconds=60, max_entries=2, stale_seconds=0)
+        
+        async def fail():
+            raise RuntimeError("llm down")
+        
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("group:1", "v1", fail)
+        assert cache.stats()["entries"] == 0
+        
+        for key in ("a", "b", "c"):
+            await cache.get_or_compute(key, "v1", counting([]))
+        assert cache.stats()["entries"] == 2
+        assert (await cache.get_or_compute("a", "v1", counting([])))[1]["status"] == "miss"
+    
+    asyncio.run(run())
\ No newline at end of file
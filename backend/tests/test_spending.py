@@ -0,0 +1,47 @@
+from datetime import date, datetime, timedelta, timezone
+
+from tests.conftest import API
+
+TODAY = datetime.now(timezone.utc).date()
+
+
+def series(client, path: str, **params) -> list:
+    response = client.get(f"{API}{path}", params=params)
+    response.raise_for_status()
+    return response.json()["series"]
+
+
+def test_group_series_follows_writes_and_survives_period_close(client, make_group, add_expense):
+    group_id, (alice, bob) = make_group(2)
+    add_expense(group_id, alice, [alice, bob], amount=30.0)
+    removed = add_expense(group_id, bob, [alice, bob], amount=10.0)
+    add_expense(group_id, bob, [alice, bob], amount=12.0, consistency="eventual")
+    client.delete(f"{API}/groups/expenses/{removed['id']}").raise_for_status()
+    # Eventual writes reach the rollups once the outbox applies them, and the next sync write drains them
+    add_expense(group_id, alice, [alice, bob], amount=8.0)
+    
+    expected = [{"start": TODAY.isoformat(), "expense_count": 3, "total_amount": 50.0}]
+    assert series(client, f"/groups/{group_id}/spending", bucket="day") == expected
+    client.post(f"{API}/groups/{group_id}/close-period").raise_for_status()
+    assert series(client, f"/groups/{group_id}/spending", bucket="day") == expected
+    
+    points = series(client, f"/users/{bob}/spending", bucket="day")
+    assert [(point["paid_count"], point["paid_amount"], point["share_amount"]) for point in points] == [(1, 12.0, 25.0)]
+
+
+def test_ranges_are_zero_filled_and_bounded(client, make_group, add_expense):
+    group_id, members = make_group(2)
+    add_expense(group_id, members[0], members, amount=20.0)
+    start = TODAY - timedelta(days=2)
+    
+    points = series(client, f"/groups/{group_id}/spending", bucket="day", start=start.isoformat(), end=TODAY.isoformat())
+    assert [(point["start"], point["total_amount"]) for point in points] == [
+        ((start + timedelta(days=offset)).isoformat(), 20.0 if offset == 2 else 0) for offset in range(3)
+    ]
+    
+    url = f"{API}/groups/{group_id}/spending"
+    assert client.get(url, params={"start": TODAY.isoformat(), "end": start.isoformat()}).status_code == 400
+    too_long = {"bucket": "day", "start": date(2000, 1, 1).isoformat(), "end": TODAY.isoformat()}
+    assert client.get(url, params=too_long).status_code == 400
+    assert client.get(url, params={"bucket": "year"}).status_code == 422
+    assert client.get(f"{API}/groups/9999/spending").status_code == 404
\ No newline at end of file